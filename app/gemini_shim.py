@@ -2,54 +2,30 @@ import os
 import sys
 import argparse
 import time
-import subprocess
-from google import genai
 from google.genai.errors import ServerError, ClientError
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
+# Allow running as a plain script (python3 app/gemini_shim.py) as well as a module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.git_alchemist.src.core import get_gemini_client, context_budget
+from app.git_alchemist.src import file_tree
+
+# Token budget for the injected (compacted) file tree
+TREE_TOKEN_BUDGET = int(os.getenv("ALCHEMIST_SHIM_TREE_TOKENS", "3000"))
+
 # ==========================================
 #  GEMINI SHIM v2.0 (Orchestrator Edition)
 # ==========================================
 
-def get_file_tree():
+def get_file_tree(model_id=None):
     """
-    Returns a clean string of the project's file structure.
+    Returns the project's file structure, with large directories collapsed into
+    summaries so the whole repo fits in TREE_TOKEN_BUDGET tokens. Cached until
+    HEAD or the git index changes.
     Crucial for preventing AI hallucinations.
     """
-    # Method 1: Git (Fastest & Most Accurate)
-    try:
-        # We assume the CWD is the target repository root
-        result = subprocess.run(
-            ["git", "ls-files"], 
-            capture_output=True, 
-            text=True, 
-            timeout=2
-        )
-        if result.returncode == 0 and result.stdout.strip():
-            files = result.stdout.strip().split('\n')
-            # Limit to top 300 files to save context window
-            return "\n".join(files[:300])
-    except Exception:
-        pass
-
-    # Method 2: Manual Scan (Fallback for non-git folders)
-    allowed_exts = {'.py', '.js', '.ts', '.tsx', '.html', '.css', '.md', '.json', '.yml', '.rs', '.c', '.cpp', '.h', '.ps1'}
-    file_list = []
-    
-    for root, dirs, files in os.walk("."):
-        # Skip hidden folders, node_modules, and the script tools themselves
-        dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ['node_modules', 'dist', 'venv', '__pycache__']]
-        
-        for file in files:
-            if os.path.splitext(file)[1] in allowed_exts:
-                rel_path = os.path.relpath(os.path.join(root, file), ".")
-                file_list.append(rel_path)
-                if len(file_list) >= 100: # Hard limit for fallback
-                    break
-        if len(file_list) >= 100:
-            break
-            
-    return "\n".join(file_list)
+    budget = min(TREE_TOKEN_BUDGET, context_budget(models=[model_id] if model_id else None))
+    return file_tree.get_file_tree(".", budget)
 
 def main():
     # 1. Parse Arguments
@@ -72,7 +48,7 @@ def main():
     # 2. AUTO-DETECT CONTEXT
     # server.py sets the CWD to the /app/workspace/<repo> folder.
     current_folder = os.path.basename(os.getcwd())
-    file_tree = get_file_tree()
+    file_tree = get_file_tree(args.model)
 
     # 3. INJECT CONTEXT
     # This invisible footer forces the AI to look at the REAL files.
@@ -96,7 +72,8 @@ def main():
         print("Error: GEMINI_API_KEY missing in Docker environment.", file=sys.stderr)
         sys.exit(1)
 
-    client = genai.Client(api_key=api_key)
+    # Shared, long-lived client from the core registry (default API version)
+    client = get_gemini_client(api_key, api_version=None)
 
     # 5. Safety Sleep (Rate Limit Protection)
     if "gemini-3" in model_id:
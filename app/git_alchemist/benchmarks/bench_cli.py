@@ -0,0 +1,267 @@
+"""
+Offline end-to-end benchmark of the Git-Alchemist CLI.
+
+Every command runs as a real subprocess against a local fake Gemini backend
+(benchmarks.fake_gemini), a fake GitHub API (benchmarks.fake_github) and a
+stub `gh` (benchmarks.fake_gh), on synthetic projects and accounts of several
+sizes. Measures wall time, Gemini calls (and injected 429s), prompt bytes,
+GitHub API requests, gh spawns and peak RSS per command.
+
+Run from app/git_alchemist:
+    python -m benchmarks.bench_cli                                 # every command, small + medium
+    python -m benchmarks.bench_cli --sizes large --commands sage fix
+    python -m benchmarks.bench_cli --latency 0.3 --rate-429 0.2    # slow, flaky backend
+    python -m benchmarks.bench_cli --exhausted gemma-3-27b-it      # first model always out of quota
+    python -m benchmarks.bench_cli --gh-transport cli              # every GitHub call through gh
+    python -m benchmarks.bench_cli --save baseline.json            # record a run...
+    python -m benchmarks.bench_cli --compare baseline.json         # ...and diff a later one against it
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import subprocess
+import tempfile
+import statistics
+from rich.console import Console
+from rich.table import Table
+from . import fake_gh
+from .fake_gemini import FakeGemini, start_server
+from .fake_github import FakeGitHub, start_server as start_github_server
+from .fixtures import SIZES, make_project, make_account
+
+console = Console()
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Rate limits high enough that the limiter never sleeps: the benchmark measures the tool, not the quota
+UNTHROTTLED = ["--jobs", "8", "--rpm", "100000", "--gh-rpm", "100000"]
+
+# name -> (CLI arguments, stdin answers). {fix_file} is filled in per project.
+SCENARIOS = {
+    "describe": (["describe", *UNTHROTTLED], ""),
+    "describe-batch": (["describe", "--batch", *UNTHROTTLED], ""),
+    "topics": (["topics", *UNTHROTTLED], ""),
+    "topics-batch": (["topics", "--batch", *UNTHROTTLED], ""),
+    "audit": (["audit"], ""),
+    "audit-all": (["audit", "--all"], ""),
+    "sage": (["sage", "How does the retry logic combine the quota with the cache budget?"], ""),
+    "commit": (["commit"], "c\n"),
+    "profile": (["profile"], "n\n"),
+    "fix": (["fix", "{fix_file}", "Add type hints to every function"], "n\n"),
+}
+DEFAULT_COMMANDS = ["describe", "topics", "audit", "sage", "commit", "profile", "fix"]
+
+def _peak_rss_mb(rusage):
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    return rusage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+def run_cli(argv, cwd, env, stdin_text, log_path):
+    """
+    Runs one CLI invocation. Returns (exit code, wall seconds, peak RSS in MiB or None).
+    """
+    with open(log_path, "wb") as log:
+        started = time.perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, "-m", "src.cli", *argv],
+            cwd=cwd, env=env, stdin=subprocess.PIPE, stdout=log, stderr=subprocess.STDOUT
+        )
+        process.stdin.write(stdin_text.encode("utf-8"))
+        process.stdin.close()
+        if hasattr(os, "wait4"):
+            # wait4 reports the child's own peak RSS (RUSAGE_CHILDREN would be a max over all runs)
+            _, status, rusage = os.wait4(process.pid, 0)
+            elapsed = time.perf_counter() - started
+            process.returncode = os.waitstatus_to_exitcode(status)
+            return process.returncode, elapsed, _peak_rss_mb(rusage)
+        process.wait()
+        return process.returncode, time.perf_counter() - started, None
+
+def _count_lines(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return sum(1 for _ in f)
+    except OSError:
+        return 0
+
+def run_scenario(name, size, work, project, fix_file, backend, base_url, github, github_url, bin_dir, account_path, warm):
+    """
+    Runs one scenario in a fresh cache (after one untimed warm-up run if `warm`)
+    and returns its measurements.
+    """
+    argv, stdin_text = SCENARIOS[name]
+    argv = [arg.format(fix_file=fix_file) for arg in argv]
+    run_dir = os.path.join(work, "runs", f"{size}-{name}")
+    os.makedirs(run_dir, exist_ok=True)
+    # profile writes its draft to the cwd, so it runs outside the project
+    cwd = run_dir if name == "profile" else project
+
+    env = dict(os.environ)
+    env.update({
+        "PATH": bin_dir + os.pathsep + env.get("PATH", ""),
+        "PYTHONPATH": PACKAGE_ROOT,
+        "PYTHONUNBUFFERED": "1",
+        "GEMINI_API_KEY": "offline-benchmark",
+        "GEMINI_BASE_URL": base_url,
+        "GH_TOKEN": "offline-benchmark",
+        "GITHUB_API_URL": github_url,
+        "FAKE_GH_DATA": account_path,
+        "FAKE_GH_LOG": os.path.join(run_dir, "gh_calls.jsonl"),
+        "ALCHEMIST_CACHE_DIR": os.path.join(run_dir, "cache"),
+        "ALCHEMIST_NO_EVENTS": "1",
+        "NO_COLOR": "1",
+        "COLUMNS": "120",
+    })
+
+    def restore_fix_target():
+        backup = os.path.join(project, fix_file + ".bak")
+        if name == "fix" and os.path.exists(backup):
+            os.replace(backup, os.path.join(project, fix_file))
+
+    if warm:
+        run_cli(argv, cwd, env, stdin_text, os.path.join(run_dir, "warmup.log"))
+        restore_fix_target()
+    if os.path.exists(env["FAKE_GH_LOG"]):
+        os.remove(env["FAKE_GH_LOG"])
+    backend.reset()
+    github.reset()
+
+    exit_code, elapsed, rss = run_cli(argv, cwd, env, stdin_text, os.path.join(run_dir, "output.log"))
+    restore_fix_target()
+    stats = backend.snapshot()
+    github_stats = github.snapshot()
+    return {
+        "size": size,
+        "command": name,
+        "exit_code": exit_code,
+        "wall_seconds": round(elapsed, 4),
+        "gemini_calls": stats["calls"],
+        "gemini_429s": stats["rate_limited"],
+        "prompt_bytes": stats["prompt_bytes"],
+        "github_requests": github_stats["requests"],
+        "github_not_modified": github_stats["not_modified"],
+        "gh_calls": _count_lines(env["FAKE_GH_LOG"]),
+        "peak_rss_mb": round(rss, 1) if rss is not None else None,
+        "log": os.path.join(run_dir, "output.log"),
+    }
+
+def _median_result(runs):
+    """Median of the numeric measurements across repeats (counts come from the first run)."""
+    result = dict(runs[0])
+    for key in ("wall_seconds", "peak_rss_mb"):
+        values = [r[key] for r in runs if r[key] is not None]
+        result[key] = round(statistics.median(values), 4) if values else None
+    result["exit_code"] = max(r["exit_code"] for r in runs)
+    return result
+
+def _delta(value, baseline):
+    if value is None or not baseline:
+        return ""
+    change = (value - baseline) / baseline
+    color = "red" if change > 0.05 else "green" if change < -0.05 else "gray"
+    return f" [{color}]({change:+.0%})[/{color}]"
+
+def print_results(results, baseline=None):
+    base = {(r["size"], r["command"]): r for r in (baseline or [])}
+    table = Table(title="Git-Alchemist CLI benchmark (offline)", border_style="blue")
+    table.add_column("Size", style="cyan")
+    table.add_column("Command", style="cyan")
+    table.add_column("Exit", justify="right")
+    table.add_column("Wall", justify="right")
+    table.add_column("Gemini calls", justify="right")
+    table.add_column("429s", justify="right")
+    table.add_column("Prompt bytes", justify="right")
+    table.add_column("GitHub API", justify="right")
+    table.add_column("gh spawns", justify="right")
+    table.add_column("Peak RSS", justify="right")
+    for r in results:
+        b = base.get((r["size"], r["command"]), {})
+        exit_text = str(r["exit_code"]) if r["exit_code"] == 0 else f"[red]{r['exit_code']}[/red]"
+        table.add_row(
+            r["size"], r["command"], exit_text,
+            f"{r['wall_seconds']:.2f}s{_delta(r['wall_seconds'], b.get('wall_seconds'))}",
+            f"{r['gemini_calls']}{_delta(r['gemini_calls'], b.get('gemini_calls'))}",
+            str(r["gemini_429s"]),
+            f"{r['prompt_bytes']:,}{_delta(r['prompt_bytes'], b.get('prompt_bytes'))}",
+            f"{r['github_requests']} ({r.get('github_not_modified', 0)} 304){_delta(r['github_requests'], b.get('github_requests'))}",
+            f"{r['gh_calls']}{_delta(r['gh_calls'], b.get('gh_calls'))}",
+            "-" if r["peak_rss_mb"] is None else f"{r['peak_rss_mb']:.0f} MiB{_delta(r['peak_rss_mb'], b.get('peak_rss_mb'))}",
+        )
+    console.print(table)
+    failed = [r for r in results if r["exit_code"] != 0]
+    for r in failed:
+        console.print(f"[red]{r['size']}/{r['command']} exited with {r['exit_code']}; output: {r['log']}[/red]")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every Git-Alchemist command offline")
+    parser.add_argument("--commands", nargs="+", choices=sorted(SCENARIOS), default=DEFAULT_COMMANDS)
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=["small", "medium"])
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per command (median wall time and RSS)")
+    parser.add_argument("--warm", action="store_true", help="Measure with warm caches (one untimed run first)")
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake Gemini seconds before each answer")
+    parser.add_argument("--stream-interval", type=float, default=0.0, help="Fake Gemini seconds between streamed chunks")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Probability of a 429 on any Gemini call")
+    parser.add_argument("--exhausted", nargs="*", default=[], help="Models that always answer 429")
+    parser.add_argument("--gh-transport", choices=["api", "cli"], default="api",
+                        help="GitHub calls over the pooled API client (default) or forced through gh")
+    parser.add_argument("--save", help="Write the results as JSON (for tracking over time)")
+    parser.add_argument("--compare", help="Earlier --save output to show changes against")
+    parser.add_argument("--keep", action="store_true", help="Keep the work directory (logs, caches, fixtures)")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+
+    work = tempfile.mkdtemp(prefix="bench_cli_")
+    backend = FakeGemini(args.latency, args.stream_interval, args.rate_429, args.exhausted)
+    server, base_url = start_server(backend)
+    github = FakeGitHub()
+    github_server, github_url = start_github_server(github)
+    if args.gh_transport == "cli":
+        os.environ["ALCHEMIST_GH_CLI"] = "1"
+    bin_dir = os.path.join(work, "bin")
+    fake_gh.install(bin_dir)
+
+    results = []
+    try:
+        for size in args.sizes:
+            spec = SIZES[size]
+            console.print(f"[cyan]Preparing {size} fixtures ({spec['files']} files, {spec['repos']} repos)...[/cyan]")
+            project = os.path.join(work, size, "project")
+            fix_file = make_project(project, spec["files"], spec["lines"])
+            account_path = os.path.join(work, size, "account.json")
+            make_account(account_path, spec["repos"])
+            github.load(account_path)
+            for name in args.commands:
+                console.print(f"[gray]{size}/{name}...[/gray]")
+                runs = [
+                    run_scenario(name, size, work, project, fix_file, backend, base_url, github, github_url,
+                                 bin_dir, account_path, args.warm)
+                    for _ in range(max(1, args.repeat))
+                ]
+                results.append(_median_result(runs))
+    finally:
+        server.shutdown()
+        github_server.shutdown()
+
+    print_results(results, baseline)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "config": {k: v for k, v in vars(args).items() if k not in ("save", "compare", "keep")},
+                "results": [{k: v for k, v in r.items() if k != "log"} for r in results],
+            }, f, indent=2)
+        console.print(f"[green]Results saved to {args.save}[/green]")
+    failed = any(r["exit_code"] != 0 for r in results)
+    if args.keep or failed:
+        console.print(f"[gray]Work directory kept: {work}[/gray]")
+    else:
+        shutil.rmtree(work, ignore_errors=True)
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
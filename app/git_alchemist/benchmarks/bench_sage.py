@@ -0,0 +1,111 @@
+"""
+Sage context benchmark: full-dump prompt vs. retrieval index.
+
+Run from app/git_alchemist:
+    python -m benchmarks.bench_sage                      # synthetic repo (400 files)
+    python -m benchmarks.bench_sage --repo ~/code/big    # a real checkout
+    python -m benchmarks.bench_sage --live               # also time real Gemini calls
+"""
+import os
+import time
+import random
+import shutil
+import argparse
+import tempfile
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+
+WORDS = [
+    "cache", "token", "repo", "parser", "client", "worker", "budget", "index", "stream", "profile",
+    "audit", "commit", "topic", "license", "readme", "branch", "remote", "quota", "model", "prompt",
+    "session", "buffer", "socket", "config", "render", "schema", "queue", "metric", "retry", "shard",
+]
+
+def make_synthetic_repo(path, files, lines_per_file, seed=7):
+    """
+    Writes `files` Python modules of ~`lines_per_file` lines with varied identifiers.
+    """
+    rng = random.Random(seed)
+    for i in range(files):
+        package = os.path.join(path, f"pkg{i % 20}")
+        os.makedirs(package, exist_ok=True)
+        body = [f'"""Module {i}: {" ".join(rng.sample(WORDS, 4))}."""', ""]
+        while len(body) < lines_per_file:
+            a, b = rng.sample(WORDS, 2)
+            body += [
+                f"def {a}_{b}_{len(body)}(value):",
+                f"    # Combine the {a} with the {b} state",
+                f"    {a} = value.get('{b}')",
+                f"    return {a} or {rng.randint(0, 999)}",
+                "",
+            ]
+        with open(os.path.join(package, f"module_{i}.py"), "w", encoding="utf-8") as f:
+            f.write("\n".join(body))
+    with open(os.path.join(path, "README.md"), "w", encoding="utf-8") as f:
+        f.write("# Synthetic benchmark repository\n\nGenerated by bench_sage.\n")
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare Sage prompt size/latency: full dump vs. retrieval index")
+    parser.add_argument("--repo", help="Repository to benchmark (default: generate a synthetic one)")
+    parser.add_argument("--files", type=int, default=400, help="Synthetic repo: number of files")
+    parser.add_argument("--lines", type=int, default=150, help="Synthetic repo: lines per file")
+    parser.add_argument("--question", default="How does the retry logic combine the quota with the cache budget?")
+    parser.add_argument("--budget", type=int, default=12000, help="Token budget for the retrieval context")
+    parser.add_argument("--live", action="store_true", help="Also send both prompts to Gemini and time them")
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix="bench_sage_")
+    # Isolated cache so the first indexed run is genuinely cold
+    os.environ["ALCHEMIST_CACHE_DIR"] = os.path.join(work, "cache")
+    os.environ["ALCHEMIST_NO_CACHE"] = "1"
+
+    from src.core import estimate_tokens, generate_content
+    from src.sage import get_codebase_context, list_source_files
+    from src.sage_index import build_context
+
+    repo = args.repo
+    if not repo:
+        repo = os.path.join(work, "repo")
+        make_synthetic_repo(repo, args.files, args.lines)
+    cwd = os.getcwd()
+    os.chdir(repo)
+    try:
+        full_context, full_time = timed(get_codebase_context)
+        (index_context, cold_stats), cold_time = timed(lambda: build_context(".", list_source_files(), args.question, args.budget))
+        (_, warm_stats), warm_time = timed(lambda: build_context(".", list_source_files(), args.question, args.budget))
+
+        # Bump one file's mtime (contents untouched, so --repo checkouts stay clean)
+        touched = list_source_files()[0]
+        os.utime(touched, (time.time(), time.time() + 1))
+        (_, incr_stats), incr_time = timed(lambda: build_context(".", list_source_files(), args.question, args.budget))
+
+        table = Table(title=f"Sage context: {len(list_source_files())} files", border_style="blue")
+        table.add_column("Strategy", style="cyan")
+        table.add_column("Build time", justify="right")
+        table.add_column("Prompt chars", justify="right")
+        table.add_column("~Tokens", justify="right")
+        table.add_column("Files (re)indexed", justify="right")
+        table.add_row("Full dump", f"{full_time * 1000:.0f} ms", f"{len(full_context):,}", f"{estimate_tokens(full_context):,}", "-")
+        table.add_row("Index (cold)", f"{cold_time * 1000:.0f} ms", f"{len(index_context):,}", f"{cold_stats['tokens']:,}", str(cold_stats["indexed"]))
+        table.add_row("Index (warm)", f"{warm_time * 1000:.0f} ms", "", f"{warm_stats['tokens']:,}", str(warm_stats["indexed"]))
+        table.add_row("Index (1 file changed)", f"{incr_time * 1000:.0f} ms", "", f"{incr_stats['tokens']:,}", str(incr_stats["indexed"]))
+        console.print(table)
+
+        if args.live:
+            for label, context in (("Full dump", full_context), ("Index", index_context)):
+                prompt = f"CONTEXT:\n{context}\n\nUSER QUESTION:\n{args.question}"
+                _, latency = timed(generate_content, prompt)
+                console.print(f"[magenta]{label}:[/magenta] Gemini round-trip {latency:.2f}s")
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(work, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+Offline stand-in for the Gemini REST API.
+
+Serves generateContent and streamGenerateContent (SSE) on localhost with a
+configurable latency, injected 429s and canned answers picked by prompt
+content, and counts calls and prompt bytes per model. Point Git-Alchemist at
+it with GEMINI_BASE_URL=http://127.0.0.1:<port> (any GEMINI_API_KEY works).
+
+Run from app/git_alchemist:
+    python -m benchmarks.fake_gemini --port 8765 --latency 0.2 --rate-429 0.1
+"""
+import re
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROUTE = re.compile(r"^/[^/]+/models/([^/:]+):(generateContent|streamGenerateContent)")
+
+def _batch_answer(prompt):
+    """A JSON object keyed by the repository names of a batched prompt."""
+    names = re.findall(r'^\{"name": "([^"]+)"', prompt, re.MULTILINE)
+    if "GitHub topics" in prompt:
+        return json.dumps({name: ["python", "cli", "automation"] for name in names})
+    return json.dumps({name: f"Automates {name} workflows for synthetic benchmarks" for name in names})
+
+def _placement_answer(prompt):
+    """Every new project under the first existing profile category (or a new one)."""
+    categories = re.findall(r"^- (.+?) \(e\.g\. ", prompt, re.MULTILINE)
+    names = re.findall(r"^- Name: (.+)$", prompt, re.MULTILINE)
+    entries = [{"name": name, "description": f"Synthetic {name} project."} for name in names]
+    return json.dumps({categories[0] if categories else "Tools": entries})
+
+# (prompt marker, answer) pairs, first match wins. Answers can be callables taking the prompt.
+DEFAULT_RESPONSES = [
+    ("keys are exactly the repository names", _batch_answer),
+    ("semantic commit messages", "1. feat(core): add benchmark fixtures\n2. refactor(scanner): simplify file walk\n3. chore: update generated modules"),
+    ("GitHub topics", '["python", "cli", "automation"]'),
+    ("repository description", "Automates synthetic benchmark workflows for offline testing"),
+    ("categories of an existing GitHub Profile README", _placement_answer),
+    ("GitHub Profile", "# Projects\n\n## Tools\n- **[bench-tool](https://github.com/bench-user/bench-tool)** - Synthetic project\n"),
+    ("Fix/Modify Code", '"""Rewritten by the fake Gemini backend."""\n\ndef value():\n    return 42\n'),
+    ("The Sage", "The retry logic lives in the core module. Each model is attempted in order, "
+                 "and quota errors move on to the next model in the tier."),
+    ("technical implementation plan", '{"title": "Benchmark issue", "body": "Synthetic issue body.", "label": "enhancement"}'),
+]
+DEFAULT_ANSWER = "This is a canned answer from the offline Gemini stand-in."
+# Streamed answers are split into chunks of this many words
+STREAM_WORDS = 8
+
+
+class FakeGemini:
+    """
+    Config and counters shared by the request handlers.
+    latency: seconds before the first byte of every answer.
+    stream_interval: seconds between streamed chunks.
+    rate_429: probability that any call is rejected with RESOURCE_EXHAUSTED.
+    exhausted: models that always answer 429 (forces fallbacks).
+    """
+
+    def __init__(self, latency=0.0, stream_interval=0.0, rate_429=0.0, exhausted=(), responses=None, seed=7):
+        self.latency = latency
+        self.stream_interval = stream_interval
+        self.rate_429 = rate_429
+        self.exhausted = set(exhausted)
+        self.responses = list(responses or []) + DEFAULT_RESPONSES
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.stats = {"calls": 0, "rate_limited": 0, "prompt_bytes": 0, "response_bytes": 0, "models": {}}
+
+    def snapshot(self):
+        with self._lock:
+            return json.loads(json.dumps(self.stats))
+
+    def answer(self, prompt):
+        for marker, response in self.responses:
+            if marker in prompt:
+                return response(prompt) if callable(response) else response
+        return DEFAULT_ANSWER
+
+    def record(self, model, prompt_bytes, response_bytes=0, rate_limited=False):
+        with self._lock:
+            model_stats = self.stats["models"].setdefault(model, {"calls": 0, "rate_limited": 0})
+            self.stats["calls"] += 1
+            model_stats["calls"] += 1
+            self.stats["prompt_bytes"] += prompt_bytes
+            self.stats["response_bytes"] += response_bytes
+            if rate_limited:
+                self.stats["rate_limited"] += 1
+                model_stats["rate_limited"] += 1
+
+    def should_reject(self, model):
+        if model in self.exhausted:
+            return True
+        with self._lock:
+            return self._random.random() < self.rate_429
+
+
+def _prompt_text(body):
+    parts = []
+    for content in body.get("contents") or []:
+        for part in content.get("parts") or []:
+            if part.get("text"):
+                parts.append(part["text"])
+    return "\n".join(parts)
+
+def _candidate(model, text):
+    return {
+        "candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "finishReason": "STOP", "index": 0}],
+        "modelVersion": model,
+    }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    @property
+    def backend(self):
+        return self.server.backend
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/_stats":
+            self._send_json(200, self.backend.snapshot())
+        else:
+            self._send_json(404, {"error": {"code": 404, "message": "Not found", "status": "NOT_FOUND"}})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.path == "/_reset":
+            self.backend.reset()
+            self._send_json(200, {})
+            return
+        match = ROUTE.match(self.path)
+        if not match:
+            self._send_json(404, {"error": {"code": 404, "message": "Not found", "status": "NOT_FOUND"}})
+            return
+        model, method = match.groups()
+        prompt = _prompt_text(json.loads(body or b"{}"))
+        prompt_bytes = len(prompt.encode("utf-8"))
+
+        if self.backend.latency:
+            time.sleep(self.backend.latency)
+        if self.backend.should_reject(model):
+            self.backend.record(model, prompt_bytes, rate_limited=True)
+            self._send_json(429, {"error": {
+                "code": 429,
+                "message": "Resource has been exhausted (e.g. check quota).",
+                "status": "RESOURCE_EXHAUSTED",
+            }})
+            return
+
+        text = self.backend.answer(prompt)
+        self.backend.record(model, prompt_bytes, len(text.encode("utf-8")))
+        if method == "generateContent":
+            self._send_json(200, _candidate(model, text))
+        else:
+            self._stream(model, text)
+
+    def _stream(self, model, text):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        words = text.split(" ")
+        for i in range(0, len(words), STREAM_WORDS):
+            piece = " ".join(words[i:i + STREAM_WORDS]) + (" " if i + STREAM_WORDS < len(words) else "")
+            event = f"data: {json.dumps(_candidate(model, piece))}\r\n\r\n".encode("utf-8")
+            self.wfile.write(f"{len(event):x}\r\n".encode("ascii") + event + b"\r\n")
+            self.wfile.flush()
+            if self.backend.stream_interval:
+                time.sleep(self.backend.stream_interval)
+        self.wfile.write(b"0\r\n\r\n")
+
+
+def start_server(backend, host="127.0.0.1", port=0):
+    """
+    Serves `backend` on a background thread. Returns (server, base_url);
+    port 0 picks a free port.
+    """
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.backend = backend
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline Gemini stand-in for benchmarks")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds before each answer")
+    parser.add_argument("--stream-interval", type=float, default=0.0, help="Seconds between streamed chunks")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Probability of a 429 on any call")
+    parser.add_argument("--exhausted", nargs="*", default=[], help="Models that always answer 429")
+    parser.add_argument("--responses", help='JSON file of {"prompt marker": "answer"} checked before the defaults')
+    args = parser.parse_args()
+
+    responses = []
+    if args.responses:
+        with open(args.responses, "r", encoding="utf-8") as f:
+            responses = list(json.load(f).items())
+    backend = FakeGemini(args.latency, args.stream_interval, args.rate_429, args.exhausted, responses)
+    server, base_url = start_server(backend, port=args.port)
+    print(f"Fake Gemini listening on {base_url} (stats: {base_url}/_stats)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
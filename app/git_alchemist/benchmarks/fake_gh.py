@@ -0,0 +1,187 @@
+"""
+Stub `gh` executable for offline benchmarks (and the fixture logic shared
+with benchmarks.fake_github).
+
+Answers the gh calls Git-Alchemist makes (user lookups, the inventory and
+repo-details GraphQL queries, profile README fetches, repo view/edit, labels,
+PRs) from a JSON fixture, and appends every call to a JSON-lines log.
+
+    FAKE_GH_DATA  fixture written by benchmarks.fixtures.make_account
+    FAKE_GH_LOG   optional call log (one {"argv", "cwd"} object per call)
+
+install(bin_dir) writes a `gh` wrapper into bin_dir; put it first on PATH.
+"""
+import os
+import re
+import sys
+import json
+import stat
+import hashlib
+
+PAGE_SIZE = 100
+
+def install(bin_dir):
+    """
+    Writes a `gh` launcher for this stub into `bin_dir`. Returns its path.
+    """
+    os.makedirs(bin_dir, exist_ok=True)
+    path = os.path.join(bin_dir, "gh")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f'#!/bin/sh\nexec "{sys.executable}" "{os.path.abspath(__file__)}" "$@"\n')
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return path
+
+def load_fixture(path=None):
+    with open(path or os.environ["FAKE_GH_DATA"], "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _log(argv):
+    path = os.getenv("FAKE_GH_LOG")
+    if path:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"argv": argv, "cwd": os.getcwd()}) + "\n")
+
+def _fields(argv):
+    """-f/-F name=value pairs of a `gh api` call."""
+    fields = {}
+    for flag, value in zip(argv, argv[1:]):
+        if flag in ("-f", "-F", "--field", "--raw-field"):
+            name, _, field_value = value.partition("=")
+            fields[name] = field_value
+    return fields
+
+def _option(argv, *names):
+    for flag, value in zip(argv, argv[1:]):
+        if flag in names:
+            return value
+    return None
+
+def _topics(repo):
+    return {"nodes": [{"topic": {"name": name}} for name in repo.get("topics") or []]}
+
+def _license(repo):
+    return {"spdxId": repo["license"], "name": repo["license"]} if repo.get("license") else None
+
+def inventory_page(data, cursor=None):
+    """The inventory GraphQL query's response for one page (cursors are list offsets)."""
+    repos = sorted(data["repos"], key=lambda r: r["updatedAt"], reverse=True)
+    start = int(cursor or 0)
+    page = repos[start:start + PAGE_SIZE]
+    nodes = [{
+        "name": r["name"],
+        "nameWithOwner": f"{data['login']}/{r['name']}",
+        "description": r.get("description"),
+        "url": f"https://github.com/{data['login']}/{r['name']}",
+        "isPrivate": r.get("isPrivate", False),
+        "isArchived": r.get("isArchived", False),
+        "isFork": r.get("isFork", False),
+        "stargazerCount": r.get("stargazerCount", 0),
+        "updatedAt": r["updatedAt"],
+        "pushedAt": r.get("pushedAt") or r["updatedAt"],
+        "licenseInfo": _license(r),
+        "repositoryTopics": _topics(r),
+    } for r in page]
+    end = start + len(page)
+    return {"data": {"repositoryOwner": {"repositories": {
+        "pageInfo": {"hasNextPage": end < len(repos), "endCursor": str(end)},
+        "nodes": nodes,
+    }}}}
+
+def rest_repo(data, repo):
+    """A REST repository object (GET /repos/{owner}/{repo}, /user/repos)."""
+    return {
+        "name": repo["name"],
+        "full_name": f"{data['login']}/{repo['name']}",
+        "description": repo.get("description"),
+        "html_url": f"https://github.com/{data['login']}/{repo['name']}",
+        "private": repo.get("isPrivate", False),
+        "archived": repo.get("isArchived", False),
+        "fork": repo.get("isFork", False),
+        "stargazers_count": repo.get("stargazerCount", 0),
+        "updated_at": repo["updatedAt"],
+        "pushed_at": repo.get("pushedAt") or repo["updatedAt"],
+        "license": {"spdx_id": repo["license"], "name": repo["license"]} if repo.get("license") else None,
+        "topics": repo.get("topics") or [],
+    }
+
+def rest_repos_page(data, page=1, per_page=PAGE_SIZE):
+    """One page of GET /user/repos?sort=updated. Returns (repos, has_next_page)."""
+    repos = sorted(data["repos"], key=lambda r: r["updatedAt"], reverse=True)
+    start = (page - 1) * per_page
+    return [rest_repo(data, r) for r in repos[start:start + per_page]], start + per_page < len(repos)
+
+def repo_details(data, query):
+    """
+    The response to an aliased repository query (github_data.build_query, with
+    the details or the audit selection). `alias: object(expression: "HEAD:path")`
+    lookups resolve against the fixture's `files` (README.md alone if absent).
+    """
+    repos = {r["name"]: r for r in data["repos"]}
+    objects = dict(re.findall(r'(\w+): object\(expression: "HEAD:([^"]*)"\)', query))
+    result = {}
+    for alias, name in re.findall(r'(\w+): repository\(owner: "[^"]*", name: "([^"]*)"\)', query):
+        repo = repos.get(name)
+        if not repo:
+            result[alias] = None
+            continue
+        rest_node = rest_repo(data, repo)
+        node = {"name": name, "description": repo.get("description"), "licenseInfo": _license(repo),
+                "repositoryTopics": _topics(repo), "url": rest_node["html_url"], "isPrivate": rest_node["private"],
+                "isArchived": rest_node["archived"], "isFork": rest_node["fork"], "pushedAt": rest_node["pushed_at"],
+                "defaultBranchRef": {"target": {"oid": hashlib.sha1(f"{name}@{rest_node['pushed_at']}".encode()).hexdigest()}}}
+        files = repo.get("files") or (["README.md"] if repo.get("readme") else [])
+        for field, path in objects.items():
+            if path not in files:
+                node[field] = None
+            elif path.lower().startswith("readme"):
+                node[field] = {"id": f"{name}:{path}", "text": repo.get("readme") or ""}
+            else:
+                node[field] = {"id": f"{name}:{path}"}
+        result[alias] = node
+    return {"data": result}
+
+def _api(data, argv):
+    endpoint = argv[0] if argv else ""
+    if endpoint == "user":
+        query = _option(argv, "-q", "--jq") or ""
+        if "email" in query:
+            return data.get("email") or "", 0
+        if "login" in query:
+            return data["login"], 0
+        return json.dumps({"login": data["login"], "email": data.get("email")}), 0
+    if endpoint == "graphql":
+        fields = _fields(argv)
+        query = fields.get("query", "")
+        if "repositoryOwner" in query:
+            return json.dumps(inventory_page(data, fields.get("cursor"))), 0
+        return json.dumps(repo_details(data, query)), 0
+    if endpoint.endswith("/readme"):
+        if data.get("profile_readme"):
+            return data["profile_readme"], 0
+        return '{"message": "Not Found"}', 1
+    return f"stub gh: unsupported endpoint {endpoint}", 1
+
+def run(argv):
+    data = load_fixture()
+    if argv[:1] == ["api"]:
+        return _api(data, argv[1:])
+    if argv[:2] == ["repo", "view"]:
+        return data.get("current_repo") or os.path.basename(os.getcwd()), 0
+    if argv[:1] == ["auth"] or argv[:2] in (["repo", "edit"], ["label", "create"], ["pr", "create"], ["issue", "create"]):
+        return "", 0
+    if argv[:2] == ["repo", "clone"]:
+        os.makedirs(argv[3] if len(argv) > 3 else argv[2].split("/")[-1], exist_ok=True)
+        return "", 0
+    return f"stub gh: unsupported command {' '.join(argv[:2])}", 1
+
+def main():
+    argv = sys.argv[1:]
+    _log(argv)
+    output, code = run(argv)
+    stream = sys.stdout if code == 0 else sys.stderr
+    if output:
+        stream.write(output + "\n")
+    sys.exit(code)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Offline stand-in for the GitHub REST/GraphQL API, serving the same fixture
+as the stub gh (benchmarks.fake_gh). Point Git-Alchemist at it with
+GITHUB_API_URL=http://127.0.0.1:<port> and any GH_TOKEN.
+
+Counts requests per route and answers conditional GETs (If-None-Match)
+with 304, like the real API.
+"""
+import re
+import json
+import hashlib
+import threading
+from urllib.parse import urlsplit, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from .fake_gh import load_fixture, inventory_page, repo_details, rest_repo, rest_repos_page
+
+REPO_ROUTE = re.compile(r"^/repos/([^/]+)/([^/]+)(/readme|/topics|/labels|/issues)?$")
+
+
+class FakeGitHub:
+    """Fixture and request counters shared by the handlers."""
+
+    def __init__(self, fixture_path=None):
+        self.data = load_fixture(fixture_path) if fixture_path else None
+        self._lock = threading.Lock()
+        self.reset()
+
+    def load(self, fixture_path):
+        self.data = load_fixture(fixture_path)
+
+    def reset(self):
+        with self._lock:
+            self.stats = {"requests": 0, "not_modified": 0, "routes": {}}
+
+    def snapshot(self):
+        with self._lock:
+            return json.loads(json.dumps(self.stats))
+
+    def record(self, route, not_modified=False):
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["routes"][route] = self.stats["routes"].get(route, 0) + 1
+            if not_modified:
+                self.stats["not_modified"] += 1
+
+    def repo(self, name):
+        return next((r for r in self.data["repos"] if r["name"] == name), None)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    @property
+    def backend(self):
+        return self.server.backend
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}") if length else {}
+
+    def _send(self, status, payload, route, content_type="application/json", headers=None):
+        data = payload.encode("utf-8") if isinstance(payload, str) else json.dumps(payload).encode("utf-8")
+        etag = '"' + hashlib.sha1(data).hexdigest() + '"'
+        not_modified = self.command == "GET" and status == 200 and self.headers.get("If-None-Match") == etag
+        self.backend.record(route, not_modified)
+        self.send_response(304 if not_modified else status)
+        self.send_header("ETag", etag)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if not_modified:
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _not_found(self, route):
+        self._send(404, {"message": "Not Found"}, route)
+
+    def do_GET(self):
+        data = self.backend.data
+        url = urlsplit(self.path)
+        if url.path == "/_stats":
+            self._send(200, self.backend.snapshot(), "_stats")
+            return
+        if url.path == "/user":
+            self._send(200, {"login": data["login"], "email": data.get("email")}, "GET /user")
+            return
+        if url.path == "/user/repos":
+            query = parse_qs(url.query)
+            page = int(query.get("page", ["1"])[0])
+            repos, has_next = rest_repos_page(data, page, int(query.get("per_page", ["30"])[0]))
+            headers = {"Link": f'<{url.path}?page={page + 1}>; rel="next"'} if has_next else None
+            self._send(200, repos, "GET /user/repos", headers=headers)
+            return
+        match = REPO_ROUTE.match(url.path)
+        if not match:
+            self._not_found(f"GET {url.path}")
+            return
+        _, name, sub = match.groups()
+        route = f"GET /repos{sub or ''}"
+        if sub == "/readme":
+            # The profile repo's README comes from the fixture's profile_readme
+            text = data.get("profile_readme") if name == data["login"] else (self.backend.repo(name) or {}).get("readme")
+            if text:
+                self._send(200, text, route, "text/plain; charset=utf-8")
+            else:
+                self._not_found(route)
+            return
+        repo = self.backend.repo(name)
+        if not repo:
+            self._not_found(route)
+        elif sub == "/topics":
+            self._send(200, {"names": repo.get("topics") or []}, route)
+        else:
+            self._send(200, rest_repo(data, repo), route)
+
+    def do_POST(self):
+        body = self._body()
+        if self.path == "/_reset":
+            self.backend.reset()
+            self._send(200, {}, "_reset")
+            return
+        if self.path == "/graphql":
+            query = body.get("query", "")
+            variables = body.get("variables") or {}
+            if "repositoryOwner" in query:
+                self._send(200, inventory_page(self.backend.data, variables.get("cursor")), "POST /graphql")
+            else:
+                self._send(200, repo_details(self.backend.data, query), "POST /graphql")
+            return
+        match = REPO_ROUTE.match(self.path)
+        sub = match.group(3) if match else None
+        if sub == "/labels":
+            self._send(201, {"name": body.get("name")}, "POST /repos/labels")
+        elif sub == "/issues":
+            owner, name = match.group(1), match.group(2)
+            self._send(201, {"number": 1, "html_url": f"https://github.com/{owner}/{name}/issues/1"}, "POST /repos/issues")
+        else:
+            self._not_found(f"POST {self.path}")
+
+    def do_PATCH(self):
+        self._body()
+        self._send(200, {}, "PATCH /repos")
+
+    def do_PUT(self):
+        body = self._body()
+        self._send(200, {"names": body.get("names") or []}, "PUT /repos/topics")
+
+
+def start_server(backend, host="127.0.0.1", port=0):
+    """
+    Serves `backend` on a background thread. Returns (server, base_url).
+    """
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.backend = backend
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
@@ -0,0 +1,94 @@
+"""
+Synthetic inputs for the CLI benchmarks: git projects of varying sizes and
+fake GitHub accounts (the fixture served by benchmarks.fake_gh).
+"""
+import os
+import json
+import random
+import subprocess
+from .bench_sage import WORDS, make_synthetic_repo
+
+# files/lines: the local project; repos: repositories in the fake account
+SIZES = {
+    "small": {"files": 40, "lines": 80, "repos": 12},
+    "medium": {"files": 400, "lines": 150, "repos": 80},
+    "large": {"files": 2000, "lines": 200, "repos": 400},
+}
+
+# Staged edits made for `commit`
+STAGED_FILES = 5
+LOGIN = "bench-user"
+
+def _git(path, *args):
+    subprocess.run(
+        ["git", "-c", "user.name=bench", "-c", "user.email=bench@example.com", *args],
+        cwd=path, check=True, capture_output=True
+    )
+
+def make_project(path, files, lines, seed=7):
+    """
+    A committed synthetic project with a few staged modifications, a README,
+    LICENSE and CI workflow. Returns the relative path of a file for `fix`.
+    """
+    make_synthetic_repo(path, files, lines, seed=seed)
+    with open(os.path.join(path, "LICENSE"), "w", encoding="utf-8") as f:
+        f.write("MIT License\n")
+    os.makedirs(os.path.join(path, ".github", "workflows"), exist_ok=True)
+    with open(os.path.join(path, ".github", "workflows", "ci.yml"), "w", encoding="utf-8") as f:
+        f.write("on: push\njobs: {}\n")
+    _git(path, "init", "-q")
+    _git(path, "add", ".")
+    _git(path, "commit", "-q", "-m", "Initial synthetic project")
+
+    rng = random.Random(seed)
+    modules = sorted(
+        os.path.join(root, name) for root, _, names in os.walk(path) if ".git" not in root
+        for name in names if name.endswith(".py")
+    )
+    for module in rng.sample(modules, min(STAGED_FILES, len(modules))):
+        with open(module, "a", encoding="utf-8") as f:
+            a, b = rng.sample(WORDS, 2)
+            f.write(f"\n\ndef {a}_{b}_patch(value):\n    return value or '{b}'\n")
+    _git(path, "add", ".")
+    return os.path.relpath(modules[0], path)
+
+def make_account(path, repos, seed=7):
+    """
+    Writes a fake account fixture with `repos` repositories: about a third lack
+    a description, most have fewer than 5 topics, all have a README, and a mix
+    have a LICENSE, CONTRIBUTING.md and CI workflows.
+    """
+    rng = random.Random(seed)
+    entries = []
+    for i in range(repos):
+        a, b, c = rng.sample(WORDS, 3)
+        name = f"{a}-{b}-{i}"
+        readme = "\n\n".join(
+            [f"# {name}", f"A {a} tool that manages {b} and {c}."]
+            + [" ".join(rng.choices(WORDS, k=40)) for _ in range(rng.randint(2, 12))]
+        )
+        entries.append({
+            "name": name,
+            "description": None if i % 3 == 0 else f"{a.title()} {b} utilities",
+            "topics": rng.sample(WORDS, rng.randint(0, 6)),
+            "license": "MIT" if i % 2 else None,
+            "readme": readme,
+            # Files at HEAD, for remote `audit --all` checks
+            "files": ["README.md"] + (["LICENSE"] if i % 2 else []) + (["CONTRIBUTING.md"] if i % 5 == 0 else [])
+                     + ([".github/workflows"] if i % 3 else []),
+            "isPrivate": i % 10 == 9,
+            "isArchived": i % 25 == 24,
+            "stargazerCount": rng.randint(0, 300),
+            "updatedAt": f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}T12:00:00Z",
+        })
+    data = {
+        "login": LOGIN,
+        "email": f"{LOGIN}@example.com",
+        "repos": entries,
+        "current_repo": entries[0]["name"],
+        # Short profile, so `profile` does a full generation over every public repo
+        "profile_readme": "",
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    return data
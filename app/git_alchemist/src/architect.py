@@ -2,11 +2,12 @@ import os
 import json
 import shutil
 import tempfile
-import subprocess
 from rich.console import Console
 from rich.prompt import Confirm
-from .core import generate_content
+from .core import generate_content, generate_stream, header_writer, pack_context
 from .utils import run_shell
+from .file_tree import get_file_tree
+from .profiler import span
 
 console = Console()
 
@@ -37,7 +38,8 @@ Do NOT use markdown blocks.
 
     try:
         clean_result = result.replace("```json", "").replace("```", "").strip()
-        data = json.loads(clean_result)
+        with span("parse", "scaffold plan"):
+            data = json.loads(clean_result)
         commands = data.get("commands", [])
         
         console.print("[green]Generated Plan:[/green]")
@@ -95,6 +97,18 @@ def fix_code(file_path, instruction, mode="fast"):
     with open(file_path, "r", encoding="utf-8") as f:
         content = f.read()
 
+    # Compacted project layout, so imports and references to other files stay real
+    project_tree = get_file_tree(".")
+
+    # The model must see the whole file to return it whole: never send a truncated copy
+    _, dropped = pack_context(
+        [{"name": "instruction", "text": instruction}, {"name": "content", "text": content, "priority": 1, "split": "line"}],
+        mode=mode, overhead=project_tree, quiet=True
+    )
+    if dropped:
+        console.print(f"[red]{file_path} is too large for the {mode} models' context window.[/red] Split the file or try --smart.")
+        return
+
     prompt = f"""
 Task: Fix/Modify Code.
 User Instructions:
@@ -102,7 +116,12 @@ User Instructions:
 {instruction}
 '''
 
-Target File Content:
+Project Structure (for reference):
+'''
+{project_tree}
+'''
+
+Target File ({file_path}) Content:
 '''
 {content}
 '''
@@ -122,8 +141,9 @@ Goal: Return ONLY the complete, corrected file content based on the User Instruc
     shutil.copy(file_path, backup_path)
     console.print(f"[gray]Backup created: {backup_path}[/gray]")
     
-    with open(file_path, "w", encoding="utf-8") as f:
-        f.write(clean_result)
+    with span("write", file_path):
+        with open(file_path, "w", encoding="utf-8") as f:
+            f.write(clean_result)
         
     console.print(f"[green]File updated.[/green]")
     
@@ -144,6 +164,6 @@ def explain_code(context, mode="fast"):
     Explains a concept or code snippet.
     """
     prompt = f"Task: Explain Concept/Code. Context: '{context}'. Keep it concise and technical."
-    result = generate_content(prompt, mode=mode)
+    result = generate_stream(prompt, mode=mode, write=header_writer("\n[bold white]--- Explanation ---[/bold white]"))
     if result:
-        console.print(f"\n[bold white]--- Explanation ---[/bold white]\n{result}\n[bold white]-------------------[/bold white]")
+        console.print("[bold white]-------------------[/bold white]")
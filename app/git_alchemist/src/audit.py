@@ -1,13 +1,122 @@
 import os
 import json
+import time
 from rich.console import Console
 from rich.table import Table
 from rich.progress import Progress
 from .utils import run_shell, check_gh_auth
+from .github_data import fetch_repo_details, build_query, run_graphql, README_CANDIDATES, CHUNK_SIZE
+from .github_client import current_repo, get_client, GitHubError
+from .inventory import list_repos
+from .bulk import run_ordered
+from .profiler import span
+from . import audit_store
 
 console = Console()
 
-def run_audit(user=None, repo_name=None):
+# Concurrent GraphQL requests in an account-wide audit (each covers CHUNK_SIZE repos)
+AUDIT_JOBS = int(os.getenv("ALCHEMIST_AUDIT_JOBS", "4"))
+
+# Criterion -> weight; the weights add up to 100
+CHECKS = {
+    "README.md": 20,
+    "LICENSE": 10,
+    "CONTRIBUTING.md": 10,
+    "Metadata: Description": 20,
+    "Metadata: Topics": 20,
+    "CI/CD: GitHub Actions": 20,
+}
+
+# Paths that satisfy a file criterion, checked in the working tree or at HEAD remotely
+CHECK_PATHS = {
+    "README.md": README_CANDIDATES,
+    "LICENSE": ["LICENSE", "LICENSE.md", "LICENSE.txt"],
+    "CONTRIBUTING.md": ["CONTRIBUTING.md", "CONTRIBUTING"],
+    "CI/CD: GitHub Actions": [".github/workflows"],
+}
+
+# Short column headers for the account-wide table
+SHORT_NAMES = {
+    "README.md": "README",
+    "LICENSE": "License",
+    "CONTRIBUTING.md": "Contrib",
+    "Metadata: Description": "Desc",
+    "Metadata: Topics": "Topics",
+    "CI/CD: GitHub Actions": "CI",
+}
+
+# Score trend glyphs, lowest to highest
+SPARKS = "▁▂▃▄▅▆▇█"
+
+SORT_KEYS = {
+    "score": lambda r: (r["score"], r["name"].lower()),
+    "name": lambda r: r["name"].lower(),
+    "pushed": lambda r: r["pushedAt"] or "",
+}
+
+def _remote_paths():
+    return [path for paths in CHECK_PATHS.values() for path in paths]
+
+def _audit_fields():
+    """
+    GraphQL selection for one repository: metadata plus one existence lookup per checked path.
+    """
+    objects = "\n".join(
+        f'    f{i}: object(expression: {json.dumps("HEAD:" + path)}) {{ id }}'
+        for i, path in enumerate(_remote_paths())
+    )
+    return (
+        "    name\n    description\n"
+        "    defaultBranchRef { target { oid } }\n"
+        "    licenseInfo { spdxId name }\n"
+        "    repositoryTopics(first: 20) { nodes { topic { name } } }\n"
+        f"{objects}"
+    )
+
+def _score(found):
+    return sum(weight for name, weight in CHECKS.items() if found.get(name))
+
+def _evaluate_local(repo_data):
+    """
+    Checks the working tree, with description/topics/license from `repo_data`.
+    """
+    found = {name: any(os.path.exists(p) for p in paths) for name, paths in CHECK_PATHS.items()}
+    found["LICENSE"] = found["LICENSE"] or bool(repo_data.get("license"))
+    found["Metadata: Description"] = bool(repo_data.get("description"))
+    found["Metadata: Topics"] = len(repo_data.get("topics") or []) >= 3
+    return found
+
+def _evaluate_remote(node):
+    """
+    Checks a repository node from the audit query (files at HEAD of the default branch).
+    """
+    present = {path for i, path in enumerate(_remote_paths()) if node.get(f"f{i}")}
+    topics = (node.get("repositoryTopics") or {}).get("nodes") or []
+    found = {name: any(p in present for p in paths) for name, paths in CHECK_PATHS.items()}
+    found["LICENSE"] = found["LICENSE"] or bool(node.get("licenseInfo"))
+    found["Metadata: Description"] = bool(node.get("description"))
+    found["Metadata: Topics"] = len(topics) >= 3
+    return found
+
+def _repo_metadata(owner, name):
+    """
+    Description, topics and license of a repository. A conditional REST GET
+    when possible (a 304 on repeat audits), else the GraphQL details query.
+    """
+    client = get_client()
+    if client:
+        try:
+            repo = client.get_repo(owner, name)
+            return {
+                "description": repo.get("description"),
+                "topics": repo.get("topics") or [],
+                "license": (repo.get("license") or {}).get("spdx_id"),
+            }
+        except GitHubError:
+            pass
+    return fetch_repo_details(owner, [name]).get(name, {})
+
+def run_audit(user=None, repo_name=None, as_json=False):
     """
     Audits a repository for 'Gold Standard' items and returns a score.
     """
@@ -16,46 +125,227 @@ def run_audit(user=None, repo_name=None):
         console.print("[red]Not authenticated with gh CLI.[/red]")
         return
 
-    # Use current directory if no repo specified
-    target_repo = repo_name or run_shell("gh repo view --json name --jq .name", check=False)
+    # Use current directory if no repo specified (read from the origin remote; gh for anything else)
+    remote = None if repo_name else current_repo()
+    target_repo = repo_name or (remote and remote[1]) or run_shell("gh repo view --json name --jq .name", check=False)
     if not target_repo:
-        console.print("[yellow]Not inside a Git repository. Auditing current directory files only.[/yellow]")
+        if not as_json:
+            console.print("[yellow]Not inside a Git repository. Auditing current directory files only.[/yellow]")
         repo_data = {}
     else:
-        console.print(f"[cyan]Auditing Repository:[/cyan] [bold]{username}/{target_repo}[/bold]")
-        repo_data_raw = run_shell(f"gh repo view {username}/{target_repo} --json description,repositoryTopics,licenseInfo", check=False)
-        repo_data = json.loads(repo_data_raw) if repo_data_raw else {}
-
-    checks = {
-        "README.md": {"score": 20, "found": os.path.exists("README.md")},
-        "LICENSE": {"score": 10, "found": bool(repo_data.get("licenseInfo")) or any(os.path.exists(f) for f in ["LICENSE", "LICENSE.md", "LICENSE.txt"])},
-        "CONTRIBUTING.md": {"score": 10, "found": any(os.path.exists(f) for f in ["CONTRIBUTING.md", "CONTRIBUTING"])},
-        "Metadata: Description": {"score": 20, "found": bool(repo_data.get("description"))},
-        "Metadata: Topics": {"score": 20, "found": len(repo_data.get("repositoryTopics") or []) >= 3},
-        "CI/CD: GitHub Actions": {"score": 20, "found": os.path.exists(".github/workflows")},
-    }
+        if not as_json:
+            console.print(f"[cyan]Auditing Repository:[/cyan] [bold]{username}/{target_repo}[/bold]")
+        repo_data = _repo_metadata(username, target_repo)
+
+    found = _evaluate_local(repo_data)
+    total_score = _score(found)
+    # Keep the result for `audit --history`, keyed by the checked-out commit
+    head = run_shell("git rev-parse HEAD", check=False) if target_repo else None
+    if head and len(head) >= 40:
+        audit_store.record(username, [{"name": target_repo, "version": head, "head": head, "score": total_score, "checks": found}], source="local")
+
+    if as_json:
+        print(json.dumps({"name": target_repo or None, "score": total_score, "checks": found}, indent=2))
+        return total_score
 
-    total_score = sum(c["score"] for c in checks.values() if c["found"])
-    
     # Display Table
     table = Table(title=f"Repository Audit: {target_repo or 'Local'}", border_style="blue")
     table.add_column("Criterion", style="cyan")
     table.add_column("Status", justify="center")
     table.add_column("Weight", justify="right")
 
-    for name, data in checks.items():
-        status = "[green]GOLD[/green]" if data["found"] else "[red]LEAD[/red]"
-        table.add_row(name, status, f"{data['score']}")
+    for name, weight in CHECKS.items():
+        status = "[green]GOLD[/green]" if found[name] else "[red]LEAD[/red]"
+        table.add_row(name, status, f"{weight}")
 
     console.print(table)
-    
+
     # Final Score Display
     color = "green" if total_score >= 80 else "yellow" if total_score >= 50 else "red"
     console.print(f"\n[bold]Transmutation Score:[/bold] [{color}]{total_score}%[/{color}]")
-    
+
     if total_score < 100:
         console.print(f"\n[italic gray]The Alchemist suggests adding the missing components to reach 100% Gold.[/italic gray]")
     else:
         console.print(f"\n[bold yellow]✨ Pure Gold! This repository is optimized for the community.[/bold yellow]")
 
     return total_score
+
+def audit_repos(owner, names, jobs=AUDIT_JOBS, on_chunk=None):
+    """
+    Audits many repositories remotely, without cloning: one batched GraphQL
+    query per CHUNK_SIZE repos, `jobs` queries in flight. Returns {name: result}
+    with name, score, checks and the HEAD commit; repos the query couldn't
+    resolve are omitted.
+    """
+    fields = _audit_fields()
+    chunks = [names[i:i + CHUNK_SIZE] for i in range(0, len(names), CHUNK_SIZE)]
+
+    def fetch(chunk):
+        return run_graphql(build_query(owner, chunk, fields))
+
+    def collect(index, chunk, data):
+        if on_chunk:
+            on_chunk(len(chunk))
+
+    results = {}
+    for chunk, data in zip(chunks, run_ordered(chunks, fetch, jobs=jobs, on_result=collect)):
+        if isinstance(data, Exception):
+            continue
+        with span("parse", "audit results"):
+            for i, name in enumerate(chunk):
+                node = data.get(f"r{i}")
+                if not node:
+                    continue
+                found = _evaluate_remote(node)
+                target = (node.get("defaultBranchRef") or {}).get("target") or {}
+                results[name] = {"name": name, "score": _score(found), "checks": found, "head": target.get("oid")}
+    return results
+
+def _version(repo):
+    """
+    What an audit result is keyed by: any push (new HEAD) or metadata edit
+    moves pushedAt/updatedAt, so an unchanged version can reuse its score.
+    """
+    return f"{repo.get('pushedAt') or ''}|{repo.get('updatedAt') or ''}"
+
+def _account_row(repo, result, cached):
+    return {
+        "name": repo["name"],
+        "score": result["score"],
+        "checks": result["checks"],
+        "missing": [criterion for criterion in CHECKS if not result["checks"].get(criterion)],
+        "head": result.get("head"),
+        "url": repo.get("url"),
+        "pushedAt": repo.get("pushedAt") or "",
+        "isPrivate": repo.get("isPrivate", False),
+        "isArchived": repo.get("isArchived", False),
+        "isFork": repo.get("isFork", False),
+        "cached": cached,
+    }
+
+def run_audit_all(user=None, sort="score", as_json=False, jobs=AUDIT_JOBS, refresh=False):
+    """
+    Audits every repository of the account from GitHub's side (files at HEAD,
+    description, topics, license) and prints them as one table, or as JSON.
+    Repos unchanged since their last audit reuse the stored result unless `refresh`.
+    sort: 'score' (lowest first), 'name' or 'pushed' (most recent first).
+    """
+    username = user or check_gh_auth()
+    if not username:
+        console.print("[red]Not authenticated with gh CLI.[/red]")
+        return
+
+    repos = {r["name"]: r for r in list_repos(username)}
+    names = list(repos)
+    versions = {name: _version(repo) for name, repo in repos.items()}
+    stored = {} if refresh else audit_store.lookup(username, versions)
+    stale = [name for name in names if name not in stored]
+
+    if as_json or not stale:
+        results = audit_repos(username, stale, jobs=jobs)
+    else:
+        console.print(
+            f"[cyan]Auditing {len(stale)} changed repositories of[/cyan] [bold]{username}[/bold] "
+            f"[dim]({len(stored)} unchanged, reused)[/dim]"
+        )
+        with Progress(console=console, transient=True) as progress:
+            task = progress.add_task("Auditing...", total=len(stale))
+            results = audit_repos(username, stale, jobs=jobs, on_chunk=lambda n: progress.advance(task, n))
+    for name, result in results.items():
+        result["version"] = versions[name]
+    audit_store.record(username, results.values())
+
+    rows = [_account_row(repos[name], stored[name], True) for name in stored]
+    rows += [_account_row(repos[name], result, False) for name, result in results.items()]
+    rows.sort(key=SORT_KEYS[sort], reverse=sort == "pushed")
+    if as_json:
+        print(json.dumps(rows, indent=2))
+        return rows
+
+    table = Table(title=f"Account Audit: {username}", border_style="blue")
+    table.add_column("Repository", style="cyan")
+    table.add_column("Score", justify="right")
+    for name in CHECKS:
+        table.add_column(SHORT_NAMES[name], justify="center")
+    for row in rows:
+        color = "green" if row["score"] >= 80 else "yellow" if row["score"] >= 50 else "red"
+        flags = " [dim](archived)[/dim]" if row["isArchived"] else " [dim](fork)[/dim]" if row["isFork"] else ""
+        table.add_row(
+            row["name"] + flags,
+            f"[{color}]{row['score']}%[/{color}]",
+            *("[green]✓[/green]" if row["checks"][name] else "[red]✗[/red]" for name in CHECKS)
+        )
+    console.print(table)
+
+    if rows:
+        average = sum(r["score"] for r in rows) / len(rows)
+        gold = sum(1 for r in rows if r["score"] == 100)
+        console.print(f"\n[bold]Average Score:[/bold] {average:.0f}%  [bold]Pure Gold:[/bold] {gold}/{len(rows)}")
+    if stored and not stale:
+        console.print("[dim]No repository changed since the last audit; all results were reused.[/dim]")
+    skipped = len(names) - len(rows)
+    if skipped:
+        console.print(f"[yellow]{skipped} repositories could not be read (deleted or inaccessible).[/yellow]")
+    return rows
+
+def _sparkline(scores):
+    return "".join(SPARKS[min(len(SPARKS) - 1, score * len(SPARKS) // 100)] for score in scores)
+
+def _when(timestamp):
+    return time.strftime("%Y-%m-%d %H:%M", time.localtime(timestamp))
+
+def show_history(user=None, repo_name=None, as_json=False, points=12):
+    """
+    Prints stored audit scores over time: a trend per repository, or every
+    audited version of `repo_name`. Covers both `audit` and `audit --all` runs.
+    """
+    username = user or check_gh_auth()
+    if not username:
+        console.print("[red]Not authenticated with gh CLI.[/red]")
+        return
+
+    entries = audit_store.history(username, repo_name)
+    if as_json:
+        print(json.dumps(entries, indent=2))
+        return entries
+    if not entries:
+        console.print("[yellow]No stored audits yet. Run `audit` or `audit --all` first.[/yellow]")
+        return entries
+
+    if repo_name:
+        table = Table(title=f"Audit History: {username}/{repo_name}", border_style="blue")
+        table.add_column("Audited", style="cyan")
+        table.add_column("Source")
+        table.add_column("Commit")
+        table.add_column("Score", justify="right")
+        table.add_column("Missing")
+        for entry in entries:
+            missing = [SHORT_NAMES[name] for name in CHECKS if not entry["checks"].get(name)]
+            table.add_row(
+                _when(entry["auditedAt"]), entry["source"], (entry["head"] or "")[:7],
+                f"{entry['score']}%", ", ".join(missing) or "[green]-[/green]"
+            )
+        console.print(table)
+        return entries
+
+    by_repo = {}
+    for entry in entries:
+        by_repo.setdefault(entry["name"], []).append(entry)
+    table = Table(title=f"Audit History: {username}", border_style="blue")
+    table.add_column("Repository", style="cyan")
+    table.add_column("Score", justify="right")
+    table.add_column("Change", justify="right")
+    table.add_column("Trend")
+    table.add_column("Audits", justify="right")
+    table.add_column("Last Checked")
+    for name in sorted(by_repo, key=str.lower):
+        scores = [entry["score"] for entry in by_repo[name]]
+        change = scores[-1] - scores[-2] if len(scores) > 1 else 0
+        change_text = f"[green]+{change}[/green]" if change > 0 else f"[red]{change}[/red]" if change < 0 else "[dim]0[/dim]"
+        table.add_row(
+            name, f"{scores[-1]}%", change_text, _sparkline(scores[-points:]), str(len(scores)),
+            _when(max(entry["seenAt"] for entry in by_repo[name]))
+        )
+    console.print(table)
+    return entries
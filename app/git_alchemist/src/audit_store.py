@@ -0,0 +1,113 @@
+import os
+import json
+import time
+import sqlite3
+from .utils import get_cache_dir
+
+# Audited versions kept per repository (and source); older ones are pruned
+AUDIT_HISTORY_MAX = int(os.getenv("ALCHEMIST_AUDIT_HISTORY", "50"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS audits (
+    owner TEXT NOT NULL,
+    repo TEXT NOT NULL,
+    source TEXT NOT NULL,
+    version TEXT NOT NULL,
+    head TEXT,
+    score INTEGER NOT NULL,
+    checks TEXT NOT NULL,
+    audited_at REAL NOT NULL,
+    seen_at REAL NOT NULL,
+    PRIMARY KEY (owner, repo, source, version)
+);
+CREATE INDEX IF NOT EXISTS audits_repo ON audits(owner, repo, audited_at);
+"""
+
+COLUMNS = "repo, source, version, head, score, checks, audited_at, seen_at"
+
+def _connect():
+    conn = sqlite3.connect(os.path.join(get_cache_dir(), "audits.db"), timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+def _row(owner, row):
+    repo, source, version, head, score, checks, audited_at, seen_at = row
+    return {
+        "owner": owner,
+        "name": repo,
+        "source": source,
+        "version": version,
+        "head": head,
+        "score": score,
+        "checks": json.loads(checks),
+        "auditedAt": audited_at,
+        "seenAt": seen_at,
+    }
+
+def lookup(owner, versions, source="remote"):
+    """
+    Stored results for repos whose current version ({name: version}) was
+    already audited. Returns {name: result}; reused entries are marked seen.
+    """
+    owner = owner.lower()
+    now = time.time()
+    found = {}
+    with _connect() as conn:
+        rows = conn.execute(
+            f"SELECT {COLUMNS} FROM audits WHERE owner = ? AND source = ?", (owner, source)
+        ).fetchall()
+        for row in rows:
+            if versions.get(row[0]) == row[2]:
+                found[row[0]] = _row(owner, row)
+        conn.executemany(
+            "UPDATE audits SET seen_at = ? WHERE owner = ? AND repo = ? AND source = ? AND version = ?",
+            [(now, owner, name, source, result["version"]) for name, result in found.items()]
+        )
+    return found
+
+def record(owner, results, source="remote"):
+    """
+    Stores audit results (dicts with name, version, head, score and checks).
+    Re-auditing a known version only refreshes it; each repo keeps its
+    AUDIT_HISTORY_MAX most recent versions.
+    """
+    owner = owner.lower()
+    now = time.time()
+    with _connect() as conn:
+        for result in results:
+            conn.execute(
+                "INSERT INTO audits(owner, repo, source, version, head, score, checks, audited_at, seen_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(owner, repo, source, version) DO UPDATE SET "
+                "head = excluded.head, score = excluded.score, checks = excluded.checks, seen_at = excluded.seen_at",
+                (owner, result["name"], source, result["version"], result.get("head"), result["score"],
+                 json.dumps(result["checks"]), now, now)
+            )
+            conn.execute(
+                "DELETE FROM audits WHERE owner = ? AND repo = ? AND source = ? AND version NOT IN ("
+                "SELECT version FROM audits WHERE owner = ? AND repo = ? AND source = ? "
+                "ORDER BY audited_at DESC LIMIT ?)",
+                (owner, result["name"], source, owner, result["name"], source, AUDIT_HISTORY_MAX)
+            )
+
+def history(owner, repo=None):
+    """
+    Every stored audit of the owner's repos (or one repo), oldest first.
+    """
+    owner = owner.lower()
+    query = f"SELECT {COLUMNS} FROM audits WHERE owner = ?"
+    params = [owner]
+    if repo:
+        query += " AND repo = ?"
+        params.append(repo)
+    with _connect() as conn:
+        rows = conn.execute(query + " ORDER BY audited_at ASC", params).fetchall()
+    return [_row(owner, row) for row in rows]
+
+def clear(owner=None):
+    with _connect() as conn:
+        if owner:
+            conn.execute("DELETE FROM audits WHERE owner = ?", (owner.lower(),))
+        else:
+            conn.execute("DELETE FROM audits")
@@ -0,0 +1,86 @@
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from rich.console import Console
+from .profiler import timed
+
+console = Console()
+
+class RateLimiter:
+    """
+    Thread-safe requests-per-minute limiter. Calls are spaced evenly
+    (60 / rpm seconds apart) instead of sleeping a fixed amount after each one.
+    """
+
+    def __init__(self, rpm):
+        self.interval = 60.0 / rpm if rpm and rpm > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+def pack_batches(items, cost, budget, max_items=50):
+    """
+    Greedily groups items into batches whose summed cost(item) stays within
+    `budget` (an item larger than the budget gets a batch of its own).
+    """
+    batches, current, used = [], [], 0
+    for item in items:
+        item_cost = cost(item)
+        if current and (used + item_cost > budget or len(current) >= max_items):
+            batches.append(current)
+            current, used = [], 0
+        current.append(item)
+        used += item_cost
+    if current:
+        batches.append(current)
+    return batches
+
+@timed("parse")
+def parse_json_object(text):
+    """
+    Extracts the outermost JSON object from a model response (tolerates
+    markdown fences and chatter around it). Returns {} if there is none.
+    """
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end <= start:
+        return {}
+    try:
+        data = json.loads(text[start:end + 1])
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+def run_ordered(items, worker, jobs=4, on_result=None):
+    """
+    Runs worker(item) for every item on a bounded thread pool.
+    on_result(index, item, result) is called in input order as soon as each
+    result and all results before it are ready, so progress output stays ordered.
+    Returns the list of results (exceptions are returned in place of a result).
+    """
+    items = list(items)
+    results = [None] * len(items)
+
+    def guarded(item):
+        try:
+            return worker(item)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        futures = [pool.submit(guarded, item) for item in items]
+        for index, future in enumerate(futures):
+            results[index] = future.result()
+            if on_result:
+                on_result(index, items[index], results[index])
+    return results
@@ -1,19 +1,60 @@
+import os
+import time
 import argparse
-import sys
+
+# Profiled runs report module import time as their first phase
+_IMPORT_STARTED = time.perf_counter()
+
 from rich.console import Console
+from rich.table import Table
 from .profile_gen import generate_profile
 from .architect import scaffold_project, fix_code, explain_code
-from .repo_tools import optimize_topics, generate_descriptions
+from .repo_tools import optimize_topics, generate_descriptions, DEFAULT_JOBS, DEFAULT_LLM_RPM, DEFAULT_GH_RPM, DEFAULT_BATCH_TOKENS
 from .issue_gen import create_issue
-from .audit import run_audit
-from .sage import ask_sage
+from .audit import run_audit, run_audit_all, show_history, AUDIT_JOBS
+from .sage import ask_sage, SAGE_TOKEN_BUDGET
 from .committer import suggest_commits
+from . import response_cache
+from . import http_cache
+from . import profiler
+
+profiler.note_import(_IMPORT_STARTED, time.perf_counter())
 
 console = Console()
 
+def _cache_table(title, stats, hits_label="Hits"):
+    table = Table(title=title, border_style="blue")
+    table.add_column("Metric", style="cyan")
+    table.add_column("Value", justify="right")
+    table.add_row(hits_label, str(stats["hits"]))
+    table.add_row("Misses", str(stats["misses"]))
+    table.add_row("Hit Rate", f"{stats['hit_rate']:.1%}")
+    table.add_row("Evictions", str(stats["evictions"]))
+    table.add_row("Entries", str(stats["entries"]))
+    table.add_row("Size", f"{stats['bytes'] / 1024:.1f} KiB")
+    return table
+
+def show_cache(action):
+    """
+    Prints Gemini response cache and GitHub HTTP cache statistics, or clears both.
+    """
+    if action == "clear":
+        response_cache.clear()
+        http_cache.clear()
+        console.print("[green]Response and GitHub caches cleared.[/green]")
+        return
+
+    console.print(_cache_table("Gemini Response Cache", response_cache.stats()))
+    console.print(_cache_table("GitHub HTTP Cache", http_cache.stats(), hits_label="Hits (304)"))
+
 def main():
     parser = argparse.ArgumentParser(description="Git-Alchemist: AI-powered Git Operations")
     parser.add_argument("--smart", action="store_true", help="Use high-end Gemini Pro models (slower/lower quota)")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the on-disk Gemini response cache for this run")
+    parser.add_argument("--no-stream", action="store_true", help="Wait for complete Gemini answers instead of streaming them")
+    parser.add_argument("--timings", action="store_true", help="Print time-to-first-token and total latency per Gemini call")
+    parser.add_argument("--profile", action="store_true", help="Time each phase (shell commands, model attempts, scans, writes) and print a report")
+    parser.add_argument("--profile-out", help="Where to write the JSON profile (default: the cache's profiles/ folder)")
     subparsers = parser.add_subparsers(dest="command", help="Available commands")
     
     # Commit Command
@@ -22,10 +63,19 @@ def main():
     # Sage Command
     sage_parser = subparsers.add_parser("sage", help="Ask the Sage questions about your codebase")
     sage_parser.add_argument("question", help="The question about your code")
+    sage_parser.add_argument("--budget", type=int, default=SAGE_TOKEN_BUDGET, help="Max tokens of retrieved code per prompt")
+    sage_parser.add_argument("--full", action="store_true", help="Send the whole codebase instead of retrieved chunks")
 
     # Audit Command
     audit_parser = subparsers.add_parser("audit", help="Check repository 'Gold' status and metadata")
     audit_parser.add_argument("--repo", help="Specific repository name to audit")
+    audit_parser.add_argument("--all", action="store_true", help="Audit every repository of the account remotely (no clones)")
+    audit_parser.add_argument("--user", help="GitHub username for --all and --history")
+    audit_parser.add_argument("--sort", choices=["score", "name", "pushed"], default="score", help="Row order for --all (score: lowest first)")
+    audit_parser.add_argument("--jobs", type=int, default=AUDIT_JOBS, help="Batched GraphQL requests in flight for --all")
+    audit_parser.add_argument("--refresh", action="store_true", help="Re-check every repository in --all, ignoring stored results")
+    audit_parser.add_argument("--history", action="store_true", help="Show stored audit scores over time (all repos, or --repo)")
+    audit_parser.add_argument("--json", action="store_true", help="Print results as JSON")
 
     # Profile Generator Command
     profile_parser = subparsers.add_parser("profile", help="Generate or update GitHub Profile README")
@@ -39,6 +89,13 @@ def main():
     describe_parser = subparsers.add_parser("describe", help="Generate missing repository descriptions")
     describe_parser.add_argument("--user", help="GitHub username")
 
+    for bulk_parser in (topics_parser, describe_parser):
+        bulk_parser.add_argument("--jobs", type=int, default=DEFAULT_JOBS, help="Repositories processed concurrently")
+        bulk_parser.add_argument("--rpm", type=int, default=DEFAULT_LLM_RPM, help="Max Gemini requests per minute")
+        bulk_parser.add_argument("--gh-rpm", type=int, default=DEFAULT_GH_RPM, help="Max GitHub edits per minute")
+        bulk_parser.add_argument("--batch", action="store_true", help="Pack many repositories into each Gemini request")
+        bulk_parser.add_argument("--batch-tokens", type=int, default=DEFAULT_BATCH_TOKENS, help="Input token budget per batched request")
+
     # Issue Generator
     issue_parser = subparsers.add_parser("issue", help="Draft a technical issue from an idea")
     issue_parser.add_argument("idea", help="The feature or bug idea")
@@ -54,31 +111,58 @@ def main():
     explain_parser = subparsers.add_parser("explain", help="Explain code or concepts")
     explain_parser.add_argument("context", help="The code or concept to explain")
 
+    # Response Cache
+    cache_parser = subparsers.add_parser("cache", help="Inspect or clear the Gemini response and GitHub HTTP caches")
+    cache_parser.add_argument("action", choices=["stats", "clear"], help="Show hit/miss statistics or clear the cache")
+
     args = parser.parse_args()
     mode = "smart" if args.smart else "fast"
+    if args.no_cache:
+        # Via env so it also reaches code paths that don't take a cache argument
+        os.environ["ALCHEMIST_NO_CACHE"] = "1"
+    if args.no_stream:
+        os.environ["ALCHEMIST_NO_STREAM"] = "1"
+    if args.timings:
+        os.environ["ALCHEMIST_TIMINGS"] = "1"
     
-    if args.command == "profile":
-        generate_profile(args.user, args.force, mode=mode)
-    elif args.command == "topics":
-        optimize_topics(args.user, mode=mode)
-    elif args.command == "describe":
-        generate_descriptions(args.user, mode=mode)
-    elif args.command == "issue":
-        create_issue(args.idea, mode=mode)
-    elif args.command == "scaffold":
-        scaffold_project(args.instruction, mode=mode)
-    elif args.command == "fix":
-        fix_code(args.file, args.instruction, mode=mode)
-    elif args.command == "explain":
-        explain_code(args.context, mode=mode)
-    elif args.command == "audit":
-        run_audit(repo_name=args.repo)
-    elif args.command == "sage":
-        ask_sage(args.question, mode=mode)
-    elif args.command == "commit":
-        suggest_commits(mode=mode)
-    else:
-        parser.print_help()
+    if args.profile or os.getenv("ALCHEMIST_PROFILE"):
+        profiler.start()
+    try:
+        if args.command == "profile":
+            generate_profile(args.user, args.force, mode=mode)
+        elif args.command == "topics":
+            optimize_topics(args.user, mode=mode, jobs=args.jobs, rpm=args.rpm, gh_rpm=args.gh_rpm,
+                            batch=args.batch, batch_tokens=args.batch_tokens)
+        elif args.command == "describe":
+            generate_descriptions(args.user, mode=mode, jobs=args.jobs, rpm=args.rpm, gh_rpm=args.gh_rpm,
+                                  batch=args.batch, batch_tokens=args.batch_tokens)
+        elif args.command == "issue":
+            create_issue(args.idea, mode=mode)
+        elif args.command == "scaffold":
+            scaffold_project(args.instruction, mode=mode)
+        elif args.command == "fix":
+            fix_code(args.file, args.instruction, mode=mode)
+        elif args.command == "explain":
+            explain_code(args.context, mode=mode)
+        elif args.command == "audit":
+            if args.history:
+                show_history(user=args.user, repo_name=args.repo, as_json=args.json)
+            elif args.all:
+                run_audit_all(user=args.user, sort=args.sort, as_json=args.json, jobs=args.jobs, refresh=args.refresh)
+            else:
+                run_audit(repo_name=args.repo, as_json=args.json)
+        elif args.command == "sage":
+            ask_sage(args.question, mode=mode, budget=args.budget, full=args.full)
+        elif args.command == "commit":
+            suggest_commits(mode=mode)
+        elif args.command == "cache":
+            show_cache(args.action)
+        else:
+            parser.print_help()
+    finally:
+        # Also reports runs that fail or exit early, which are often the interesting ones
+        profiler.finish(args.command or "help", args.profile_out)
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,11 +1,14 @@
 import os
 from rich.console import Console
 from rich.prompt import Prompt
-from .core import generate_content
+from .core import generate_content, pack_context
 from .utils import run_shell
 
 console = Console()
 
+# Token budget for the staged diff; larger diffs are cut by file/hunk, never mid-line
+COMMIT_DIFF_BUDGET = int(os.getenv("ALCHEMIST_COMMIT_DIFF_TOKENS", "4000"))
+
 def get_staged_diff():
     """Returns the diff of staged changes."""
     return run_shell("git diff --cached", check=False)
@@ -25,6 +28,7 @@ def suggest_commits(mode="fast"):
             return
 
     console.print("[cyan]Analyzing changes for the perfect commit message...[/cyan]")
+    packed, _ = pack_context([{"name": "diff", "text": diff, "split": "diff"}], mode=mode, budget=COMMIT_DIFF_BUDGET)
     
     prompt = f"""
 Task: Suggest 3 professional, semantic commit messages based on the git diff below.
@@ -33,7 +37,7 @@ Types: feat, fix, docs, style, refactor, test, chore
 
 DIFF:
 '''
-{diff[:5000]}
+{packed['diff']}
 '''
 
 Instructions:
@@ -42,7 +46,8 @@ Instructions:
 3. Ensure they are concise and accurate.
 """
 
-    result = generate_content(prompt, mode=mode)
+    # Re-running should offer fresh suggestions, so skip the response cache
+    result = generate_content(prompt, mode=mode, cache=False)
     if not result:
         return
 
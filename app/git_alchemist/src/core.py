@@ -1,9 +1,17 @@
 import os
+import re
 import sys
+import json
 import time
+import asyncio
+import threading
 from google import genai
 from dotenv import load_dotenv
 from rich.console import Console
+from .model_health import available_models, record_success, record_failure
+from . import response_cache
+from .utils import get_cache_dir, file_lock
+from .profiler import span
 
 console = Console()
 
@@ -21,39 +29,436 @@ FAST_MODELS = [
     "gemini-2.0-flash",
 ]
 
-def get_gemini_client():
-    load_dotenv()
-    api_key = os.getenv("GEMINI_API_KEY")
+# Input context windows (tokens). Prompts are packed to the smallest window in
+# the tier, since a fallback may land on any of its models.
+MODEL_CONTEXT_WINDOWS = {
+    "gemini-3-pro-preview": 1_000_000,
+    "gemini-2.5-pro": 1_000_000,
+    "gemini-1.5-pro": 2_000_000,
+    "gemma-3-27b-it": 128_000,
+    "gemma-3-12b-it": 128_000,
+    "gemini-3-flash-preview": 1_000_000,
+    "gemini-2.0-flash": 1_000_000,
+}
+DEFAULT_CONTEXT_WINDOW = 32_000
+# Tokens kept free for the model's answer
+RESPONSE_RESERVE = int(os.getenv("ALCHEMIST_RESPONSE_RESERVE", "8192"))
+
+# Process-wide client registry: one long-lived client per (api key, api version),
+# so repeated prompts reuse pooled HTTP connections instead of a new TLS handshake.
+_clients = {}
+_clients_lock = threading.Lock()
+_dotenv_loaded = False
+
+def get_gemini_client(api_key=None, api_version="v1alpha"):
+    """
+    Returns the shared Gemini client for this process, creating it on first use.
+    """
+    global _dotenv_loaded
+    if not _dotenv_loaded:
+        load_dotenv()
+        _dotenv_loaded = True
+
+    api_key = api_key or os.getenv("GEMINI_API_KEY")
     if not api_key:
         console.print("[bold red]Error:[/bold red] GEMINI_API_KEY not found.")
         sys.exit(1)
-    return genai.Client(api_key=api_key, http_options={'api_version':'v1alpha'})
 
-def generate_content(prompt, mode="fast"):
+    key = (api_key, api_version)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            http_options = {'api_version': api_version} if api_version else {}
+            # Point the client at another endpoint (e.g. the offline benchmark backend)
+            if os.getenv("GEMINI_BASE_URL"):
+                http_options['base_url'] = os.getenv("GEMINI_BASE_URL")
+            http_options = http_options or None
+            client = genai.Client(api_key=api_key, http_options=http_options)
+            _clients[key] = client
+        return client
+
+def estimate_tokens(text):
+    """
+    Cheap token estimate (~4 characters per token for English text and code).
+    """
+    return max(1, len(text) // 4)
+
+def context_window(models):
+    """
+    Smallest input window (tokens) among `models`; unknown models get a conservative default.
+    """
+    return min((MODEL_CONTEXT_WINDOWS.get(m, DEFAULT_CONTEXT_WINDOW) for m in models), default=DEFAULT_CONTEXT_WINDOW)
+
+def context_budget(mode="fast", overhead="", models=None):
+    """
+    Tokens available for context in a prompt for `mode`'s tier (or explicit `models`),
+    after the prompt template (`overhead`) and the response reserve.
+    """
+    models = models or (SMART_MODELS if mode == "smart" else FAST_MODELS)
+    return max(0, context_window(models) - RESPONSE_RESERVE - (estimate_tokens(overhead) if overhead else 0))
+
+# Structure-aware splitting: each split kind cuts into units, and an oversized
+# unit is cut again with the next finer kind.
+_FINER_SPLIT = {"diff": "hunk", "hunk": "line", "file": "paragraph", "paragraph": "line"}
+_UNIT_NAMES = {"diff": "file", "hunk": "hunk", "file": "file", "paragraph": "paragraph", "line": "line"}
+# Independent units: later ones may still be packed after one doesn't fit.
+# Other kinds are kept as a contiguous head so the text stays readable.
+_SKIPPABLE_SPLITS = {"diff", "file"}
+# Below this many free tokens an oversized unit is dropped rather than cut
+MIN_PARTIAL_TOKENS = 64
+TRUNCATED_MARKER = "[... truncated ...]\n"
+
+def _omitted_marker(dropped, total, unit):
+    return f"[... {dropped} of {total} {unit}(s) omitted to fit the context budget ...]\n"
+
+def _split_units(text, split):
+    """
+    Returns (prefix, units): a prefix that must accompany any unit (a diff's file header), and the units.
+    """
+    if split == "diff":
+        return "", [u for u in re.split(r"(?m)^(?=diff --git )", text) if u.strip()]
+    if split == "hunk":
+        parts = re.split(r"(?m)^(?=@@ )", text)
+        if len(parts) > 1 and not parts[0].startswith("@@"):
+            return parts[0], parts[1:]
+        return "", parts
+    if split == "file":
+        return "", [u for u in re.split(r"(?m)^(?=--- FILE: |diff --git )", text) if u.strip()]
+    if split == "paragraph":
+        return "", [u + "\n\n" for u in re.split(r"\n\s*\n", text) if u.strip()]
+    return "", text.splitlines(keepends=True)
+
+def _fit(text, split, budget):
+    """
+    Keeps whole units of `text` that fit in `budget` tokens, in order (first-fit
+    for skippable kinds, a contiguous head otherwise).
+    Returns (kept_text, dropped_units, total_units).
+    """
+    if estimate_tokens(text) <= budget:
+        return text, 0, 1
+    prefix, units = _split_units(text, split)
+    used = estimate_tokens(prefix) if prefix else 0
+    if used > budget:
+        return "", len(units), len(units)
+    # Whole units first: a contiguous head, or (for skippable kinds) every unit that fits
+    chosen = set()
+    for index, unit in enumerate(units):
+        cost = estimate_tokens(unit)
+        if used + cost <= budget:
+            chosen.add(index)
+            used += cost
+        elif split not in _SKIPPABLE_SPLITS:
+            break
+    # Then the head of the first unit left out, cut with the next finer kind
+    partial = {}
+    finer = _FINER_SPLIT.get(split)
+    missing = [i for i in range(len(units)) if i not in chosen]
+    if finer and missing and budget - used >= MIN_PARTIAL_TOKENS:
+        part, _, _ = _fit(units[missing[0]], finer, budget - used - estimate_tokens(TRUNCATED_MARKER))
+        if part:
+            if not part.endswith(TRUNCATED_MARKER):
+                part = part.rstrip("\n") + "\n" + TRUNCATED_MARKER
+            partial[missing[0]] = part
+    kept = [units[i] if i in chosen else partial[i] for i in range(len(units)) if i in chosen or i in partial]
+    if not kept:
+        return "", len(units), len(units)
+    return prefix + "".join(kept), len(missing), len(units)
+
+def pack_context(sections, mode="fast", budget=None, overhead="", models=None, quiet=False):
+    """
+    Fits prioritized context sections into one token budget.
+    sections: dicts with "name", "text", optional "priority" (lower is packed first,
+    default 0) and "split" ("diff", "hunk", "file", "paragraph" or "line") that says
+    how the section may be cut when it doesn't fit whole.
+    budget: cap in tokens; it is always clamped to the tier's context window.
+    Returns ({name: packed text}, report) where report lists what was trimmed or dropped.
+    """
+    log = _logger(quiet)
+    limit = context_budget(mode, overhead, models)
+    remaining = min(budget, limit) if budget is not None else limit
+
+    packed, report = {}, []
+    for section in sorted(sections, key=lambda s: s.get("priority", 0)):
+        text = section.get("text") or ""
+        split = section.get("split", "paragraph")
+        kept, dropped, total = _fit(text, split, remaining)
+        if dropped:
+            unit = _UNIT_NAMES.get(split, "unit")
+            # Refit with room for the omission marker, as _fit does for TRUNCATED_MARKER
+            # (+1 because estimates of joined text can round up past the sum of the parts)
+            reserve = estimate_tokens("\n" + _omitted_marker(total, total, unit)) + 1
+            kept, dropped, total = _fit(text, split, remaining - reserve)
+            if kept:
+                kept = kept.rstrip("\n") + "\n" + _omitted_marker(dropped, total, unit)
+            original = estimate_tokens(text)
+            report.append({
+                "section": section["name"],
+                "dropped": dropped,
+                "total": total,
+                "unit": unit,
+                "kept_tokens": min(estimate_tokens(kept), original) if kept else 0,
+                "original_tokens": original,
+            })
+        packed[section["name"]] = kept
+        remaining = max(0, remaining - (estimate_tokens(kept) if kept else 0))
+
+    for entry in report:
+        log(
+            f"[yellow]Context '{entry['section']}' trimmed: dropped {entry['dropped']}/{entry['total']} "
+            f"{entry['unit']}(s), ~{entry['original_tokens']} -> ~{entry['kept_tokens']} tokens.[/yellow]"
+        )
+    return packed, report
+
+def _is_quota_error(err_msg):
+    return "429" in err_msg or "RESOURCE_EXHAUSTED" in err_msg
+
+def _logger(quiet):
+    """console.print, or a no-op for quiet callers (e.g. concurrent bulk workers)."""
+    return (lambda *args, **kwargs: None) if quiet else console.print
+
+# JSON-lines event log shared by every process (CLI runs, pooled workers);
+# the server tails it for its /metrics endpoint
+EVENT_LOG_MAX_BYTES = int(os.getenv("ALCHEMIST_EVENT_LOG_MAX_MB", "10")) * 1024 * 1024
+
+def event_log_path():
+    return os.path.join(get_cache_dir(), "llm_events.jsonl")
+
+def _record_event(event, model_name, mode, **fields):
+    """
+    Appends one Gemini call event. Best effort: metrics must never break a run.
+    """
+    if os.getenv("ALCHEMIST_NO_EVENTS"):
+        return
+    line = json.dumps({"ts": time.time(), "event": event, "model": model_name, "mode": mode, **fields}) + "\n"
+    path = event_log_path()
+    try:
+        if os.path.exists(path) and os.path.getsize(path) > EVENT_LOG_MAX_BYTES:
+            # Under the cross-process lock and re-checked, so concurrent writers rotate
+            # once instead of each renaming over the file the previous one just rotated
+            with file_lock(path + ".lock"):
+                if os.path.exists(path) and os.path.getsize(path) > EVENT_LOG_MAX_BYTES:
+                    os.replace(path, path + ".1")
+        # One small O_APPEND write per event, so concurrent writers don't interleave
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line.encode("utf-8"))
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
+
+def _succeeded(model_name, mode, latency, ttft=None):
+    record_success(model_name, latency)
+    # A fallback is any answer not from the tier's first model, including when that one was skipped on cooldown
+    tier = SMART_MODELS if mode == "smart" else FAST_MODELS
+    _record_event("success", model_name, mode, latency=latency, ttft=ttft, fallback=model_name != tier[0])
+
+def _failed(model_name, mode, e):
+    """Records a failed attempt; returns its outcome ("rate_limited" or "error")."""
+    outcome = "rate_limited" if _is_quota_error(str(e)) else "error"
+    record_failure(model_name, e)
+    _record_event(outcome, model_name, mode)
+    return outcome
+
+def _report_failure(model_name, e, log=console.print):
+    err_msg = str(e)
+    if _is_quota_error(err_msg):
+        log(f"[yellow]Quota hit for {model_name}. Trying next...[/yellow]")
+    else:
+        log(f"[red]Error with {model_name}:[/red] {err_msg}")
+
+def _candidate_models(mode, log=console.print):
+    """
+    Models of the tier to try, in order, minus those cooling down after
+    quota exhaustion or repeated server errors (shared across processes).
+    """
+    models = SMART_MODELS if mode == "smart" else FAST_MODELS
+    usable, skipped = available_models(models)
+    for model_name, remaining, reason in skipped:
+        log(f"[gray]Skipping {model_name} ({reason}, {remaining:.0f}s cooldown left)[/gray]")
+    return usable
+
+def _cached(prompt, mode, cache, log=console.print):
+    if not (cache and response_cache.is_enabled()):
+        return None
+    models = SMART_MODELS if mode == "smart" else FAST_MODELS
+    with span("cache", "response lookup"):
+        hit = response_cache.lookup(prompt, mode, models)
+    if hit:
+        log(f"[gray]Using cached response from {hit[0]}.[/gray]")
+        _record_event("cache_hit", hit[0], mode)
+        return hit[1]
+    return None
+
+def streaming_enabled():
+    """
+    False when streaming output is switched off for this run (--no-stream).
+    """
+    return not os.getenv("ALCHEMIST_NO_STREAM")
+
+def _report_timing(model_name, first_token, total, log=console.print):
+    """
+    Prints time-to-first-token and total latency when timings are on (--timings).
+    """
+    if os.getenv("ALCHEMIST_TIMINGS"):
+        log(f"[gray]{model_name}: first token after {first_token:.2f}s, complete after {total:.2f}s[/gray]")
+
+def _write_stdout(text):
+    sys.stdout.write(text)
+    sys.stdout.flush()
+
+def header_writer(header):
+    """
+    A generate_stream writer that prints `header` (rich markup) just before the
+    first chunk, so attempt/fallback messages don't land inside the framed answer.
+    """
+    started = False
+
+    def write(text):
+        nonlocal started
+        if not started:
+            console.print(header)
+            started = True
+        _write_stdout(text)
+
+    return write
+
+def _remember(prompt, mode, model_name, text, cache):
+    if cache and response_cache.is_enabled():
+        with span("write", "response cache"):
+            response_cache.store(prompt, mode, model_name, text)
+
+def generate_content(prompt, mode="fast", cache=True, quiet=False):
     """
     Generates content with automatic fallback.
     Mode: 'fast' (Gemma/Flash) or 'smart' (Pro/3-Pro)
+    cache: set False to bypass the on-disk response cache for this call.
+    quiet: suppress per-attempt progress output.
     """
+    log = _logger(quiet)
+    cached = _cached(prompt, mode, cache, log)
+    if cached is not None:
+        return cached
+
     client = get_gemini_client()
-    models = SMART_MODELS if mode == "smart" else FAST_MODELS
     
-    for model_name in models:
-        try:
-            console.print(f"[gray]Attempting with {model_name}...[/gray]")
-            response = client.models.generate_content(
-                model=model_name,
-                contents=prompt
-            )
-            if response and response.text:
-                return response.text
-        except Exception as e:
-            err_msg = str(e)
-            if "429" in err_msg or "RESOURCE_EXHAUSTED" in err_msg:
-                console.print(f"[yellow]Quota hit for {model_name}. Trying next...[/yellow]")
-                continue
-            else:
-                console.print(f"[red]Error with {model_name}:[/red] {err_msg}")
+    for model_name in _candidate_models(mode, log):
+        with span("model", model_name, mode=mode) as attrs:
+            try:
+                log(f"[gray]Attempting with {model_name}...[/gray]")
+                started = time.perf_counter()
+                response = client.models.generate_content(
+                    model=model_name,
+                    contents=prompt
+                )
+                if response and response.text:
+                    elapsed = time.perf_counter() - started
+                    attrs["outcome"] = "success"
+                    _succeeded(model_name, mode, elapsed)
+                    _report_timing(model_name, elapsed, elapsed, log)
+                    _remember(prompt, mode, model_name, response.text, cache)
+                    return response.text
+            except Exception as e:
+                attrs["outcome"] = _failed(model_name, mode, e)
+                _report_failure(model_name, e, log)
                 continue
                 
-    console.print("[bold red]Critical:[/bold red] All models exhausted or failed.")
-    return None
\ No newline at end of file
+    log("[bold red]Critical:[/bold red] All models exhausted or failed.")
+    return None
+
+async def agenerate_content(prompt, mode="fast", cache=True, quiet=False):
+    """
+    Async variant of generate_content on the pooled async Gemini client, so
+    library callers can run many generations concurrently (e.g. asyncio.gather).
+    Cache, model-health and event-log I/O runs in worker threads.
+    """
+    log = _logger(quiet)
+    cached = await asyncio.to_thread(_cached, prompt, mode, cache, log)
+    if cached is not None:
+        return cached
+
+    client = get_gemini_client()
+
+    for model_name in await asyncio.to_thread(_candidate_models, mode, log):
+        with span("model", model_name, mode=mode) as attrs:
+            try:
+                log(f"[gray]Attempting with {model_name}...[/gray]")
+                started = time.perf_counter()
+                response = await client.aio.models.generate_content(
+                    model=model_name,
+                    contents=prompt
+                )
+                if response and response.text:
+                    elapsed = time.perf_counter() - started
+                    attrs["outcome"] = "success"
+                    await asyncio.to_thread(_succeeded, model_name, mode, elapsed)
+                    _report_timing(model_name, elapsed, elapsed, log)
+                    await asyncio.to_thread(_remember, prompt, mode, model_name, response.text, cache)
+                    return response.text
+            except Exception as e:
+                attrs["outcome"] = await asyncio.to_thread(_failed, model_name, mode, e)
+                _report_failure(model_name, e, log)
+                continue
+
+    log("[bold red]Critical:[/bold red] All models exhausted or failed.")
+    return None
+
+def generate_stream(prompt, mode="fast", cache=True, quiet=False, write=None):
+    """
+    Streaming variant of generate_content: chunks are written (and flushed) as
+    they arrive, so long answers start showing right away.
+    write: callback for each chunk (default: stdout).
+    Returns the full text, or None if every model failed before producing output.
+    """
+    log = _logger(quiet)
+    write = write or _write_stdout
+
+    if not streaming_enabled():
+        result = generate_content(prompt, mode=mode, cache=cache, quiet=quiet)
+        if result:
+            write(result + "\n")
+        return result
+
+    cached = _cached(prompt, mode, cache, log)
+    if cached is not None:
+        write(cached + "\n")
+        return cached
+
+    client = get_gemini_client()
+
+    for model_name in _candidate_models(mode, log):
+        with span("model", model_name, mode=mode) as attrs:
+            parts = []
+            try:
+                log(f"[gray]Attempting with {model_name}...[/gray]")
+                started = time.perf_counter()
+                first_token = None
+                for chunk in client.models.generate_content_stream(model=model_name, contents=prompt):
+                    text = chunk.text
+                    if not text:
+                        continue
+                    if first_token is None:
+                        first_token = time.perf_counter() - started
+                    parts.append(text)
+                    write(text)
+                if parts:
+                    elapsed = time.perf_counter() - started
+                    attrs["outcome"] = "success"
+                    _succeeded(model_name, mode, elapsed, ttft=first_token)
+                    result = "".join(parts)
+                    write("\n")
+                    _report_timing(model_name, first_token, elapsed, log)
+                    _remember(prompt, mode, model_name, result, cache)
+                    return result
+            except Exception as e:
+                attrs["outcome"] = _failed(model_name, mode, e)
+                if parts:
+                    # The partial answer is already on screen; falling back would repeat it
+                    write("\n")
+                    log(f"[yellow]Stream from {model_name} interrupted; the answer above is incomplete.[/yellow]")
+                    return "".join(parts)
+                _report_failure(model_name, e, log)
+                continue
+
+    log("[bold red]Critical:[/bold red] All models exhausted or failed.")
+    return None
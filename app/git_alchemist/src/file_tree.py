@@ -0,0 +1,183 @@
+import os
+import json
+import hashlib
+import subprocess
+from collections import Counter, deque
+from .utils import get_cache_dir, file_lock
+from .scanner import list_files
+from .profiler import timed
+
+# Default size of a compacted tree injected into prompts
+TREE_TOKEN_BUDGET = int(os.getenv("ALCHEMIST_TREE_TOKENS", "1500"))
+# An expanded directory lists its own files only up to this many; beyond it they are summarized
+MAX_LISTED_FILES = 40
+# Extensions named in a directory summary
+SUMMARY_EXTENSIONS = 3
+
+def _snapshot_key(root):
+    """
+    HEAD sha + index mtime: changes whenever commits, checkouts or staging change the file set.
+    None outside a git repo (no caching).
+    """
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "HEAD", "--absolute-git-dir"],
+            cwd=root, capture_output=True, text=True, timeout=10
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    lines = result.stdout.split()
+    if result.returncode != 0 or len(lines) != 2:
+        return None
+    head, git_dir = lines
+    try:
+        index_mtime = os.stat(os.path.join(git_dir, "index")).st_mtime_ns
+    except OSError:
+        index_mtime = 0
+    return f"{head}:{index_mtime}"
+
+def _snapshot_path(root):
+    digest = hashlib.sha1(os.path.abspath(root).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(get_cache_dir("trees"), f"{digest}.json")
+
+def _load_snapshot(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_snapshot(path, snapshot):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f)
+    os.replace(tmp_path, path)
+
+def _summary(node):
+    exts = ", ".join(ext for ext, _ in node["exts"].most_common(SUMMARY_EXTENSIONS))
+    return f"{node['count']} files" + (f", {exts}" if exts else "")
+
+def _build_nodes(files):
+    """
+    {dir: {"files": [...], "dirs": [...], "count": files in subtree, "exts": Counter}} ("" is the root).
+    """
+    nodes = {}
+
+    def node(path):
+        if path not in nodes:
+            nodes[path] = {"files": [], "dirs": [], "count": 0, "exts": Counter()}
+            if path:
+                parent, name = os.path.split(path)
+                node(parent)["dirs"].append(name)
+        return nodes[path]
+
+    for path in files:
+        directory, name = os.path.split(path)
+        node(directory)["files"].append(name)
+        ext = os.path.splitext(name)[1] or name
+        while True:
+            current = nodes[directory]
+            current["count"] += 1
+            current["exts"][ext] += 1
+            if not directory:
+                break
+            directory = os.path.dirname(directory)
+    for current in nodes.values():
+        current["files"].sort()
+        current["dirs"].sort()
+    return nodes
+
+def _file_lines(current, indent):
+    if len(current["files"]) > MAX_LISTED_FILES:
+        exts = Counter(os.path.splitext(f)[1] or f for f in current["files"])
+        return [f"{indent}[{len(current['files'])} files: {', '.join(e for e, _ in exts.most_common(SUMMARY_EXTENSIONS))}]"]
+    return [f"{indent}{name}" for name in current["files"]]
+
+def _summary_line(nodes, path, depth):
+    return f"{'  ' * depth}{os.path.basename(path)}/ ({_summary(nodes[path])})"
+
+def _expanded_lines(nodes, path, depth):
+    """
+    Lines a directory's children take when it is expanded, subdirectories still summarized.
+    """
+    lines = [_summary_line(nodes, os.path.join(path, name) if path else name, depth) for name in nodes[path]["dirs"]]
+    return lines + _file_lines(nodes[path], "  " * depth)
+
+def _chars(lines):
+    return sum(len(line) + 1 for line in lines)
+
+def compact_tree(files, token_budget=TREE_TOKEN_BUDGET):
+    """
+    Renders `files` as an indented tree that fits in ~`token_budget` tokens.
+    Directories are expanded breadth-first while they fit; the rest are
+    collapsed into summaries like "generated/ (412 files, .ts)", so the
+    whole repository's shape stays visible instead of an alphabetical slice.
+    """
+    if not files:
+        return ""
+    nodes = _build_nodes(files)
+    char_budget = token_budget * 4
+
+    expanded = {""}
+    used = _chars(_expanded_lines(nodes, "", 0))
+    queue = deque((name, 1) for name in nodes[""]["dirs"])
+    while queue:
+        path, depth = queue.popleft()
+        # Expanding swaps the summary line for a bare "name/" header plus the children
+        header = f"{'  ' * (depth - 1)}{os.path.basename(path)}/"
+        cost = _chars([header] + _expanded_lines(nodes, path, depth)) - _chars([_summary_line(nodes, path, depth - 1)])
+        if used + cost > char_budget:
+            continue
+        expanded.add(path)
+        used += cost
+        queue.extend((os.path.join(path, name), depth + 1) for name in nodes[path]["dirs"])
+
+    def render(path, depth):
+        lines = []
+        for name in nodes[path]["dirs"]:
+            child = os.path.join(path, name) if path else name
+            if child in expanded:
+                lines.append(f"{'  ' * depth}{name}/")
+                lines.extend(render(child, depth + 1))
+            else:
+                lines.append(_summary_line(nodes, child, depth))
+        return lines + _file_lines(nodes[path], "  " * depth)
+
+    return "\n".join(render("", 0))
+
+def _cached_snapshot(root):
+    key = _snapshot_key(root)
+    if key is None:
+        return {"key": None, "files": list_files(root), "rendered": {}}
+
+    path = _snapshot_path(root)
+    with file_lock(f"{path}.lock"):
+        snapshot = _load_snapshot(path)
+        if snapshot.get("key") == key:
+            return snapshot
+        snapshot = {"key": key, "files": list_files(root), "rendered": {}}
+        _save_snapshot(path, snapshot)
+    return snapshot
+
+def get_files(root="."):
+    """
+    The project's file list (gitignore-aware), cached per HEAD + index state.
+    """
+    return _cached_snapshot(root)["files"]
+
+@timed("scan", "file tree")
+def get_file_tree(root=".", token_budget=TREE_TOKEN_BUDGET):
+    """
+    Compacted tree for `root`. Both the file list and each rendered budget
+    are cached until HEAD or the git index changes.
+    """
+    snapshot = _cached_snapshot(root)
+    rendered = snapshot["rendered"].get(str(token_budget))
+    if rendered is None:
+        rendered = compact_tree(snapshot["files"], token_budget)
+        snapshot["rendered"][str(token_budget)] = rendered
+        if snapshot["key"]:
+            path = _snapshot_path(root)
+            with file_lock(f"{path}.lock"):
+                _save_snapshot(path, snapshot)
+    return rendered
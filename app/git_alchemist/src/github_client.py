@@ -0,0 +1,229 @@
+import os
+import re
+import hashlib
+import subprocess
+import threading
+import httpx
+from .profiler import span
+from . import http_cache
+
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+GITHUB_GRAPHQL_URL = os.getenv("GITHUB_GRAPHQL_URL", f"{GITHUB_API_URL}/graphql")
+GITHUB_TIMEOUT = float(os.getenv("ALCHEMIST_GITHUB_TIMEOUT", "30"))
+# Keep-alive connections per client; bulk sweeps run up to this many requests in parallel
+GITHUB_CONNECTIONS = int(os.getenv("ALCHEMIST_GITHUB_CONNECTIONS", "16"))
+
+_REMOTE_PATTERN = re.compile(r"github\.com[:/]([^/]+)/([^/]+?)(?:\.git)?/?$")
+
+# Process-wide registry: one pooled client per (token, API url), like core's Gemini clients,
+# so every call in a run (and every job in a pooled worker) reuses the same connections.
+_clients = {}
+_clients_lock = threading.Lock()
+_gh_tokens = {}
+
+
+class GitHubError(Exception):
+    """A failed GitHub API call (HTTP error status or transport error)."""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+def use_cli():
+    """
+    True when GitHub calls should go through the gh CLI (ALCHEMIST_GH_CLI=1).
+    """
+    return bool(os.getenv("ALCHEMIST_GH_CLI"))
+
+def _token():
+    """
+    GH_TOKEN / GITHUB_TOKEN, else the token gh is logged in with (asked once per process).
+    """
+    token = os.getenv("GH_TOKEN") or os.getenv("GITHUB_TOKEN")
+    if token:
+        return token
+    if "gh" not in _gh_tokens:
+        try:
+            result = subprocess.run(["gh", "auth", "token"], capture_output=True, text=True, timeout=10)
+            _gh_tokens["gh"] = result.stdout.strip() if result.returncode == 0 else ""
+        except (OSError, subprocess.TimeoutExpired):
+            _gh_tokens["gh"] = ""
+    return _gh_tokens["gh"] or None
+
+def get_client():
+    """
+    The shared GitHub client for the current token, or None when there is no
+    token (or ALCHEMIST_GH_CLI is set) and callers should fall back to gh.
+    """
+    if use_cli():
+        return None
+    token = _token()
+    if not token:
+        return None
+    key = (token, GITHUB_API_URL)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = GitHubClient(token)
+        return client
+
+def current_repo(path="."):
+    """
+    (owner, name) of the GitHub `origin` remote of the checkout at `path`, or None.
+    """
+    try:
+        result = subprocess.run(
+            ["git", "remote", "get-url", "origin"], cwd=path, capture_output=True, text=True, timeout=10
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    match = _REMOTE_PATTERN.search(result.stdout.strip()) if result.returncode == 0 else None
+    return match.groups() if match else None
+
+
+class GitHubClient:
+    """
+    In-process GitHub REST/GraphQL client over one keep-alive connection pool.
+    Thread-safe; the authenticated user is looked up once per client. GETs
+    are conditional (ETag/Last-Modified) against the on-disk http_cache.
+    """
+
+    def __init__(self, token, base_url=GITHUB_API_URL, graphql_url=GITHUB_GRAPHQL_URL):
+        self.graphql_url = graphql_url
+        # Cache entries are scoped to the token without storing it
+        self._identity = hashlib.sha256(f"{base_url}\0{token}".encode("utf-8")).hexdigest()
+        self._http = httpx.Client(
+            base_url=base_url,
+            headers={
+                "Authorization": f"Bearer {token}",
+                "Accept": "application/vnd.github+json",
+                "X-GitHub-Api-Version": "2022-11-28",
+                "User-Agent": "git-alchemist",
+            },
+            timeout=GITHUB_TIMEOUT,
+            limits=httpx.Limits(max_connections=GITHUB_CONNECTIONS, max_keepalive_connections=GITHUB_CONNECTIONS),
+        )
+        self._viewer = None
+        self._viewer_lock = threading.Lock()
+
+    def close(self):
+        self._http.close()
+
+    def request(self, method, path, **kwargs):
+        """
+        Sends one request and returns the response; raises GitHubError on
+        transport errors and 4xx/5xx statuses. A GET answered with 304 Not
+        Modified returns the cached body as a 200 (and costs no rate limit).
+        """
+        with span("github", f"{method} {path}") as attrs:
+            try:
+                request = self._http.build_request(method, path, **kwargs)
+                key = None
+                if method == "GET" and http_cache.is_enabled():
+                    key = http_cache.cache_key(self._identity, str(request.url), request.headers.get("accept"))
+                    request.headers.update(http_cache.validators(key))
+                response = self._http.send(request)
+                if key and response.status_code == 304:
+                    cached = http_cache.revalidated(key)
+                    if cached:
+                        attrs["cache"] = "revalidated"
+                        return httpx.Response(200, headers=cached[0], content=cached[1], request=request)
+                    # Evicted between the lookup and the answer: ask again unconditionally
+                    request.headers.pop("If-None-Match", None)
+                    request.headers.pop("If-Modified-Since", None)
+                    response = self._http.send(request)
+                if key and response.status_code == 200:
+                    http_cache.store(key, str(request.url), response.headers, response.content)
+            except httpx.HTTPError as e:
+                raise GitHubError(f"{method} {path}: {e}") from e
+        if response.status_code >= 400:
+            try:
+                message = response.json().get("message") or response.text
+            except ValueError:
+                message = response.text
+            raise GitHubError(f"{method} {path}: {response.status_code} {message}", status=response.status_code)
+        return response
+
+    # ---------- users ----------
+
+    def viewer(self):
+        """
+        The authenticated user ({"login", "email", ...}), fetched once per client.
+        """
+        with self._viewer_lock:
+            if self._viewer is None:
+                self._viewer = self.request("GET", "/user").json()
+            return self._viewer
+
+    # ---------- GraphQL ----------
+
+    def graphql(self, query, variables=None):
+        """
+        Runs a GraphQL query and returns its "data". Like gh, partial results are
+        kept when some aliases fail; it only raises if there is no data at all.
+        """
+        payload = {"query": query}
+        if variables:
+            payload["variables"] = variables
+        body = self.request("POST", self.graphql_url, json=payload).json()
+        if body.get("data") is None and body.get("errors"):
+            raise GitHubError("GraphQL: " + "; ".join(e.get("message", "") for e in body["errors"]))
+        return body.get("data") or {}
+
+    # ---------- repositories ----------
+
+    def list_repos(self, page=1, per_page=100):
+        """
+        One page of the authenticated user's own repositories, most recently
+        updated first, as REST objects. Returns (repos, has_next_page).
+        """
+        params = {"affiliation": "owner", "sort": "updated", "direction": "desc", "per_page": per_page, "page": page}
+        response = self.request("GET", "/user/repos", params=params)
+        return response.json(), 'rel="next"' in response.headers.get("link", "")
+
+    def get_repo(self, owner, repo):
+        return self.request("GET", f"/repos/{owner}/{repo}").json()
+
+    def get_readme(self, owner, repo):
+        """Raw README text, or None if the repository has none."""
+        try:
+            response = self.request("GET", f"/repos/{owner}/{repo}/readme", headers={"Accept": "application/vnd.github.raw"})
+        except GitHubError as e:
+            if e.status == 404:
+                return None
+            raise
+        return response.text
+
+    def set_description(self, owner, repo, description):
+        self.request("PATCH", f"/repos/{owner}/{repo}", json={"description": description})
+
+    def add_topics(self, owner, repo, topics, existing=None):
+        """
+        Adds `topics` to the repository's topics (like `gh repo edit --add-topic`).
+        Pass `existing` when already known to skip the lookup.
+        """
+        if existing is None:
+            existing = self.request("GET", f"/repos/{owner}/{repo}/topics").json().get("names") or []
+        names = list(dict.fromkeys(list(existing) + list(topics)))
+        self.request("PUT", f"/repos/{owner}/{repo}/topics", json={"names": names})
+        return names
+
+    # ---------- issues ----------
+
+    def ensure_label(self, owner, repo, name, color=None):
+        """Creates a label unless it already exists."""
+        payload = {"name": name}
+        if color:
+            payload["color"] = color
+        try:
+            self.request("POST", f"/repos/{owner}/{repo}/labels", json=payload)
+        except GitHubError as e:
+            # 422: a label with this name already exists
+            if e.status != 422:
+                raise
+
+    def create_issue(self, owner, repo, title, body, labels=()):
+        """Opens an issue; returns its URL."""
+        payload = {"title": title, "body": body, "labels": list(labels)}
+        return self.request("POST", f"/repos/{owner}/{repo}/issues", json=payload).json().get("html_url")
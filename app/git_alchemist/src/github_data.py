@@ -0,0 +1,97 @@
+import os
+import json
+import shlex
+from rich.console import Console
+from .utils import run_shell
+from .profiler import span
+from .github_client import get_client, GitHubError
+
+console = Console()
+
+# Repositories per aliased GraphQL query; keeps each request well under
+# GitHub's node/complexity limits even with several README lookups per repo.
+CHUNK_SIZE = int(os.getenv("ALCHEMIST_GRAPHQL_CHUNK", "20"))
+
+README_CANDIDATES = ["README.md", "readme.md", "Readme.md", "README.rst", "README.txt", "README"]
+
+REPO_FIELDS = """
+    name
+    description
+    licenseInfo { spdxId name }
+    repositoryTopics(first: 20) { nodes { topic { name } } }
+"""
+
+def _readme_fields():
+    return "\n".join(
+        f'    readme{i}: object(expression: {json.dumps("HEAD:" + path)}) {{ ... on Blob {{ text }} }}'
+        for i, path in enumerate(README_CANDIDATES)
+    )
+
+def build_query(owner, names, fields=None):
+    """
+    Builds one GraphQL query that fetches every repo in `names` under an alias (r0, r1, ...).
+    fields: the selection per repository (default: details plus README candidates).
+    """
+    fields = fields or REPO_FIELDS + _readme_fields()
+    parts = []
+    for i, name in enumerate(names):
+        parts.append(
+            f"  r{i}: repository(owner: {json.dumps(owner)}, name: {json.dumps(name)}) {{\n"
+            f"{fields}\n  }}"
+        )
+    return "query {\n" + "\n".join(parts) + "\n}"
+
+def run_graphql(query):
+    """
+    Executes a GraphQL query over the pooled API client, or through gh without
+    a token. Partial results are kept: *any* alias erroring (e.g. a deleted
+    repo) fails the whole call in gh's eyes, but the rest of the data is still valid.
+    """
+    client = get_client()
+    if client:
+        try:
+            return client.graphql(query)
+        except GitHubError:
+            pass
+    output = run_shell(f"gh api graphql -f query={shlex.quote(query)}", check=False)
+    if not output:
+        return {}
+    try:
+        with span("parse", "graphql response"):
+            return json.loads(output).get("data") or {}
+    except ValueError:
+        return {}
+
+def _parse_repo(node):
+    license_info = node.get("licenseInfo") or {}
+    topics = (node.get("repositoryTopics") or {}).get("nodes") or []
+    readme = None
+    for i in range(len(README_CANDIDATES)):
+        blob = node.get(f"readme{i}")
+        if blob and blob.get("text"):
+            readme = blob["text"]
+            break
+    return {
+        "description": node.get("description"),
+        "topics": [t["topic"]["name"] for t in topics],
+        "license": license_info.get("spdxId") or license_info.get("name"),
+        "readme": readme,
+    }
+
+def fetch_repo_details(owner, names, chunk_size=CHUNK_SIZE):
+    """
+    Fetches description, topics, license and README text for many repos with
+    one GraphQL request per `chunk_size` repos (instead of one `gh repo view` each).
+    Returns {name: details}; repos that don't exist are omitted.
+    """
+    names = list(dict.fromkeys(names))
+    details = {}
+    for start in range(0, len(names), chunk_size):
+        chunk = names[start:start + chunk_size]
+        data = run_graphql(build_query(owner, chunk))
+        for i, name in enumerate(chunk):
+            node = data.get(f"r{i}")
+            if not node:
+                continue
+            details[name] = _parse_repo(node)
+    return details
@@ -0,0 +1,93 @@
+import os
+import time
+import hashlib
+from .sqlite_lru import LRUStore
+
+# Total size of cached GitHub response bodies before least-recently-used entries are evicted
+HTTP_CACHE_MAX_BYTES = int(os.getenv("ALCHEMIST_GITHUB_CACHE_MAX_MB", "20")) * 1024 * 1024
+
+# Response headers kept with the body and replayed on a 304 (pagination needs Link)
+KEPT_HEADERS = ("content-type", "link", "etag", "last-modified")
+
+_store = LRUStore("github_http.db", "entries", """
+    url TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL
+""", HTTP_CACHE_MAX_BYTES)
+
+def is_enabled():
+    """
+    Conditional GitHub requests are on unless ALCHEMIST_NO_GITHUB_CACHE is set.
+    Every hit is revalidated with GitHub, so there is no TTL to go stale.
+    """
+    return not os.getenv("ALCHEMIST_NO_GITHUB_CACHE")
+
+def cache_key(identity, url, accept):
+    """
+    Entries are per token identity, so one account never sees another's private data.
+    """
+    digest = hashlib.sha256()
+    for part in (identity, accept or "", url):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+def validators(key):
+    """
+    Returns the conditional request headers (If-None-Match / If-Modified-Since)
+    for a cached entry, or {} if there is none.
+    """
+    with _store.connect() as conn:
+        row = conn.execute("SELECT etag, last_modified FROM entries WHERE key = ?", (key,)).fetchone()
+    if not row:
+        return {}
+    headers = {}
+    if row[0]:
+        headers["If-None-Match"] = row[0]
+    if row[1]:
+        headers["If-Modified-Since"] = row[1]
+    return headers
+
+def revalidated(key):
+    """
+    Called on a 304: returns the cached (headers, body) and counts a hit,
+    or None if the entry was evicted in the meantime.
+    """
+    with _store.connect() as conn:
+        row = conn.execute("SELECT headers, body FROM entries WHERE key = ?", (key,)).fetchone()
+        if not row:
+            return None
+        conn.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+        _store.bump(conn, "hits")
+    headers = dict(line.split(": ", 1) for line in row[0].splitlines() if ": " in line)
+    return headers, row[1]
+
+def store(key, url, headers, body):
+    """
+    Stores a 200 response that carries a validator; counts a miss either way.
+    """
+    etag = headers.get("etag")
+    last_modified = headers.get("last-modified")
+    with _store.connect() as conn:
+        _store.bump(conn, "misses")
+        if not etag and not last_modified:
+            return
+        now = time.time()
+        kept = "\n".join(f"{name}: {headers[name]}" for name in KEPT_HEADERS if name in headers)
+        conn.execute(
+            "INSERT OR REPLACE INTO entries(key, url, etag, last_modified, headers, body, size, created, last_used) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, url, etag, last_modified, kept, body, len(body), now, now)
+        )
+        _store.evict(conn)
+
+def stats():
+    """
+    Cumulative hit (304)/miss/eviction counters plus current size, across all runs.
+    """
+    return _store.stats()
+
+def clear():
+    _store.clear()
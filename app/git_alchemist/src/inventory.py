@@ -0,0 +1,209 @@
+import os
+import json
+import time
+import shlex
+from rich.console import Console
+from .utils import run_shell, check_gh_auth, get_cache_dir, file_lock
+from .profiler import span, timed
+from .github_client import get_client, GitHubError
+
+console = Console()
+
+# Skip the network entirely if the inventory was synced this recently (seconds)
+INVENTORY_MAX_AGE = int(os.getenv("ALCHEMIST_INVENTORY_MAX_AGE", "60"))
+# Do a full resync (which also drops deleted repos) at least this often (seconds)
+INVENTORY_FULL_SYNC_INTERVAL = int(os.getenv("ALCHEMIST_INVENTORY_FULL_SYNC", str(24 * 3600)))
+# Prefix of the page-number cursors used for the REST listing
+REST_CURSOR = "page:"
+
+REPOS_QUERY = """
+query($owner: String!, $cursor: String) {
+  repositoryOwner(login: $owner) {
+    repositories(first: 100, after: $cursor, ownerAffiliations: OWNER, orderBy: {field: UPDATED_AT, direction: DESC}) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        name
+        nameWithOwner
+        description
+        url
+        homepageUrl
+        isPrivate
+        isArchived
+        isFork
+        stargazerCount
+        updatedAt
+        pushedAt
+        licenseInfo { spdxId name }
+        repositoryTopics(first: 20) { nodes { topic { name } } }
+      }
+    }
+  }
+}
+"""
+
+def _inventory_path(owner):
+    return os.path.join(get_cache_dir("inventory"), f"{owner.lower()}.json")
+
+def _sync_lock(owner):
+    """
+    Serializes syncs of the same owner across processes (server + CLI runs).
+    """
+    return file_lock(os.path.join(get_cache_dir("inventory"), f"{owner.lower()}.lock"))
+
+def _load(owner):
+    try:
+        with open(_inventory_path(owner), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"owner": owner, "synced_at": 0, "full_synced_at": 0, "watermark": "", "repos": {}}
+
+@timed("write", "inventory")
+def _save(owner, data):
+    path = _inventory_path(owner)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+def _compact(node):
+    """
+    Reduces a GraphQL repository node to the fields the tools actually use.
+    """
+    license_info = node.get("licenseInfo") or {}
+    topics = (node.get("repositoryTopics") or {}).get("nodes") or []
+    return {
+        "name": node["name"],
+        "nameWithOwner": node.get("nameWithOwner"),
+        "description": node.get("description"),
+        "url": node.get("url"),
+        "homepage": node.get("homepageUrl") or None,
+        "topics": [t["topic"]["name"] for t in topics],
+        "license": license_info.get("spdxId") or license_info.get("name"),
+        "stargazerCount": node.get("stargazerCount", 0),
+        "isPrivate": node.get("isPrivate", False),
+        "isArchived": node.get("isArchived", False),
+        "isFork": node.get("isFork", False),
+        "updatedAt": node.get("updatedAt") or "",
+        "pushedAt": node.get("pushedAt") or "",
+    }
+
+def _from_rest(repo):
+    """
+    Maps a REST repository object onto the GraphQL node shape.
+    """
+    license_info = repo.get("license") or {}
+    return {
+        "name": repo["name"],
+        "nameWithOwner": repo.get("full_name"),
+        "description": repo.get("description"),
+        "url": repo.get("html_url"),
+        "homepageUrl": repo.get("homepage"),
+        "isPrivate": repo.get("private", False),
+        "isArchived": repo.get("archived", False),
+        "isFork": repo.get("fork", False),
+        "stargazerCount": repo.get("stargazers_count", 0),
+        "updatedAt": repo.get("updated_at") or "",
+        "pushedAt": repo.get("pushed_at") or "",
+        "licenseInfo": {"spdxId": license_info.get("spdx_id"), "name": license_info.get("name")} if license_info else None,
+        "repositoryTopics": {"nodes": [{"topic": {"name": name}} for name in repo.get("topics") or []]},
+    }
+
+def _fetch_rest_page(client, page):
+    repos, has_next = client.list_repos(page)
+    return {
+        "pageInfo": {"hasNextPage": has_next, "endCursor": f"{REST_CURSOR}{page + 1}"},
+        "nodes": [_from_rest(repo) for repo in repos],
+    }
+
+def _fetch_page(owner, cursor=None):
+    client = get_client()
+    if cursor and cursor.startswith(REST_CURSOR):
+        # Later pages of a REST listing; GraphQL cursors don't mix with page numbers
+        return _fetch_rest_page(client, int(cursor[len(REST_CURSOR):]))
+    result = None
+    if client:
+        try:
+            if cursor is None and owner.lower() == client.viewer()["login"].lower():
+                # Own account: the REST listing can be revalidated with an ETag, so an
+                # unchanged first page is a free 304 (GraphQL POSTs can't be conditional)
+                return _fetch_rest_page(client, 1)
+            result = {"data": client.graphql(REPOS_QUERY, {"owner": owner, "cursor": cursor})}
+        except GitHubError:
+            result = None
+    if result is None:
+        result = _fetch_page_cli(owner, cursor)
+    repos = ((result.get("data") or {}).get("repositoryOwner") or {}).get("repositories")
+    if repos is None:
+        raise RuntimeError(f"Unknown repository owner: {owner}")
+    return repos
+
+def _fetch_page_cli(owner, cursor=None):
+    cmd = f"gh api graphql -f query={shlex.quote(REPOS_QUERY)} -f owner={shlex.quote(owner)}"
+    if cursor:
+        cmd += f" -f cursor={shlex.quote(cursor)}"
+    output = run_shell(cmd)
+    with span("parse", "inventory page"):
+        return json.loads(output)
+
+def sync_inventory(owner, force_full=False, max_age=0):
+    """
+    Brings the local inventory for `owner` up to date.
+    Pages through repositories newest-first and stops as soon as it reaches
+    repos older than the last sync, so an unchanged account costs one request.
+    """
+    with _sync_lock(owner):
+        data = _load(owner)
+        now = time.time()
+        # Another process may have synced while we waited for the lock
+        if not force_full and data["repos"] and now - data["synced_at"] <= max_age:
+            return data
+        full = force_full or not data["repos"] or now - data["full_synced_at"] > INVENTORY_FULL_SYNC_INTERVAL
+        watermark = "" if full else data["watermark"]
+
+        fetched = {}
+        cursor = None
+        while True:
+            page = _fetch_page(owner, cursor)
+            reached_known = False
+            for node in page["nodes"]:
+                if watermark and node["updatedAt"] < watermark:
+                    reached_known = True
+                    break
+                fetched[node["name"]] = _compact(node)
+            if reached_known or not page["pageInfo"]["hasNextPage"]:
+                break
+            cursor = page["pageInfo"]["endCursor"]
+
+        if full:
+            data["repos"] = fetched
+            data["full_synced_at"] = now
+        else:
+            data["repos"].update(fetched)
+
+        if data["repos"]:
+            data["watermark"] = max(r["updatedAt"] for r in data["repos"].values())
+        data["synced_at"] = now
+        _save(owner, data)
+        return data
+
+def list_repos(owner=None, visibility=None, max_age=INVENTORY_MAX_AGE):
+    """
+    Returns the owner's repositories from the local inventory, newest first.
+    Syncs incrementally first unless the inventory is younger than `max_age` seconds.
+    visibility: None (all), 'public' or 'private'.
+    """
+    owner = owner or check_gh_auth()
+    if not owner:
+        return []
+
+    data = _load(owner)
+    if time.time() - data["synced_at"] > max_age:
+        data = sync_inventory(owner, max_age=max_age)
+
+    repos = list(data["repos"].values())
+    if visibility == "public":
+        repos = [r for r in repos if not r["isPrivate"]]
+    elif visibility == "private":
+        repos = [r for r in repos if r["isPrivate"]]
+    repos.sort(key=lambda r: r["updatedAt"], reverse=True)
+    return repos
@@ -4,9 +4,32 @@ import os
 from rich.console import Console
 from .core import generate_content
 from .utils import run_shell
+from .profiler import span
+from .github_client import get_client, current_repo, GitHubError
 
 console = Console()
 
+# Labels created on demand, with their colors (None: GitHub picks one)
+LABEL_COLORS = {"automated": "505050", "status: draft": "333333", "good first issue": "7057ff"}
+
+def _create_with_api(title, body, labels):
+    """
+    Creates the labels and the issue over the pooled API client.
+    Returns the issue URL, or None if there's no client/remote or a call failed (use gh then).
+    """
+    client = get_client()
+    repo = current_repo() if client else None
+    if not repo:
+        return None
+    owner, name = repo
+    try:
+        for label in labels:
+            client.ensure_label(owner, name, label, LABEL_COLORS.get(label))
+        return client.create_issue(owner, name, title, body, labels)
+    except GitHubError as e:
+        console.print(f"[yellow]GitHub API call failed ({e}); retrying with gh.[/yellow]")
+        return None
+
 def create_issue(idea, mode="fast"):
     """
     Translates an idea into a technical GitHub issue.
@@ -29,13 +52,20 @@ No markdown blocks.
 
     try:
         clean_json = result.replace("```json", "").replace("```", "").strip()
-        issue = json.loads(clean_json)
+        with span("parse", "issue draft"):
+            issue = json.loads(clean_json)
         
         title = f"[DRAFT] {issue['title']}"
         body = f"{issue['body']}\n\n> Automated by Git-Alchemist"
         label = issue.get('label', 'enhancement')
         
         console.print(f"[yellow]Uploading Draft: {title}[/yellow]")
+
+        labels = list(dict.fromkeys(["status: draft", "automated", label] + (["good first issue"] if issue.get('easy') else [])))
+        url = _create_with_api(title, body, labels)
+        if url:
+            console.print(f"[green]Success! Issue created as draft:[/green] {url}")
+            return
         
         # Create labels if they don't exist
         run_shell('gh label create "automated" --color "505050" 2>/dev/null', check=False)
@@ -0,0 +1,151 @@
+import os
+import re
+import json
+import time
+from .utils import get_cache_dir, file_lock
+
+# Cooldown after a 429 when the API gives no retry hint; doubles on repeated hits
+QUOTA_COOLDOWN = float(os.getenv("ALCHEMIST_QUOTA_COOLDOWN", "60"))
+MAX_COOLDOWN = float(os.getenv("ALCHEMIST_MAX_COOLDOWN", "900"))
+# Consecutive 5xx errors before the circuit opens, and how long it stays open
+CIRCUIT_THRESHOLD = int(os.getenv("ALCHEMIST_CIRCUIT_THRESHOLD", "3"))
+CIRCUIT_COOLDOWN = float(os.getenv("ALCHEMIST_CIRCUIT_COOLDOWN", "30"))
+# Unknown/unsupported model ids are parked for a long time
+NOT_FOUND_COOLDOWN = 3600.0
+
+LATENCY_ALPHA = 0.3
+
+_RETRY_PATTERNS = [
+    re.compile(r"retryDelay['\"]?\s*[:=]\s*['\"]?(\d+(?:\.\d+)?)s"),
+    re.compile(r"retry in (\d+(?:\.\d+)?)\s*s", re.IGNORECASE),
+]
+
+def _state_path():
+    return os.path.join(get_cache_dir(), "model_health.json")
+
+def _load():
+    try:
+        with open(_state_path(), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _update(model_name, mutate):
+    """
+    Read-modify-write of one model's entry under a cross-process lock,
+    so concurrent CLI runs and server jobs share what they learn.
+    """
+    with file_lock(_state_path() + ".lock"):
+        state = _load()
+        entry = state.setdefault(model_name, {
+            "cooldown_until": 0,
+            "reason": "",
+            "consecutive_failures": 0,
+            "consecutive_quota_hits": 0,
+            "successes": 0,
+            "rate_limited": 0,
+            "server_errors": 0,
+            "latency_ewma": None,
+        })
+        mutate(entry)
+        tmp_path = f"{_state_path()}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=1)
+        os.replace(tmp_path, _state_path())
+
+def _status_code(error):
+    code = getattr(error, "code", None)
+    if isinstance(code, int):
+        return code
+    err_msg = str(error)
+    if "429" in err_msg or "RESOURCE_EXHAUSTED" in err_msg:
+        return 429
+    if "NOT_FOUND" in err_msg:
+        return 404
+    match = re.search(r"\b(5\d\d)\b", err_msg)
+    if match or "UNAVAILABLE" in err_msg or "INTERNAL" in err_msg:
+        return int(match.group(1)) if match else 503
+    return None
+
+def retry_after(error):
+    """
+    Extracts the server's retry hint (seconds) from a Gemini error, if any.
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers:
+        try:
+            return float(headers.get("retry-after"))
+        except (TypeError, ValueError):
+            pass
+
+    text = str(error) + " " + json.dumps(getattr(error, "details", None) or {}, default=str)
+    for pattern in _RETRY_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            return float(match.group(1))
+    return None
+
+def record_success(model_name, latency):
+    def mutate(entry):
+        entry["successes"] += 1
+        entry["consecutive_failures"] = 0
+        entry["consecutive_quota_hits"] = 0
+        entry["cooldown_until"] = 0
+        entry["reason"] = ""
+        previous = entry["latency_ewma"]
+        entry["latency_ewma"] = latency if previous is None else (1 - LATENCY_ALPHA) * previous + LATENCY_ALPHA * latency
+    _update(model_name, mutate)
+
+def record_failure(model_name, error):
+    """
+    Classifies a failed call and puts the model on cooldown when warranted.
+    Returns the status code that was detected (or None).
+    """
+    code = _status_code(error)
+    hint = retry_after(error)
+    now = time.time()
+
+    def mutate(entry):
+        if code == 429:
+            entry["rate_limited"] += 1
+            entry["consecutive_quota_hits"] += 1
+            backoff = QUOTA_COOLDOWN * 2 ** (entry["consecutive_quota_hits"] - 1)
+            entry["cooldown_until"] = now + min(hint if hint is not None else backoff, MAX_COOLDOWN)
+            entry["reason"] = "quota"
+        elif code is not None and code >= 500:
+            entry["server_errors"] += 1
+            entry["consecutive_failures"] += 1
+            if entry["consecutive_failures"] >= CIRCUIT_THRESHOLD:
+                entry["cooldown_until"] = now + (hint or CIRCUIT_COOLDOWN)
+                entry["reason"] = "circuit open"
+        elif code == 404:
+            entry["cooldown_until"] = now + NOT_FOUND_COOLDOWN
+            entry["reason"] = "not found"
+        else:
+            entry["consecutive_failures"] += 1
+
+    _update(model_name, mutate)
+    return code
+
+def available_models(models):
+    """
+    Returns (usable, skipped) for a model tier, preserving tier order.
+    If every model is cooling down, the one that recovers soonest is
+    returned as a single half-open probe rather than failing outright.
+    """
+    state = _load()
+    now = time.time()
+    usable, skipped = [], []
+    for model_name in models:
+        entry = state.get(model_name)
+        if entry and entry.get("cooldown_until", 0) > now:
+            skipped.append((model_name, entry["cooldown_until"] - now, entry.get("reason", "")))
+        else:
+            usable.append(model_name)
+
+    if not usable and skipped:
+        soonest = min(skipped, key=lambda s: s[1])
+        usable.append(soonest[0])
+        skipped.remove(soonest)
+    return usable, skipped
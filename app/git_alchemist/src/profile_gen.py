@@ -1,25 +1,40 @@
 import os
-import json
 import tempfile
 import shutil
 import re
 from pathlib import Path
 from rich.console import Console
 from rich.prompt import Confirm
-from .core import generate_content
+from .core import generate_content, generate_stream, header_writer
 from .utils import run_shell, check_gh_auth, get_user_email
+from .inventory import list_repos
+from .profiler import span
+from .github_client import get_client, GitHubError
+from .bulk import parse_json_object
 
 console = Console()
 
+FOOTER = "\n\n---\n*Generated by Git-Alchemist ⚗️*"
+FOOTER_PATTERN = re.compile(r"\n*^---[ \t]*\n+\*Generated by Git-Alchemist[^\n]*\s*\Z", re.MULTILINE)
+HEADING_PATTERN = re.compile(r"^(#{1,6})[ \t]+(.*?)(?:[ \t]+#+)?[ \t]*$")
+# Markdown links (text, target), HTML hrefs and bare URLs
+LINK_PATTERN = re.compile(
+    r"\[([^\]]*)\]\(\s*<?([^)\s>]+)>?[^)]*\)|href=[\"']([^\"']+)[\"']|(https?://github\.com/[^\s)\"'<>\]]+)",
+    re.IGNORECASE
+)
+REPO_URL_PATTERN = re.compile(r"^https?://(?:www\.)?github\.com/([^/\s]+)/([^/\s#?]+)", re.IGNORECASE)
+FENCE_PATTERN = re.compile(r"^[ \t]*(```|~~~).*?^[ \t]*\1[^\n]*$", re.MULTILINE | re.DOTALL)
+ENTRY_PATTERN = re.compile(r"^([ \t]*[-*+])[ \t]+\S")
+# Category for new projects the model didn't place
+FALLBACK_CATEGORY = "Other Projects"
+
 def fetch_repos(username):
     """
     Fetches public repositories for the user.
     """
     console.print("[cyan]Fetching repositories...[/cyan]")
-    cmd = 'gh repo list --visibility=public --limit 100 --json name,description,url,isPrivate,isArchived,stargazerCount'
     try:
-        output = run_shell(cmd)
-        return json.loads(output)
+        return list_repos(username, visibility="public")
     except Exception as e:
         console.print(f"[red]Failed to fetch repos:[/red] {e}")
         return []
@@ -29,6 +44,7 @@ def filter_repos(repos, username, strategy="FULL_GEN", existing_content=""):
     Filters out junk, private, archived, and irrelevant repos (like Awesome lists).
     """
     candidates = []
+    listed = listed_repos(existing_content, username, repos) if strategy == "SMART_UPDATE" else set()
     
     # Blocklist for low-value repos
     junk_patterns = ["test", "export", "WPy64", "PROFILE_DRAFT.md", "temp", "awesome-"]
@@ -43,16 +59,241 @@ def filter_repos(repos, username, strategy="FULL_GEN", existing_content=""):
         if any(p in name.lower() for p in junk_patterns): continue
         if name.endswith(".exe"): continue
         
-        # Strategy filter
-        if strategy == "SMART_UPDATE":
-            # Check if name or URL exists in current profile content
-            if name in existing_content or r['url'] in existing_content:
-                continue
+        # Strategy filter: skip repos the current profile already links to
+        if strategy == "SMART_UPDATE" and name.lower() in listed:
+            continue
         
         candidates.append(r)
         
     return candidates
 
+def parse_sections(markdown):
+    """
+    Splits Markdown at ATX headings (ignoring code fences) into sections of
+    {"title", "level", "lines"}; the first is the untitled preamble.
+    """
+    sections = [{"title": None, "level": 0, "lines": []}]
+    fenced = False
+    for line in markdown.splitlines():
+        if line.lstrip().startswith(("```", "~~~")):
+            fenced = not fenced
+        match = None if fenced else HEADING_PATTERN.match(line)
+        if match:
+            sections.append({"title": match.group(2), "level": len(match.group(1)), "lines": [line]})
+        else:
+            sections[-1]["lines"].append(line)
+    return sections
+
+def render_sections(sections):
+    return "\n".join(line for section in sections for line in section["lines"])
+
+def _repo_name(url, username):
+    match = REPO_URL_PATTERN.match(url.strip())
+    if not match or match.group(1).lower() != username.lower():
+        return None
+    name = match.group(2)
+    return (name[:-4] if name.endswith(".git") else name).lower()
+
+def linked_repos(markdown, username):
+    """
+    Lowercase names of `username`'s repositories linked by URL in `markdown`
+    (outside code fences).
+    """
+    names = set()
+    for _, target, href, bare in LINK_PATTERN.findall(FENCE_PATTERN.sub("", markdown)):
+        name = _repo_name(target or href or bare, username)
+        if name:
+            names.add(name)
+    return names
+
+def _normalize_url(url):
+    url = re.sub(r"^https?://(www\.)?", "", url.strip().lower())
+    return url.rstrip("/")
+
+def listed_repos(markdown, username, repos=()):
+    """
+    Lowercase names of the repos a README already lists: its GitHub URL is
+    linked, or the homepage of one of `repos` is. Exact URL matches only;
+    link text alone never counts (a [blog](...) link doesn't list `blog`).
+    """
+    names = linked_repos(markdown, username)
+    homepages = {_normalize_url(r["homepage"]): r["name"].lower() for r in repos if r.get("homepage")}
+    if homepages:
+        for _, target, href, bare in LINK_PATTERN.findall(FENCE_PATTERN.sub("", markdown)):
+            name = homepages.get(_normalize_url(target or href or bare))
+            if name:
+                names.add(name)
+    return names
+
+def category_sections(sections, username):
+    """
+    The sections that list the user's projects (contain a link to one of their repos).
+    """
+    return [s for s in sections if s["title"] and linked_repos("\n".join(s["lines"]), username)]
+
+def _append_entries(section, entries):
+    """
+    Inserts entry lines after the section's last list item, in its bullet style.
+    """
+    lines = section["lines"]
+    items = [i for i, line in enumerate(lines) if ENTRY_PATTERN.match(line)]
+    bullet = ENTRY_PATTERN.match(lines[items[0]]).group(1) if items else "-"
+    new_lines = [f"{bullet} {entry}" for entry in entries]
+    if items:
+        at = items[-1] + 1
+    else:
+        # No list yet: start one after the heading or prose, separated by a blank line
+        at = max(i for i, line in enumerate(lines) if line.strip()) + 1
+        new_lines = [""] + new_lines
+    lines[at:at] = new_lines
+
+def splice_entries(markdown, placements, username):
+    """
+    Adds new project entries to a README without touching anything else.
+    placements: {category title: [entry Markdown]}. Existing categories get
+    the entries appended; unknown ones become new sections after the last
+    category. Returns (markdown, changed section titles).
+    """
+    body = FOOTER_PATTERN.sub("", markdown).rstrip()
+    sections = parse_sections(body)
+    categories = category_sections(sections, username)
+    by_title = {s["title"].strip().lower(): s for s in sections if s["title"]}
+    level = categories[0]["level"] if categories else 2
+    insert_at = sections.index(categories[-1]) + 1 if categories else len(sections)
+
+    changed = []
+    for title, entries in placements.items():
+        section = by_title.get(title.strip().lower())
+        if section is None:
+            section = {"title": title, "level": level, "lines": ["#" * level + " " + title]}
+            # Keep a blank line between the previous section and the new heading
+            previous = sections[insert_at - 1]["lines"]
+            if previous and previous[-1].strip():
+                previous.append("")
+            sections.insert(insert_at, section)
+            by_title[title.strip().lower()] = section
+            insert_at += 1
+        _append_entries(section, entries)
+        if section["lines"][-1].strip() and section is not sections[-1]:
+            section["lines"].append("")
+        changed.append(section["title"])
+    return render_sections(sections), changed
+
+def _placement_prompt(categories, candidates, username):
+    lines = []
+    for section in categories:
+        listed = sorted(linked_repos("\n".join(section["lines"]), username))
+        lines.append(f"- {section['title']} (e.g. {', '.join(listed[:3])})")
+    category_list = "\n".join(lines) or "(none yet)"
+    projects = "\n".join(f"- Name: {r['name']}\n  Desc: {r['description'] or ''}" for r in candidates)
+    return f"""
+Task: Sort new projects into the categories of an existing GitHub Profile README.
+
+Existing categories:
+{category_list}
+
+New Projects to Add:
+{projects}
+
+Instructions:
+1. Put every new project under the best-fitting existing category, using its exact title.
+2. Only if none fits, use a short new category title (no emojis).
+3. Write a one-line description (max 20 words) for each project. STRICTLY NO EMOJIS.
+4. Respond with JSON only, mapping category title to entries:
+{{"Category Title": [{{"name": "project-name", "description": "One line."}}]}}
+"""
+
+def _placements(answer, candidates):
+    """
+    Turns the model's {category: [{name, description}]} into entry lines.
+    Unknown names are ignored; projects it left out go to FALLBACK_CATEGORY.
+    """
+    by_name = {r["name"].lower(): r for r in candidates}
+    placements = {}
+    placed = set()
+    for title, items in answer.items():
+        if not isinstance(title, str) or not title.strip() or not isinstance(items, list):
+            continue
+        for item in items:
+            name = item.get("name") if isinstance(item, dict) else item
+            repo = by_name.get(str(name).strip().lower())
+            if not repo or repo["name"] in placed:
+                continue
+            description = item.get("description") if isinstance(item, dict) else None
+            placements.setdefault(title.strip(), []).append(_entry(repo, description))
+            placed.add(repo["name"])
+    for repo in candidates:
+        if repo["name"] not in placed:
+            placements.setdefault(FALLBACK_CATEGORY, []).append(_entry(repo))
+    return placements
+
+def _entry(repo, description=None):
+    description = (description if isinstance(description, str) and description.strip() else repo.get("description")) or ""
+    entry = f"**[{repo['name']}]({repo['url']})**"
+    return f"{entry} - {description.strip()}" if description.strip() else entry
+
+def update_sections(username, current_content, candidates, mode="fast"):
+    """
+    SMART_UPDATE: asks the model only where each new project belongs (category
+    titles in, small JSON out) and splices the entries in locally, so the rest
+    of the README is never rewritten. Returns the new Markdown, or None.
+    """
+    with span("parse", "profile sections"):
+        categories = category_sections(parse_sections(current_content), username)
+    console.print(f"[magenta]Placing {len(candidates)} new projects with Gemini ({mode} mode)...[/magenta]")
+    result = generate_content(_placement_prompt(categories, candidates, username), mode=mode)
+    if not result:
+        return None
+    with span("parse", "profile placements"):
+        placements = _placements(parse_json_object(result), candidates)
+        updated, changed = splice_entries(current_content, placements, username)
+
+    console.print("[magenta]--- Changed Sections ---[/magenta]")
+    for section in parse_sections(updated):
+        if section["title"] in changed:
+            console.print("\n".join(section["lines"]).strip(), markup=False)
+            console.print()
+    return updated
+
+def fetch_profile_readme(username):
+    """
+    The current profile README (raw Markdown), or None if there isn't one.
+    """
+    client = get_client()
+    if client:
+        try:
+            return client.get_readme(username, username)
+        except GitHubError:
+            pass
+    return run_shell(f'gh api "repos/{username}/{username}/readme" --headers "Accept: application/vnd.github.raw"', check=False)
+
+def generate_full_profile(username, candidates, mode="fast"):
+    """
+    FULL_GEN: has the model write the whole project showcase. Returns Markdown or None.
+    """
+    candidates_str = "\n".join([f"- Name: {r['name']}\n  Desc: {r['description'] or ''}\n  URL: {r['url']}" for r in candidates])
+    prompt = f"""
+Task: Generate a professional Project Showcase for a GitHub Profile.
+Username: {username}
+
+Projects List:
+{candidates_str}
+
+Instructions:
+1. Group projects into 3-6 meaningful categories (e.g., '## AI & Automation', '## Hardware').
+2. MANDATORY LINKING: Use the format '- **[Name](URL)** - Description'.
+3. Use a clean, professional header at the top.
+4. STRICTLY NO EMOJIS.
+5. Output the FULL Markdown.
+"""
+
+    console.print(f"[magenta]Generating content with Gemini ({mode} mode)...[/magenta]")
+    # Streamed so long profiles show progress instead of a silent wait
+    result = generate_stream(prompt, mode=mode, write=header_writer("[magenta]--- Draft ---[/magenta]"))
+    if not result:
+        return None
+    return result.replace("```markdown", "").replace("```", "").strip()
+
 def generate_profile(username, force=False, mode="fast"):
     """
     Main function to generate or update the profile.
@@ -71,7 +312,7 @@ def generate_profile(username, force=False, mode="fast"):
     
     try:
         console.print("[cyan]Checking for existing profile...[/cyan]")
-        current_content = run_shell(f'gh api "repos/{username}/{username}/readme" --headers "Accept: application/vnd.github.raw"', check=False)
+        current_content = fetch_profile_readme(username)
         if current_content and len(current_content) > 200 and not force:
             console.print("[green]Found existing robust profile. Switching to SMART_UPDATE.[/green]")
             strategy = "SMART_UPDATE"
@@ -88,64 +329,24 @@ def generate_profile(username, force=False, mode="fast"):
         console.print("[green]No new repositories to add.[/green]")
         return
 
-    # Prompt Engineering
-    candidates_str = "\n".join([f"- Name: {r['name']}\n  Desc: {r['description'] or ''}\n  URL: {r['url']}" for r in candidates])
-    
-    prompt = ""
     if strategy == "SMART_UPDATE":
-        prompt = f"""
-Task: Update a GitHub Profile README.
-Existing Markdown:
-'''
-{current_content}
-'''
-
-New Projects to Add:
-{candidates_str}
-
-Instructions:
-1. Integrate the 'New Projects' into the 'Existing Markdown' naturally.
-2. Place them under appropriate categories.
-3. PRESERVE THE EXISTING STRUCTURE: Do not delete existing sections, badges, or headers.
-4. MANDATORY LINKING: Use the provided URL for each project in the format '- **[Name](URL)** - Description'.
-5. MATCH THE STYLE: If the existing list uses bullets, stick to it.
-6. STRICTLY NO EMOJIS in new additions.
-7. Output the FULL updated Markdown content.
-"""
+        # Only the new entries are generated; the rest of the README stays byte-for-byte
+        final_md = update_sections(username, current_content, candidates, mode)
+        if not final_md:
+            return
     else:
-        # Full Gen
-        prompt = f"""
-Task: Generate a professional Project Showcase for a GitHub Profile.
-Username: {username}
-
-Projects List:
-{candidates_str}
-
-Instructions:
-1. Group projects into 3-6 meaningful categories (e.g., '## AI & Automation', '## Hardware').
-2. MANDATORY LINKING: Use the format '- **[Name](URL)** - Description'.
-3. Use a clean, professional header at the top.
-4. STRICTLY NO EMOJIS.
-5. Output the FULL Markdown.
-"""
-
-    console.print(f"[magenta]Generating content with Gemini ({mode} mode)...[/magenta]")
-    result = generate_content(prompt, mode=mode)
-    
-    if not result:
-        return
+        final_md = generate_full_profile(username, candidates, mode)
+        if not final_md:
+            return
 
-    # Post-processing
-    final_md = result.replace("```markdown", "").replace("```", "").strip()
-    
     # Ensure branding is preserved but clean
-    footer = "\n\n---\n*Generated by Git-Alchemist ⚗️*"
-    if "*Generated by Git-Alchemist*" not in final_md:
-        final_md += footer
+    if not FOOTER_PATTERN.search(final_md):
+        final_md += FOOTER
 
     # Save Draft
-    with open("PROFILE_DRAFT.md", "w", encoding="utf-8") as f:
-        f.write(final_md)
+    with span("write", "PROFILE_DRAFT.md"):
+        with open("PROFILE_DRAFT.md", "w", encoding="utf-8") as f:
+            f.write(final_md)
     console.print(f"[magenta]Draft saved to PROFILE_DRAFT.md[/magenta]")
     
     # Deploy (Strictly PR)
@@ -168,8 +369,9 @@ def deploy_profile(username, content):
             
         # Write file
         readme_path = repo_dir / "README.md"
-        with open(readme_path, "w", encoding="utf-8") as f:
-            f.write(content)
+        with span("write", "profile README.md"):
+            with open(readme_path, "w", encoding="utf-8") as f:
+                f.write(content)
             
         # Git ops
         cwd = os.getcwd()
@@ -0,0 +1,210 @@
+import os
+import json
+import time
+import itertools
+import threading
+import functools
+import contextvars
+from contextlib import contextmanager
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+
+# Individual spans listed under the per-phase summary
+SLOWEST_SPANS = 10
+# Longest span name kept (shell commands and prompts can be huge)
+MAX_NAME_LENGTH = 80
+# Imports finished longer ago than this before profiling started were not paid by this run
+IMPORT_GAP = 1.0
+
+_lock = threading.Lock()
+# Innermost open span; a ContextVar so threads and asyncio tasks each nest their own spans
+_current = contextvars.ContextVar("profiler_span", default=None)
+_ids = itertools.count(1)
+_spans = []
+_active = False
+_started = None
+# Set by the CLI once its modules are imported; reported by the first profiled run only
+_pending_import = None
+
+def enabled():
+    return _active
+
+def note_import(started, finished):
+    global _pending_import
+    _pending_import = (started, finished)
+
+def start():
+    """
+    Starts recording spans for this run (discarding any from an earlier run
+    in the same process, e.g. a pooled worker).
+    """
+    global _active, _started, _spans, _pending_import
+    with _lock:
+        _spans = []
+        _started = time.perf_counter()
+        _active = True
+    if _pending_import:
+        # Imports happen before argument parsing, so they are back-filled here.
+        # A pooled worker imported long before its first job; that job didn't pay for them.
+        began, finished = _pending_import
+        _pending_import = None
+        if _started - finished < IMPORT_GAP:
+            _started = began
+            _append(next(_ids), None, "import", "cli modules", began, finished, {})
+
+def _append(span_id, parent, phase, name, began, finished, attrs):
+    with _lock:
+        _spans.append({
+            "id": span_id,
+            "parent": parent,
+            "phase": phase,
+            "name": name[:MAX_NAME_LENGTH],
+            "thread": threading.current_thread().name,
+            "start": began,
+            "duration": finished - began,
+            "attrs": attrs,
+        })
+
+@contextmanager
+def span(phase, name, **attrs):
+    """
+    Times the enclosed block as one span of `phase` (shell, model, scan, ...).
+    Yields the attrs dict so the block can annotate the span (e.g. an outcome).
+    No-op unless profiling is on.
+    """
+    if not _active:
+        yield attrs
+        return
+    span_id = next(_ids)
+    parent = _current.get()
+    token = _current.set(span_id)
+    began = time.perf_counter()
+    try:
+        yield attrs
+    except BaseException as e:
+        attrs["error"] = type(e).__name__
+        raise
+    finally:
+        finished = time.perf_counter()
+        _current.reset(token)
+        _append(span_id, parent, phase, name, began, finished, attrs)
+
+def timed(phase, name=None):
+    """
+    Decorator form of span(); the span is named after the function by default.
+    """
+    def decorator(func):
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _active:
+                return func(*args, **kwargs)
+            with span(phase, label):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+# ---------- report ----------
+
+def _self_times(spans):
+    """
+    Each span's duration minus its direct children's, so phases add up
+    without counting nested work (e.g. the shell command inside an auth check) twice.
+    """
+    child_time = {}
+    for item in spans:
+        if item["parent"] is not None:
+            child_time[item["parent"]] = child_time.get(item["parent"], 0.0) + item["duration"]
+    return {item["id"]: max(0.0, item["duration"] - child_time.get(item["id"], 0.0)) for item in spans}
+
+def build_report(command):
+    """
+    The recorded run as a JSON-serializable dict: every span plus a per-phase summary.
+    """
+    finished = time.perf_counter()
+    with _lock:
+        spans = sorted(_spans, key=lambda s: s["start"])
+    wall = finished - _started
+    self_times = _self_times(spans)
+
+    phases = {}
+    for item in spans:
+        entry = phases.setdefault(item["phase"], {"phase": item["phase"], "calls": 0, "total": 0.0, "self": 0.0, "max": 0.0})
+        entry["calls"] += 1
+        entry["total"] += item["duration"]
+        entry["self"] += self_times[item["id"]]
+        entry["max"] = max(entry["max"], item["duration"])
+
+    # Main-thread time outside any span (argument parsing, prompt building, printing)
+    main_thread = threading.main_thread().name
+    covered = sum(s["duration"] for s in spans if s["parent"] is None and s["thread"] == main_thread)
+
+    return {
+        "command": command,
+        "pid": os.getpid(),
+        "wall_seconds": round(wall, 6),
+        "untracked_seconds": round(max(0.0, wall - covered), 6),
+        "phases": [
+            {**entry, "total": round(entry["total"], 6), "self": round(entry["self"], 6), "max": round(entry["max"], 6)}
+            for entry in sorted(phases.values(), key=lambda p: p["self"], reverse=True)
+        ],
+        "spans": [
+            {**item, "start": round(item["start"] - _started, 6), "duration": round(item["duration"], 6),
+             "self": round(self_times[item["id"]], 6)}
+            for item in spans
+        ],
+    }
+
+def print_report(report):
+    table = Table(title=f"Profile: {report['command']} ({report['wall_seconds']:.2f}s wall)", border_style="blue")
+    table.add_column("Phase", style="cyan")
+    table.add_column("Calls", justify="right")
+    table.add_column("Self", justify="right")
+    table.add_column("Total", justify="right")
+    table.add_column("Max", justify="right")
+    table.add_column("% Wall", justify="right")
+    wall = report["wall_seconds"] or 1e-9
+    for phase in report["phases"]:
+        table.add_row(
+            phase["phase"], str(phase["calls"]), f"{phase['self']:.3f}s", f"{phase['total']:.3f}s",
+            f"{phase['max']:.3f}s", f"{phase['self'] / wall:.1%}"
+        )
+    table.add_row("(untracked)", "", f"{report['untracked_seconds']:.3f}s", "", "", f"{report['untracked_seconds'] / wall:.1%}")
+    console.print(table)
+
+    slowest = sorted(report["spans"], key=lambda s: s["duration"], reverse=True)[:SLOWEST_SPANS]
+    if slowest:
+        spans_table = Table(title="Slowest Spans", border_style="blue")
+        spans_table.add_column("Phase", style="cyan")
+        spans_table.add_column("Name")
+        spans_table.add_column("Start", justify="right")
+        spans_table.add_column("Duration", justify="right")
+        for item in slowest:
+            spans_table.add_row(item["phase"], item["name"], f"{item['start']:.3f}s", f"{item['duration']:.3f}s")
+        console.print(spans_table)
+    console.print("[gray]Self = time not spent in nested spans; threads overlap, so totals can exceed wall time.[/gray]")
+
+def finish(command, path=None):
+    """
+    Stops recording, writes the JSON report and prints the summary.
+    Default location: <cache dir>/profiles/<command>-<timestamp>.json.
+    """
+    global _active
+    if not _active:
+        return None
+    report = build_report(command)
+    _active = False
+    if not path:
+        # Imported here: utils itself is instrumented, so it imports this module
+        from .utils import get_cache_dir
+        path = os.path.join(get_cache_dir("profiles"), f"{command}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print_report(report)
+    console.print(f"[gray]Profile written to {path}[/gray]")
+    return path
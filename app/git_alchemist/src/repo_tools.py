@@ -1,14 +1,168 @@
+import os
+import re
 import json
-import time
 from rich.console import Console
-from .core import generate_content
+from .core import generate_content, estimate_tokens, pack_context
 from .utils import run_shell, check_gh_auth
+from .inventory import list_repos
+from .github_data import fetch_repo_details
+from .bulk import RateLimiter, run_ordered, pack_batches, parse_json_object
+from .profiler import span
+from .github_client import get_client, GitHubError
 
 console = Console()
 
-def optimize_topics(user=None, mode="fast"):
+# Defaults for bulk sweeps: worker threads, Gemini calls/min, GitHub writes/min
+DEFAULT_JOBS = int(os.getenv("ALCHEMIST_JOBS", "4"))
+DEFAULT_LLM_RPM = int(os.getenv("ALCHEMIST_LLM_RPM", "30"))
+DEFAULT_GH_RPM = int(os.getenv("ALCHEMIST_GH_RPM", "60"))
+# Input token budget per batched prompt (--batch mode)
+DEFAULT_BATCH_TOKENS = int(os.getenv("ALCHEMIST_BATCH_TOKENS", "6000"))
+BATCH_MAX_REPOS = 40
+# README context per repo, cut at paragraph boundaries
+README_TOKEN_BUDGET = int(os.getenv("ALCHEMIST_README_TOKENS", "400"))
+
+TOPIC_PATTERN = re.compile(r"^[a-z0-9][a-z0-9-]{0,49}$")
+
+def _print_progress(total):
+    """
+    Returns an on_result callback that prints each repo's buffered log in order.
+    """
+    def on_result(index, repo, result):
+        prefix = f"[dim][{index + 1}/{total}][/dim] "
+        if isinstance(result, Exception):
+            console.print(f"{prefix}[white]{repo['name']}[/white]")
+            console.print(f"  [red]Failed:[/red] {result}")
+            return
+        lines, _ = result
+        console.print(prefix + lines[0])
+        for line in lines[1:]:
+            console.print(line)
+    return on_result
+
+def _suggest_topics(username, repo, mode, llm_limiter, gh_limiter):
+    """
+    Asks Gemini for topics for one repo and applies the new ones.
+    Returns (log lines, changed).
+    """
+    name = repo['name']
+    desc = repo.get('description') or "No description provided"
+    existing = repo.get('topics') or []
+    lines = [f"[white]Analyzing {name}...[/white]"]
+
+    prompt = f"""
+Task: Suggest search-friendly GitHub topics for project "{name}".
+Description: "{desc}".
+Existing Topics: {existing}.
+Return ONLY a JSON array of strings (max 5 total topics).
+Focus on technical keywords like 'python', 'api', 'automation', 'cli'.
+Output Example: ["python", "automation"]
+"""
+    llm_limiter.acquire()
+    result = generate_content(prompt, mode=mode, quiet=True)
+    if not result:
+        lines.append("  [red]No response from Gemini.[/red]")
+        return lines, False
+
+    try:
+        clean_json = result.replace("```json", "").replace("```", "").strip()
+        with span("parse", "topics"):
+            new_tags = json.loads(clean_json)
+    except ValueError:
+        lines.append(f"  [red]Failed to parse topics for {name}[/red]")
+        return lines, False
+
+    return _apply_topics(username, repo, new_tags, gh_limiter, lines)
+
+def _apply_topics(username, repo, new_tags, gh_limiter, lines):
+    # Filter out existing
+    existing = repo.get('topics') or []
+    to_add = [t for t in new_tags if t not in existing]
+    if not to_add:
+        return lines, False
+
+    tag_str = ",".join(to_add)
+    lines.append(f"  [green]Adding tags:[/green] {tag_str}")
+    gh_limiter.acquire()
+    if not _api_edit(lines, lambda client: client.add_topics(username, repo["name"], to_add, existing=existing)):
+        run_shell(f'gh repo edit {username}/{repo["name"]} --add-topic "{tag_str}"')
+    return lines, True
+
+def _api_edit(lines, call):
+    """
+    Applies an edit over the pooled API client. False if there is no client
+    or the call failed, in which case the caller retries with gh.
+    """
+    client = get_client()
+    if not client:
+        return False
+    try:
+        call(client)
+        return True
+    except GitHubError as e:
+        lines.append(f"  [yellow]API edit failed ({e}); retrying with gh.[/yellow]")
+        return False
+
+def _valid_topics(value):
+    if not isinstance(value, list) or not value:
+        return None
+    tags = [t.strip().lower() for t in value if isinstance(t, str)]
+    if len(tags) != len(value) or not all(TOPIC_PATTERN.match(t) for t in tags):
+        return None
+    return tags[:5]
+
+def _valid_description(value):
+    if not isinstance(value, str) or not value.strip():
+        return None
+    new_desc = value.strip().replace('"', '').replace("'", "")
+    if len(new_desc) > 200: new_desc = new_desc[:197] + "..."
+    return new_desc
+
+def _batch_generate(repos, entry_for, instructions, validate, mode, jobs, llm_limiter, token_budget):
+    """
+    Packs many repos into few prompts (sized to `token_budget`) that ask for a
+    JSON object keyed by repo name. Each repo's value is checked with
+    validate(value) -> cleaned value or None. Returns {name: value} for the
+    repos that came back valid; the rest are left for individual retries.
+    """
+    entries = {r['name']: json.dumps(entry_for(r), ensure_ascii=False) for r in repos}
+    batches = pack_batches(repos, lambda r: estimate_tokens(entries[r['name']]), token_budget, BATCH_MAX_REPOS)
+    console.print(f"[cyan]Packed {len(repos)} repositories into {len(batches)} batched prompt(s).[/cyan]")
+
+    def run_batch(batch):
+        payload = "\n".join(entries[r['name']] for r in batch)
+        prompt = f"""
+{instructions}
+Return ONLY a JSON object whose keys are exactly the repository names below.
+No markdown blocks.
+
+Repositories (one JSON object per line):
+{payload}
+"""
+        llm_limiter.acquire()
+        result = generate_content(prompt, mode=mode, quiet=True)
+        data = parse_json_object(result or "")
+        valid = {}
+        for r in batch:
+            value = validate(data.get(r['name']))
+            if value is not None:
+                valid[r['name']] = value
+        return valid
+
+    results = {}
+    for batch_result in run_ordered(batches, run_batch, jobs=jobs):
+        if isinstance(batch_result, dict):
+            results.update(batch_result)
+    console.print(f"[cyan]Batched answers valid for {len(results)}/{len(repos)} repositories; retrying the rest individually.[/cyan]")
+    return results
+
+def optimize_topics(user=None, mode="fast", jobs=DEFAULT_JOBS, rpm=DEFAULT_LLM_RPM, gh_rpm=DEFAULT_GH_RPM,
+                    batch=False, batch_tokens=DEFAULT_BATCH_TOKENS):
     """
     Analyzes repositories and adds relevant topics using Gemini.
+    Repos are processed by `jobs` workers, with Gemini calls limited to `rpm`
+    and GitHub edits to `gh_rpm` requests per minute.
+    batch: ask for many repos per prompt, retrying only missing/malformed ones individually.
     """
     username = user or check_gh_auth()
     if not username:
@@ -16,96 +170,119 @@ def optimize_topics(user=None, mode="fast"):
         return
 
     console.print(f"[cyan]Optimizing topics for {username} ({mode} mode)...[/cyan]")
-    repos_raw = run_shell('gh repo list --visibility=public --limit 100 --json name,description,repositoryTopics')
-    repos = json.loads(repos_raw)
-
-    count = 0
-    for repo in repos:
-        name = repo['name']
-        desc = repo.get('description') or "No description provided"
-        
-        # Safe access to topics
-        raw_topics = repo.get('repositoryTopics')
-        if raw_topics is None:
-            existing = []
-        else:
-            existing = [t['name'] for t in raw_topics]
-        
-        if len(existing) >= 5:
-            continue
-
-        console.print(f"[white]Analyzing {name}...[/white]")
-        
-        prompt = f"""
-Task: Suggest search-friendly GitHub topics for project "{name}". 
-Description: "{desc}". 
-Existing Topics: {existing}. 
-Return ONLY a JSON array of strings (max 5 total topics). 
-Focus on technical keywords like 'python', 'api', 'automation', 'cli'.
-Output Example: ["python", "automation"]
-"""
-        result = generate_content(prompt, mode=mode)
-        if not result: continue
+    repos = list_repos(username, visibility="public")
+    targets = [r for r in repos if len(r.get('topics') or []) < 5]
 
-        try:
-            clean_json = result.replace("```json", "").replace("```", "").strip()
-            new_tags = json.loads(clean_json)
-            
-            # Filter out existing
-            to_add = [t for t in new_tags if t not in existing]
-            
-            if to_add:
-                tag_str = ",".join(to_add)
-                console.print(f"  [green]Adding tags:[/green] {tag_str}")
-                run_shell(f'gh repo edit {username}/{name} --add-topic "{tag_str}"')
-                count += 1
-                time.sleep(0.5)
-        except:
-            console.print(f"  [red]Failed to parse topics for {name}[/red]")
+    llm_limiter = RateLimiter(rpm)
+    gh_limiter = RateLimiter(gh_rpm)
+
+    batched = {}
+    if batch and targets:
+        batched = _batch_generate(
+            targets,
+            lambda r: {"name": r['name'], "description": r.get('description') or "", "existing_topics": r.get('topics') or []},
+            "Task: Suggest search-friendly GitHub topics for each project below.\n"
+            "For each repository, the value is a JSON array of lowercase topic strings (max 5 total topics including existing ones).\n"
+            "Focus on technical keywords like 'python', 'api', 'automation', 'cli'.",
+            _valid_topics, mode, jobs, llm_limiter, batch_tokens
+        )
+
+    def process(repo):
+        if repo['name'] in batched:
+            lines = [f"[white]Analyzing {repo['name']}...[/white] [dim](batched)[/dim]"]
+            return _apply_topics(username, repo, batched[repo['name']], gh_limiter, lines)
+        return _suggest_topics(username, repo, mode, llm_limiter, gh_limiter)
 
+    results = run_ordered(
+        targets,
+        process,
+        jobs=jobs,
+        on_result=_print_progress(len(targets))
+    )
+
+    count = sum(1 for r in results if not isinstance(r, Exception) and r[1])
     console.print(f"[cyan]Done! Optimized {count} repositories.[/cyan]")
 
-def generate_descriptions(user=None, mode="fast"):
+def _describe_repo(username, repo, readme, mode, llm_limiter, gh_limiter):
+    """
+    Generates and applies a description for one repo.
+    Returns (log lines, changed).
+    """
+    name = repo['name']
+    lines = [f"[white]Analyzing {name}...[/white]"]
+
+    context = _readme_context(readme)
+
+    prompt = f"""
+Task: Generate a GitHub repository description for project "{name}".
+Readme Context: "{context}".
+Constraint: Max 20 words. Start with an action verb.
+Output ONLY the description. No quotes.
+"""
+    llm_limiter.acquire()
+    new_desc = _valid_description(generate_content(prompt, mode=mode, quiet=True))
+    if not new_desc:
+        lines.append("  [red]No response from Gemini.[/red]")
+        return lines, False
+
+    return _apply_description(username, repo, new_desc, gh_limiter, lines)
+
+def _apply_description(username, repo, new_desc, gh_limiter, lines):
+    lines.append(f"  [green]New Desc:[/green] {new_desc}")
+    gh_limiter.acquire()
+    if not _api_edit(lines, lambda client: client.set_description(username, repo["name"], new_desc)):
+        run_shell(f'gh repo edit {username}/{repo["name"]} --description "{new_desc}"')
+    return lines, True
+
+def _readme_context(readme):
+    if not readme:
+        return "No readme available."
+    packed, _ = pack_context([{"name": "readme", "text": readme, "split": "paragraph"}], budget=README_TOKEN_BUDGET, quiet=True)
+    return packed["readme"]
+
+def generate_descriptions(user=None, mode="fast", jobs=DEFAULT_JOBS, rpm=DEFAULT_LLM_RPM, gh_rpm=DEFAULT_GH_RPM,
+                          batch=False, batch_tokens=DEFAULT_BATCH_TOKENS):
     """
     Generates descriptions for repositories that are missing them.
+    Runs concurrently (and optionally batched) like optimize_topics.
     """
     username = user or check_gh_auth()
     if not username: return
 
     console.print(f"[cyan]Generating descriptions for {username} ({mode} mode)...[/cyan]")
-    repos_raw = run_shell('gh repo list --visibility=public --limit 100 --json name,description')
-    repos = json.loads(repos_raw)
-
-    count = 0
-    for repo in repos:
-        name = repo['name']
-        if name == username: continue # Skip profile repo
-        if repo.get('description'): continue # Skip if already has desc
-
-        console.print(f"[white]Analyzing {name}...[/white]")
-        
-        # Fetch Readme
-        try:
-            readme = run_shell(f'gh repo view {username}/{name} --json body -q .body', check=False)
-            context = readme[:1500] if readme else "No readme available."
-        except:
-            context = "No readme available."
+    repos = list_repos(username, visibility="public")
+    # Skip the profile repo and repos that already have a description
+    targets = [r for r in repos if r['name'] != username and not r.get('description')]
 
-        prompt = f"""
-Task: Generate a GitHub repository description for project "{name}". 
-Readme Context: "{context}". 
-Constraint: Max 20 words. Start with an action verb. 
-Output ONLY the description. No quotes.
-"""
-        result = generate_content(prompt, mode=mode)
-        if not result: continue
+    llm_limiter = RateLimiter(rpm)
+    gh_limiter = RateLimiter(gh_rpm)
+
+    # One aliased GraphQL request per chunk of repos instead of a `gh repo view` each
+    details = fetch_repo_details(username, [r['name'] for r in targets]) if targets else {}
+    readmes = {name: d.get('readme') for name, d in details.items()}
+
+    batched = {}
+    if batch and targets:
+        batched = _batch_generate(
+            targets,
+            lambda r: {"name": r['name'], "readme": _readme_context(readmes.get(r['name']))},
+            "Task: Generate a GitHub repository description for each project below, based on its readme.\n"
+            "For each repository, the value is a description string: max 20 words, starting with an action verb, no quotes.",
+            _valid_description, mode, jobs, llm_limiter, batch_tokens
+        )
 
-        new_desc = result.strip().replace('"', '').replace("'", "")
-        if len(new_desc) > 200: new_desc = new_desc[:197] + "..."
+    def process(repo):
+        if repo['name'] in batched:
+            lines = [f"[white]Analyzing {repo['name']}...[/white] [dim](batched)[/dim]"]
+            return _apply_description(username, repo, batched[repo['name']], gh_limiter, lines)
+        return _describe_repo(username, repo, readmes.get(repo['name']), mode, llm_limiter, gh_limiter)
 
-        console.print(f"  [green]New Desc:[/green] {new_desc}")
-        run_shell(f'gh repo edit {username}/{name} --description "{new_desc}"')
-        count += 1
-        time.sleep(0.5)
+    results = run_ordered(
+        targets,
+        process,
+        jobs=jobs,
+        on_result=_print_progress(len(targets))
+    )
 
+    count = sum(1 for r in results if not isinstance(r, Exception) and r[1])
     console.print(f"[cyan]Done! Updated {count} descriptions.[/cyan]")
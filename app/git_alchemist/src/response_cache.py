@@ -0,0 +1,69 @@
+import os
+import time
+import hashlib
+from .sqlite_lru import LRUStore
+
+# Entries older than this are treated as misses (seconds)
+CACHE_TTL = int(os.getenv("ALCHEMIST_CACHE_TTL", str(7 * 24 * 3600)))
+# Total size of stored responses before least-recently-used entries are evicted
+CACHE_MAX_BYTES = int(os.getenv("ALCHEMIST_CACHE_MAX_MB", "50")) * 1024 * 1024
+
+_store = LRUStore("responses.db", "responses", """
+    mode TEXT NOT NULL,
+    model TEXT NOT NULL,
+    response TEXT NOT NULL
+""", CACHE_MAX_BYTES)
+
+def is_enabled():
+    """
+    The cache is on unless ALCHEMIST_NO_CACHE is set (the CLI's --no-cache sets it).
+    """
+    return not os.getenv("ALCHEMIST_NO_CACHE")
+
+def cache_key(prompt, mode, model_name):
+    digest = hashlib.sha256()
+    for part in (mode, model_name, prompt):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+def lookup(prompt, mode, models):
+    """
+    Returns (model_name, response) for the first model of the tier with a
+    fresh cached answer to this exact prompt, or None.
+    """
+    now = time.time()
+    with _store.connect() as conn:
+        for model_name in models:
+            key = cache_key(prompt, mode, model_name)
+            row = conn.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if not row:
+                continue
+            if now - row[1] > CACHE_TTL:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                continue
+            conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            _store.bump(conn, "hits")
+            return model_name, row[0]
+        _store.bump(conn, "misses")
+    return None
+
+def store(prompt, mode, model_name, response):
+    now = time.time()
+    size = len(response.encode("utf-8"))
+    with _store.connect() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO responses(key, mode, model, response, size, created, last_used) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (cache_key(prompt, mode, model_name), mode, model_name, response, size, now, now)
+        )
+        conn.execute("DELETE FROM responses WHERE created < ?", (now - CACHE_TTL,))
+        _store.evict(conn)
+
+def stats():
+    """
+    Cumulative hit/miss/eviction counters plus current size, across all runs.
+    """
+    return _store.stats()
+
+def clear():
+    _store.clear()
@@ -1,44 +1,63 @@
 import os
 from rich.console import Console
-from .core import generate_content
-from .utils import run_shell
+from .core import generate_stream, header_writer, pack_context, context_budget
+from .sage_index import build_context
+from .scanner import list_files, scan_files, DEFAULT_IGNORE_DIRS
+from .file_tree import get_file_tree
+from .profiler import timed
 
 console = Console()
 
+# Max tokens of retrieved code packed into each Sage prompt
+SAGE_TOKEN_BUDGET = int(os.getenv("ALCHEMIST_SAGE_BUDGET", "12000"))
+
+# Extensions to include
+extensions = {'.py', '.md', '.ps1', '.sh', '.js', '.ts', '.c', '.cpp', '.h', '.yml', '.yaml', '.Dockerfile'}
+# Folders to ignore
+ignore_dirs = {'__pycache__', '.git', 'venv', 'node_modules', '.tmp', 'docs'}
+
+def list_source_files(base="."):
+    """
+    Relative paths of the source files the Sage considers (respects .gitignore).
+    """
+    return list_files(base, extensions=extensions, ignore_dirs=ignore_dirs | DEFAULT_IGNORE_DIRS)
+
+def iter_codebase_context(base="."):
+    """
+    Streams one "--- FILE ---" block per source file. Binary and oversized files
+    are skipped and the stream stops at the scanner's total byte cap.
+    """
+    for path, content in scan_files(base, list_source_files(base)):
+        yield f"--- FILE: {path} ---\n{content}\n"
+
+@timed("scan")
 def get_codebase_context():
     """
     Scans the repository and aggregates source code into a single context string.
     """
-    context = []
-    # Extensions to include
-    extensions = {'.py', '.md', '.ps1', '.sh', '.js', '.ts', '.c', '.cpp', '.h', '.yml', '.yaml', '.Dockerfile'}
-    # Folders to ignore
-    ignore_dirs = {'__pycache__', '.git', 'venv', 'node_modules', '.tmp', 'docs'}
-
-    for root, dirs, files in os.walk("."):
-        # Filter directories in-place
-        dirs[:] = [d for d in dirs if d not in ignore_dirs]
-        
-        for file in files:
-            ext = os.path.splitext(file)[1]
-            if ext in extensions:
-                path = os.path.join(root, file)
-                try:
-                    with open(path, "r", encoding="utf-8") as f:
-                        content = f.read()
-                        context.append(f"--- FILE: {path} ---\n{content}\n")
-                except Exception:
-                    continue
-                    
-    return "\n".join(context)
+    return "\n".join(iter_codebase_context())
 
-def ask_sage(question, mode="fast"):
+def ask_sage(question, mode="fast", budget=SAGE_TOKEN_BUDGET, full=False):
     """
-    Queries Gemini using the aggregated codebase as context.
+    Queries Gemini using the most relevant parts of the codebase as context.
+    Retrieval uses a persistent BM25 index that is updated incrementally;
+    full=True sends the whole codebase instead (legacy behaviour).
     """
     console.print("[cyan]The Sage is meditating on your codebase...[/cyan]")
     
-    code_context = get_codebase_context()
+    # The compacted tree shows the whole project's shape next to the retrieved code
+    project_tree = get_file_tree(".")
+
+    if full:
+        packed, _ = pack_context([{"name": "code", "text": get_codebase_context(), "split": "file"}], mode=mode, overhead=project_tree)
+        code_context = packed["code"]
+    else:
+        budget = min(budget, context_budget(mode, question + project_tree))
+        code_context, stats = build_context(".", list_source_files(), question, budget)
+        console.print(
+            f"[gray]Index: {stats['indexed']} file(s) updated, {stats['removed']} removed. "
+            f"Packed {stats['chunks']} chunk(s), ~{stats['tokens']} tokens.[/gray]"
+        )
     
     if not code_context:
         console.print("[yellow]Warning: No source files found to analyze.[/yellow]")
@@ -46,9 +65,14 @@ def ask_sage(question, mode="fast"):
 
     prompt = f"""
 You are "The Sage", an expert software architect and technical lead. 
-Below is the source code context for the current project. 
+Below are the parts of the current project most relevant to the question. 
 Use this context to answer the user's question precisely and technically.
 
+PROJECT STRUCTURE:
+'''
+{project_tree}
+'''
+
 CONTEXT:
 '''
 {code_context}
@@ -63,9 +87,8 @@ Instructions:
 3. If the answer isn't in the code, say so.
 """
 
-    result = generate_content(prompt, mode=mode)
+    # Streamed so the answer starts showing as soon as the first tokens arrive
+    result = generate_stream(prompt, mode=mode, write=header_writer("\n[bold fuchsia]--- The Sage's Wisdom ---[/bold fuchsia]"))
     
     if result:
-        console.print("\n[bold fuchsia]--- The Sage's Wisdom ---[/bold fuchsia]")
-        console.print(result)
         console.print("[bold fuchsia]-----------------------[/bold fuchsia]")
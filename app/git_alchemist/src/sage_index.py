@@ -0,0 +1,222 @@
+import os
+import re
+import math
+import sqlite3
+import hashlib
+from collections import Counter
+from .core import estimate_tokens
+from .utils import get_cache_dir
+from .scanner import scan_files
+from .profiler import timed
+
+# Chunking: cut at a blank line / definition once a chunk has MIN lines, always by MAX
+CHUNK_MIN_LINES = 40
+CHUNK_MAX_LINES = 80
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    start_line INTEGER NOT NULL,
+    end_line INTEGER NOT NULL,
+    length INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chunks_path ON chunks(path);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    chunk_id INTEGER NOT NULL,
+    tf INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS postings_term ON postings(term);
+CREATE INDEX IF NOT EXISTS postings_chunk ON postings(chunk_id);
+"""
+
+STOPWORDS = {
+    "the", "and", "for", "that", "this", "with", "from", "are", "was", "not", "but", "have",
+    "how", "what", "why", "does", "where", "which", "when", "who", "can", "you", "your",
+    "self", "none", "true", "false", "return", "import", "def", "class", "if", "else", "in",
+    "is", "it", "of", "to", "a", "an", "or", "on", "be", "as", "at", "by", "do", "we",
+}
+
+_WORD = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|\d+")
+_CAMEL = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+_BOUNDARY = re.compile(r"^\s*$|^\s*(def|class|function|async|export|public|private|fn|func|#{1,6}\s)")
+
+def tokenize(text):
+    """
+    Lowercased terms, with identifiers also split into their camelCase/snake_case parts.
+    """
+    terms = []
+    for word in _WORD.findall(text):
+        lower = word.lower()
+        if len(lower) > 1 and lower not in STOPWORDS:
+            terms.append(lower)
+        parts = [p.lower() for piece in word.split("_") for p in _CAMEL.findall(piece)]
+        if len(parts) > 1:
+            terms.extend(p for p in parts if len(p) > 1 and p not in STOPWORDS)
+    return terms
+
+def chunk_lines(lines):
+    """
+    Splits a file into (start, end) line ranges (0-based, end exclusive),
+    preferring to cut at blank lines or definitions.
+    """
+    chunks, start = [], 0
+    for i, line in enumerate(lines):
+        size = i - start
+        if size >= CHUNK_MAX_LINES or (size >= CHUNK_MIN_LINES and _BOUNDARY.match(line)):
+            chunks.append((start, i))
+            start = i
+    if start < len(lines):
+        chunks.append((start, len(lines)))
+    return chunks
+
+def _index_path(root):
+    digest = hashlib.sha1(os.path.abspath(root).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(get_cache_dir("sage"), f"{digest}.db")
+
+def _connect(root):
+    conn = sqlite3.connect(_index_path(root), timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+def _read_lines(root, path):
+    with open(os.path.join(root, path), "r", encoding="utf-8") as f:
+        return f.read().splitlines()
+
+def _remove_file(conn, path):
+    conn.execute("DELETE FROM postings WHERE chunk_id IN (SELECT id FROM chunks WHERE path = ?)", (path,))
+    conn.execute("DELETE FROM chunks WHERE path = ?", (path,))
+    conn.execute("DELETE FROM files WHERE path = ?", (path,))
+
+def _add_file(conn, path, lines, mtime, size):
+    conn.execute("INSERT INTO files(path, mtime, size) VALUES (?, ?, ?)", (path, mtime, size))
+    for start, end in chunk_lines(lines):
+        # The path is indexed with the chunk so questions naming a file find it
+        terms = Counter(tokenize(path) + tokenize("\n".join(lines[start:end])))
+        if not terms:
+            continue
+        cursor = conn.execute(
+            "INSERT INTO chunks(path, start_line, end_line, length) VALUES (?, ?, ?, ?)",
+            (path, start, end, sum(terms.values()))
+        )
+        conn.executemany(
+            "INSERT INTO postings(term, chunk_id, tf) VALUES (?, ?, ?)",
+            [(term, cursor.lastrowid, tf) for term, tf in terms.items()]
+        )
+
+@timed("scan", "index update")
+def update_index(root, files):
+    """
+    Brings the on-disk index for `root` in line with `files` (relative paths):
+    only new or modified files (by mtime/size) are re-chunked, and vanished ones dropped.
+    Returns (indexed, removed) counts.
+    """
+    indexed = removed = 0
+    with _connect(root) as conn:
+        known = {path: (mtime, size) for path, mtime, size in conn.execute("SELECT path, mtime, size FROM files")}
+        seen, changed = set(), {}
+        for path in files:
+            seen.add(path)
+            try:
+                st = os.stat(os.path.join(root, path))
+            except OSError:
+                continue
+            if known.get(path) != (st.st_mtime, st.st_size):
+                changed[path] = st
+        # Changed files are read concurrently; binary/oversized ones are skipped by the scanner
+        for path, text in scan_files(root, changed, max_total_bytes=None):
+            st = changed[path]
+            _remove_file(conn, path)
+            _add_file(conn, path, text.splitlines(), st.st_mtime, st.st_size)
+            indexed += 1
+            del changed[path]
+        # Files that became binary/oversized drop out of the index
+        for path in changed:
+            seen.discard(path)
+        for path in set(known) - seen:
+            _remove_file(conn, path)
+            removed += 1
+    return indexed, removed
+
+@timed("index", "search")
+def search(root, query, limit=200):
+    """
+    BM25-ranks indexed chunks against `query`.
+    Returns [(score, path, start_line, end_line)], best first.
+    """
+    terms = set(tokenize(query))
+    if not terms:
+        return []
+    with _connect(root) as conn:
+        total, avg_len = conn.execute("SELECT COUNT(*), AVG(length) FROM chunks").fetchone()
+        if not total:
+            return []
+        scores = Counter()
+        for term in terms:
+            rows = conn.execute(
+                "SELECT p.chunk_id, p.tf, c.length FROM postings p JOIN chunks c ON c.id = p.chunk_id WHERE p.term = ?",
+                (term,)
+            ).fetchall()
+            if not rows:
+                continue
+            idf = math.log(1 + (total - len(rows) + 0.5) / (len(rows) + 0.5))
+            for chunk_id, tf, length in rows:
+                norm = tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avg_len))
+                scores[chunk_id] += idf * norm
+        if not scores:
+            return []
+        top = scores.most_common(limit)
+        placeholders = ",".join("?" * len(top))
+        meta = {row[0]: row[1:] for row in conn.execute(
+            f"SELECT id, path, start_line, end_line FROM chunks WHERE id IN ({placeholders})",
+            [chunk_id for chunk_id, _ in top]
+        )}
+    return [(score, *meta[chunk_id]) for chunk_id, score in top if chunk_id in meta]
+
+def _fallback_chunks(root):
+    """
+    Chunks to show when the question matches nothing: READMEs first, then files in path order.
+    """
+    with _connect(root) as conn:
+        rows = conn.execute("SELECT path, start_line, end_line FROM chunks ORDER BY path, start_line").fetchall()
+    rows.sort(key=lambda r: (0 if os.path.basename(r[0]).lower().startswith("readme") else 1, r[0], r[1]))
+    return [(0.0, *row) for row in rows]
+
+def build_context(root, files, question, token_budget):
+    """
+    Updates the index, then packs the best-ranked chunks for `question` into
+    at most `token_budget` tokens. Returns (context, stats).
+    """
+    indexed, removed = update_index(root, files)
+    ranked = search(root, question) or _fallback_chunks(root)
+
+    parts, used, files_cache = [], 0, {}
+    for score, path, start, end in ranked:
+        if path not in files_cache:
+            try:
+                files_cache[path] = _read_lines(root, path)
+            except (OSError, UnicodeDecodeError):
+                files_cache[path] = None
+        lines = files_cache[path]
+        if lines is None:
+            continue
+        block = f"--- FILE: {path} (lines {start + 1}-{end}) ---\n" + "\n".join(lines[start:end]) + "\n"
+        cost = estimate_tokens(block)
+        if used + cost > token_budget:
+            continue
+        parts.append(block)
+        used += cost
+
+    stats = {"indexed": indexed, "removed": removed, "chunks": len(parts), "tokens": used}
+    return "\n".join(parts), stats
@@ -0,0 +1,138 @@
+import os
+import fnmatch
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from .profiler import timed
+
+# Files larger than this are skipped (generated bundles, vendored blobs, data dumps)
+MAX_FILE_BYTES = int(os.getenv("ALCHEMIST_SCAN_MAX_FILE_KB", "256")) * 1024
+# Hard cap on the total bytes a single scan yields
+MAX_TOTAL_BYTES = int(os.getenv("ALCHEMIST_SCAN_MAX_TOTAL_MB", "8")) * 1024 * 1024
+SCAN_WORKERS = int(os.getenv("ALCHEMIST_SCAN_WORKERS", "8"))
+
+# Always skipped in the non-git fallback walk
+DEFAULT_IGNORE_DIRS = {'.git', '__pycache__', 'node_modules', 'venv', '.venv', 'dist', 'build', '.tmp'}
+
+BINARY_SNIFF_BYTES = 8192
+
+def _git_ls_files(root):
+    """
+    Tracked + untracked-but-not-ignored files, relative to `root`. None outside a git repo.
+    """
+    try:
+        result = subprocess.run(
+            ["git", "ls-files", "-z", "--cached", "--others", "--exclude-standard"],
+            cwd=root, capture_output=True, timeout=30
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if result.returncode != 0:
+        return None
+    return [p for p in result.stdout.decode("utf-8", errors="replace").split("\0") if p]
+
+def _read_gitignore(directory):
+    try:
+        with open(os.path.join(directory, ".gitignore"), "r", encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    except OSError:
+        return []
+
+def _ignored(rel_path, name, patterns):
+    for pattern in patterns:
+        if pattern.startswith("!"):
+            continue
+        pat = pattern.rstrip("/")
+        if pat.startswith("/"):
+            if fnmatch.fnmatch(rel_path, pat[1:]):
+                return True
+        elif fnmatch.fnmatch(name, pat) or fnmatch.fnmatch(rel_path, pat):
+            return True
+    return False
+
+def _walk_files(root, ignore_dirs):
+    """
+    os.walk fallback for non-git folders, honouring (a simplified subset of) .gitignore files.
+    """
+    files = []
+    stack = [("", [])]
+    while stack:
+        rel_dir, inherited = stack.pop()
+        abs_dir = os.path.join(root, rel_dir)
+        patterns = inherited + _read_gitignore(abs_dir)
+        try:
+            entries = sorted(os.scandir(abs_dir), key=lambda e: e.name)
+        except OSError:
+            continue
+        for entry in entries:
+            rel_path = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+            if _ignored(rel_path, entry.name, patterns):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name not in ignore_dirs:
+                    stack.append((rel_path, patterns))
+            elif entry.is_file(follow_symlinks=False):
+                files.append(rel_path)
+    return files
+
+@timed("scan")
+def list_files(root=".", extensions=None, ignore_dirs=DEFAULT_IGNORE_DIRS):
+    """
+    Relative paths of the files under `root` that git would consider part of
+    the project (respects .gitignore), optionally filtered by extension.
+    """
+    files = _git_ls_files(root)
+    if files is None:
+        files = _walk_files(root, ignore_dirs)
+    files = [f for f in files if not any(part in ignore_dirs for part in f.split("/")[:-1])]
+    if extensions:
+        files = [f for f in files if os.path.splitext(f)[1] in extensions]
+    return sorted(files)
+
+def _read_text(root, path, max_file_bytes):
+    """
+    Returns the file's text, or None for binary, oversized, unreadable or non-UTF-8 files.
+    """
+    full_path = os.path.join(root, path)
+    try:
+        if os.path.getsize(full_path) > max_file_bytes:
+            return None
+        with open(full_path, "rb") as f:
+            data = f.read(max_file_bytes + 1)
+    except OSError:
+        return None
+    if len(data) > max_file_bytes or b"\0" in data[:BINARY_SNIFF_BYTES]:
+        return None
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        return None
+
+def scan_files(root, paths, max_file_bytes=MAX_FILE_BYTES, max_total_bytes=MAX_TOTAL_BYTES, workers=SCAN_WORKERS):
+    """
+    Yields (path, text) for readable text files, in `paths` order.
+    Files are read concurrently, but at most ~2x`workers` are held in memory
+    at once, and the scan stops once `max_total_bytes` have been yielded
+    (None for no total cap).
+    """
+    paths = list(paths)
+    total = 0
+    window = max(1, workers) * 2
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        pending = []
+        next_index = 0
+        while next_index < len(paths) or pending:
+            while next_index < len(paths) and len(pending) < window:
+                path = paths[next_index]
+                pending.append((path, pool.submit(_read_text, root, path, max_file_bytes)))
+                next_index += 1
+            path, future = pending.pop(0)
+            text = future.result()
+            if text is None:
+                continue
+            size = len(text.encode("utf-8"))
+            if max_total_bytes is not None and total + size > max_total_bytes:
+                for _, other in pending:
+                    other.cancel()
+                return
+            total += size
+            yield path, text
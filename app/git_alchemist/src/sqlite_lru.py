@@ -0,0 +1,83 @@
+import os
+import sqlite3
+# Module import, not `from .utils import`: utils imports github_client, which imports http_cache, which imports this
+from . import utils
+
+class LRUStore:
+    """
+    One SQLite table of size-bounded cache entries, plus persistent hit/miss/eviction
+    counters, shared by the on-disk caches (Gemini responses, GitHub HTTP).
+
+    The table always has key, size, created and last_used columns; `columns` adds
+    the cache's own (SQL column definitions). Least-recently-used entries are
+    evicted once their total size exceeds `max_bytes`.
+    """
+
+    def __init__(self, filename, table, columns, max_bytes):
+        self.filename = filename
+        self.table = table
+        self.max_bytes = max_bytes
+        self.schema = f"""
+CREATE TABLE IF NOT EXISTS {table} (
+    key TEXT PRIMARY KEY,
+    {columns.strip()},
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS {table}_last_used ON {table}(last_used);
+CREATE TABLE IF NOT EXISTS stats (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+    def connect(self):
+        conn = sqlite3.connect(os.path.join(utils.get_cache_dir(), self.filename), timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(self.schema)
+        return conn
+
+    def bump(self, conn, name, amount=1):
+        conn.execute(
+            "INSERT INTO stats(name, value) VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = value + ?",
+            (name, amount, amount)
+        )
+
+    def evict(self, conn):
+        total = conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.table}").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Trim to 90% of the budget so we don't evict on every single store
+        target = int(self.max_bytes * 0.9)
+        evicted = 0
+        for key, size in conn.execute(f"SELECT key, size FROM {self.table} ORDER BY last_used ASC").fetchall():
+            if total <= target:
+                break
+            conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        self.bump(conn, "evictions", evicted)
+
+    def stats(self):
+        """
+        Cumulative hit/miss/eviction counters plus current size, across all runs.
+        """
+        with self.connect() as conn:
+            counters = dict(conn.execute("SELECT name, value FROM stats").fetchall())
+            entries, size = conn.execute(f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}").fetchone()
+        hits = counters.get("hits", 0)
+        misses = counters.get("misses", 0)
+        return {
+            "hits": hits,
+            "misses": misses,
+            "evictions": counters.get("evictions", 0),
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def clear(self):
+        with self.connect() as conn:
+            conn.execute(f"DELETE FROM {self.table}")
+            conn.execute("DELETE FROM stats")
@@ -1,7 +1,16 @@
+import os
 import subprocess
 import json
 import shutil
+from contextlib import contextmanager
 from rich.console import Console
+from .profiler import span
+from .github_client import get_client, GitHubError
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
 
 console = Console()
 
@@ -10,13 +19,14 @@ def run_shell(command, check=True, capture_output=True):
     Runs a shell command and returns the result.
     """
     try:
-        result = subprocess.run(
-            command,
-            shell=True,
-            check=check,
-            capture_output=capture_output,
-            text=True
-        )
+        with span("shell", command):
+            result = subprocess.run(
+                command,
+                shell=True,
+                check=check,
+                capture_output=capture_output,
+                text=True
+            )
         return result.stdout.strip()
     except subprocess.CalledProcessError as e:
         if check:
@@ -27,21 +37,60 @@ def run_shell(command, check=True, capture_output=True):
 
 def check_gh_auth():
     """
-    Checks if the user is authenticated with GitHub CLI.
+    Checks if the user is authenticated with GitHub (API token or gh CLI).
     Returns the username if authenticated, else None.
     """
+    client = get_client()
+    if client:
+        try:
+            with span("auth", "github viewer"):
+                return client.viewer()["login"]
+        except GitHubError:
+            pass
     try:
-        user_login = run_shell('gh api user -q ".login"')
+        with span("auth", "gh auth check"):
+            user_login = run_shell('gh api user -q ".login"')
         return user_login
     except:
         return None
 
 def get_user_email():
     """
-    Gets the user email from GitHub CLI.
+    Gets the user email from GitHub (API token or gh CLI).
     """
+    client = get_client()
+    if client:
+        try:
+            return client.viewer().get("email") or None
+        except GitHubError:
+            pass
     try:
         email = run_shell('gh api user -q ".email"', check=False)
         return email if email else None
     except:
         return None
+
+def get_cache_dir(*parts):
+    """
+    Returns (and creates) Git-Alchemist's local cache directory.
+    Override with ALCHEMIST_CACHE_DIR (the Docker image keeps it in the workspace volume).
+    """
+    base = os.getenv("ALCHEMIST_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "git_alchemist")
+    path = os.path.join(base, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+@contextmanager
+def file_lock(path):
+    """
+    Exclusive advisory lock on `path`, shared by every Git-Alchemist process
+    (CLI runs, pooled workers, the server). No-op where fcntl is unavailable.
+    """
+    with open(path, "w") as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -0,0 +1,223 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+
+from app.workspace import WORKSPACE_ROOT
+from app.log_buffer import LogBuffer
+
+# Max jobs running at once across all tools
+JOB_CONCURRENCY = int(os.getenv("ALCHEMIST_JOB_CONCURRENCY", "2"))
+# Per-tool caps ("tool=n,tool=n"); tools not listed are only bound by the global cap
+TOOL_CONCURRENCY = os.getenv("ALCHEMIST_TOOL_CONCURRENCY", "gen-topics=1,gen-desc=1,gen-profile=1")
+# Finished jobs kept in the persisted history
+JOB_HISTORY = int(os.getenv("ALCHEMIST_JOB_HISTORY", "200"))
+
+JOBS_FILE = os.getenv("ALCHEMIST_JOBS_FILE", os.path.join(WORKSPACE_ROOT, ".jobs.json"))
+# One output log per job (memory tail + spill file)
+JOB_LOG_DIR = os.getenv("ALCHEMIST_JOB_LOG_DIR", os.path.join(WORKSPACE_ROOT, ".logs"))
+
+ACTIVE_STATES = {"queued", "running"}
+
+
+def parse_tool_limits(spec):
+    """Parses "tool=n,tool=n" into {tool: n}, ignoring malformed entries."""
+    limits = {}
+    for entry in spec.split(","):
+        tool, _, value = entry.partition("=")
+        if tool.strip() and value.strip().isdigit():
+            limits[tool.strip()] = max(1, int(value))
+    return limits
+
+
+class Job:
+    """One tool run: its parameters, lifecycle state and captured output."""
+
+    def __init__(self, tool, params, job_id=None, status="queued", created_at=None,
+                 started_at=None, finished_at=None, returncode=None, error=None):
+        self.id = job_id or uuid.uuid4().hex[:12]
+        self.tool = tool
+        self.params = params
+        self.status = status
+        self.created_at = created_at or time.time()
+        self.started_at = started_at
+        self.finished_at = finished_at
+        self.returncode = returncode
+        self.error = error
+        log_path = os.path.join(JOB_LOG_DIR, f"{self.id}.log")
+        self.log = LogBuffer.reopen(log_path) if self.done else LogBuffer(log_path)
+        self.task = None
+
+    @property
+    def done(self):
+        return self.status not in ACTIVE_STATES
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "tool": self.tool,
+            "params": self.params,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "returncode": self.returncode,
+            "error": self.error,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data["tool"], data.get("params") or {}, job_id=data["id"], status=data["status"],
+            created_at=data.get("created_at"), started_at=data.get("started_at"),
+            finished_at=data.get("finished_at"), returncode=data.get("returncode"), error=data.get("error")
+        )
+
+    # ---------- output ----------
+
+    def emit(self, text):
+        self.log.append(text)
+
+    async def stream(self, offset=0):
+        """Yields (text, next_offset) from `offset`: the backlog, then live output until the job ends."""
+        async for item in self.log.subscribe(offset):
+            yield item
+
+
+class JobManager:
+    """
+    Runs tool jobs in the background, detached from any client connection.
+
+    - Jobs wait for a global slot and a per-tool slot before starting.
+    - Job metadata is persisted to JOBS_FILE on every state change; on startup,
+      queued jobs are resumed and jobs that were running are marked "interrupted".
+    - Clients attach to a job's output stream (with replay) and may detach at any time.
+    """
+
+    def __init__(self, executor, path=JOBS_FILE, concurrency=JOB_CONCURRENCY, tool_limits=None):
+        # executor(job) -> exit code; runs the job, writing output through job.emit
+        self.executor = executor
+        self.path = path
+        self.jobs = {}
+        self._global = asyncio.Semaphore(max(1, concurrency))
+        self._tool_limits = tool_limits if tool_limits is not None else parse_tool_limits(TOOL_CONCURRENCY)
+        self._tool_slots = {}
+        self._stopping = False
+
+    # ---------- persistence ----------
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return [Job.from_dict(item) for item in json.load(f)]
+        except (OSError, ValueError, KeyError):
+            return []
+
+    def _save(self):
+        finished = sorted((j for j in self.jobs.values() if j.done), key=lambda j: j.created_at)
+        for job in finished[:-JOB_HISTORY] if len(finished) > JOB_HISTORY else []:
+            del self.jobs[job.id]
+            try:
+                os.remove(job.log.path)
+            except OSError:
+                pass
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump([j.to_dict() for j in self.jobs.values()], f)
+        os.replace(tmp_path, self.path)
+
+    async def start(self):
+        """Restores persisted jobs: resumes queued ones, marks interrupted ones."""
+        for job in self._load():
+            self.jobs[job.id] = job
+            if job.status == "running":
+                job.emit("\n[SYSTEM] Interrupted by a server restart.\n")
+                job.status = "interrupted"
+                job.finished_at = job.finished_at or time.time()
+                job.log.close()
+        self._save()
+        for job in sorted(self.jobs.values(), key=lambda j: j.created_at):
+            if job.status == "queued":
+                job.task = asyncio.create_task(self._run(job))
+
+    async def stop(self):
+        self._stopping = True
+        for job in self.jobs.values():
+            if job.task and not job.task.done():
+                job.task.cancel()
+        tasks = [j.task for j in self.jobs.values() if j.task]
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    # ---------- scheduling ----------
+
+    def _tool_slot(self, tool):
+        if tool not in self._tool_slots:
+            limit = self._tool_limits.get(tool)
+            self._tool_slots[tool] = asyncio.Semaphore(limit) if limit else None
+        return self._tool_slots[tool]
+
+    def _finish(self, job, status, returncode=None, error=None):
+        job.status = status
+        job.returncode = returncode
+        job.error = error
+        job.finished_at = time.time()
+        job.log.close()
+        self._save()
+
+    async def _run(self, job):
+        tool_slot = self._tool_slot(job.tool)
+        try:
+            if tool_slot:
+                await tool_slot.acquire()
+            try:
+                async with self._global:
+                    job.status = "running"
+                    job.started_at = time.time()
+                    self._save()
+                    returncode = await self.executor(job)
+                    self._finish(job, "succeeded" if returncode == 0 else "failed", returncode=returncode)
+            finally:
+                if tool_slot:
+                    tool_slot.release()
+        except asyncio.CancelledError:
+            if not self._stopping:
+                job.emit("\n[SYSTEM] Job cancelled.\n")
+                self._finish(job, "cancelled")
+            elif job.status == "running":
+                # Server shutdown: queued jobs stay queued and resume on the next start
+                job.emit("\n[SYSTEM] Interrupted by server shutdown.\n")
+                self._finish(job, "interrupted")
+        except Exception as e:
+            job.emit(f"\n[ERROR] {str(e)}\n")
+            self._finish(job, "failed", error=str(e))
+
+    # ---------- public API ----------
+
+    def submit(self, tool, params):
+        job = Job(tool, params)
+        self.jobs[job.id] = job
+        self._save()
+        job.task = asyncio.create_task(self._run(job))
+        return job
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def list(self):
+        return sorted(self.jobs.values(), key=lambda j: j.created_at, reverse=True)
+
+    async def cancel(self, job_id):
+        """Cancels a queued or running job. Returns False if it already finished."""
+        job = self.jobs.get(job_id)
+        if not job or job.done:
+            return False
+        if job.task and not job.task.done():
+            job.task.cancel()
+            await asyncio.gather(job.task, return_exceptions=True)
+        if not job.done:
+            # Cancelled before its task ever ran
+            job.emit("[SYSTEM] Job cancelled.\n")
+            self._finish(job, "cancelled")
+        return True
@@ -0,0 +1,131 @@
+import os
+import codecs
+import asyncio
+from collections import deque
+
+# Output kept in memory per log; older output is spilled to the log file
+LOG_MEMORY_KB = int(os.getenv("ALCHEMIST_LOG_MEMORY_KB", "256"))
+# Largest piece handed to a subscriber at once (bounds catch-up reads from disk)
+READ_CHUNK = 64 * 1024
+
+
+class LogBuffer:
+    """
+    Append-only output log for one producer and any number of subscribers.
+
+    - The most recent output (up to `memory_limit` bytes) is kept in memory;
+      older chunks are spilled to `path`, and everything is flushed on close().
+    - Positions are byte offsets into the whole log, so a client can resume
+      from the last offset it saw.
+    - Subscribers are cursors, not queues: append() never waits on anyone and
+      a slow subscriber just falls behind (reading from disk if it has to),
+      without affecting the producer or other subscribers.
+    """
+
+    def __init__(self, path, memory_limit=LOG_MEMORY_KB * 1024):
+        self.path = path
+        self.memory_limit = memory_limit
+        self._memory = deque()
+        self._memory_bytes = 0
+        # Bytes [0, spilled) are on disk, [spilled, end) in memory
+        self.spilled = self._disk_size()
+        self.end = self.spilled
+        self.closed = False
+        self._changed = asyncio.Event()
+
+    @classmethod
+    def reopen(cls, path):
+        """A closed buffer over a log file written earlier (e.g. before a restart)."""
+        buffer = cls(path)
+        buffer.closed = True
+        return buffer
+
+    def _disk_size(self):
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    # ---------- producer ----------
+
+    def append(self, text):
+        if self.closed or not text:
+            return
+        data = text.encode("utf-8")
+        self._memory.append(data)
+        self._memory_bytes += len(data)
+        self.end += len(data)
+        if self._memory_bytes > self.memory_limit:
+            self._spill(self._memory_bytes - self.memory_limit)
+        self._notify()
+
+    def close(self):
+        """Marks the log complete and flushes the in-memory tail to disk."""
+        if self.closed:
+            return
+        self._spill(self._memory_bytes)
+        self.closed = True
+        self._notify()
+
+    def _spill(self, at_least):
+        chunks, size = [], 0
+        while self._memory and size < at_least:
+            chunk = self._memory.popleft()
+            chunks.append(chunk)
+            size += len(chunk)
+        if not chunks:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "ab") as f:
+            f.write(b"".join(chunks))
+        self._memory_bytes -= size
+        self.spilled += size
+
+    def _notify(self):
+        # Wake everyone waiting on the current event, then arm a fresh one
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    # ---------- consumers ----------
+
+    def read(self, offset, limit=READ_CHUNK):
+        """Returns up to `limit` bytes starting at `offset` (b"" when caught up)."""
+        offset = max(0, offset)
+        if offset >= self.end:
+            return b""
+        if offset < self.spilled:
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                return f.read(min(limit, self.spilled - offset))
+        parts, position, size = [], self.spilled, 0
+        for chunk in self._memory:
+            chunk_end = position + len(chunk)
+            if chunk_end > offset:
+                piece = chunk[max(0, offset - position):]
+                parts.append(piece)
+                size += len(piece)
+                if size >= limit:
+                    break
+            position = chunk_end
+        return b"".join(parts)[:limit]
+
+    async def subscribe(self, offset=0):
+        """
+        Yields (text, next_offset) from `offset` onwards: first the backlog,
+        then live output until the log is closed.
+        """
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        while True:
+            data = self.read(offset)
+            if data:
+                offset += len(data)
+                text = decoder.decode(data)
+                if text:
+                    yield text, offset
+                continue
+            if self.closed:
+                break
+            await self._changed.wait()
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail, offset
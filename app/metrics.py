@@ -0,0 +1,233 @@
+import os
+import json
+import math
+import asyncio
+import threading
+
+# Default latency buckets (seconds): sub-second API calls up to multi-minute bulk runs
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+LOOP_LAG_INTERVAL = 0.5
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + (list(extra) if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key, value):
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["counts"][i] += 1
+                    break
+            state["sum"] += value
+            state["count"] += 1
+
+    def _render_sample(self, key, state):
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets, state["counts"]):
+            cumulative += count
+            labels = _format_labels(self.label_names, key, [("le", _format_value(bound))])
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.label_names, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(state['sum'])}")
+        lines.append(f"{self.name}_count{labels} {state['count']}")
+        return lines
+
+
+REGISTRY = []
+
+
+def render():
+    """All registered metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ==========================================
+#  Server metrics
+# ==========================================
+
+RUNS = Counter("alchemist_runs_total", "Finished tool runs by tool and exit code", ("tool", "exit_code"))
+RUN_DURATION = Histogram("alchemist_run_duration_seconds", "Tool run wall time", ("tool",))
+RUN_FIRST_OUTPUT = Histogram("alchemist_run_first_output_seconds", "Time from run start to its first output", ("tool",))
+ACTIVE_RUNS = Gauge("alchemist_active_runs", "Tool runs currently executing", ("tool",))
+JOBS = Gauge("alchemist_jobs", "Known jobs by status", ("status",))
+WEBSOCKETS = Gauge("alchemist_websocket_connections", "Open websocket connections")
+CLONE_DURATION = Histogram("alchemist_workspace_prepare_seconds", "Workspace clone/refresh time", ("operation",))
+LOOP_LAG = Histogram("alchemist_event_loop_lag_seconds", "Event loop scheduling delay", buckets=LOOP_LAG_BUCKETS)
+
+# ==========================================
+#  Gemini metrics (aggregated from every process's event log)
+# ==========================================
+
+LLM_LATENCY = Histogram("alchemist_llm_request_duration_seconds", "Gemini request latency", ("model",))
+LLM_TTFT = Histogram("alchemist_llm_time_to_first_token_seconds", "Streaming time to first token", ("model",))
+LLM_REQUESTS = Counter("alchemist_llm_requests_total", "Gemini attempts by model and outcome", ("model", "outcome"))
+LLM_FALLBACKS = Counter("alchemist_llm_fallbacks_total", "Answers that came from a fallback model", ("mode", "model"))
+LLM_CACHE_HITS = Counter("alchemist_llm_cache_hits_total", "Answers served from the response cache", ("mode",))
+
+
+class EventLogTail:
+    """
+    Follows the JSON-lines event log that Git-Alchemist processes append to
+    (see core._record_event) and folds new events into the Gemini metrics.
+    Starts at the end of the log, so a restart doesn't replay old events. The
+    file is tracked by inode: after a rotation the rest of the rotated file
+    (`path`.1) is read before starting on the new one.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            st = os.stat(path)
+            self.inode, self.offset = st.st_ino, st.st_size
+        except OSError:
+            self.inode, self.offset = None, 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _read_lines(f, offset):
+        """Complete lines from `offset` on; a partial last line is left for next time."""
+        f.seek(offset)
+        data = f.read()
+        return data[:data.rfind(b"\n") + 1]
+
+    def collect(self):
+        with self._lock:
+            try:
+                f = open(self.path, "rb")
+            except OSError:
+                return
+            with f:
+                inode = os.fstat(f.fileno()).st_ino
+                complete = b""
+                if inode != self.inode:
+                    if self.inode is not None:
+                        try:
+                            with open(self.path + ".1", "rb") as rotated:
+                                if os.fstat(rotated.fileno()).st_ino == self.inode:
+                                    complete = self._read_lines(rotated, self.offset)
+                        except OSError:
+                            pass
+                    self.inode, self.offset = inode, 0
+                elif os.fstat(f.fileno()).st_size < self.offset:
+                    # Truncated in place
+                    self.offset = 0
+                new = self._read_lines(f, self.offset)
+                self.offset += len(new)
+                complete += new
+        for line in complete.splitlines():
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            self._apply(event)
+
+    def _apply(self, event):
+        kind = event.get("event")
+        model = event.get("model", "")
+        if kind == "success":
+            LLM_REQUESTS.inc(model=model, outcome="success")
+            if event.get("latency") is not None:
+                LLM_LATENCY.observe(event["latency"], model=model)
+            if event.get("ttft") is not None:
+                LLM_TTFT.observe(event["ttft"], model=model)
+            if event.get("fallback"):
+                LLM_FALLBACKS.inc(mode=event.get("mode", ""), model=model)
+        elif kind in ("rate_limited", "error"):
+            LLM_REQUESTS.inc(model=model, outcome=kind)
+        elif kind == "cache_hit":
+            LLM_CACHE_HITS.inc(mode=event.get("mode", ""))
+
+
+async def watch_event_loop_lag(interval=LOOP_LAG_INTERVAL):
+    """Measures how late the loop wakes from a fixed sleep (blocked-loop detector)."""
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        LOOP_LAG.observe(max(0.0, loop.time() - started - interval))
@@ -1,12 +1,18 @@
 import os
-import subprocess
+import time
 import asyncio
 import json
 import shutil
 from fastapi import FastAPI, Request, WebSocket, Form, WebSocketDisconnect
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
+from app.worker_pool import start_pool, stop_pool, start_run
+from app.git_alchemist.src.inventory import list_repos
+from app.workspace import WorkspaceManager
+from app.jobs import JobManager
+from app import metrics
+from app.git_alchemist.src.core import event_log_path
 
 app = FastAPI()
 
@@ -22,6 +28,22 @@ APP_STATE = {
     "GEMINI_API_KEY": os.getenv("GEMINI_API_KEY", "")
 }
 
+workspaces = WorkspaceManager()
+# Gemini call events appended by every CLI process, folded into /metrics on scrape
+llm_events = metrics.EventLogTail(event_log_path())
+
+@app.on_event("startup")
+async def on_startup():
+    await start_pool()
+    await jobs.start()
+    APP_STATE["loop_lag_task"] = asyncio.create_task(metrics.watch_event_loop_lag())
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    APP_STATE.pop("loop_lag_task").cancel()
+    await jobs.stop()
+    await stop_pool()
+
 @app.get("/", response_class=HTMLResponse)
 async def read_root(request: Request):
     return templates.TemplateResponse("index.html", {
@@ -43,8 +65,11 @@ async def save_settings(
         os.environ["GH_TOKEN"] = token_clean
         try:
             # Re-auth GH CLI
-            process = subprocess.Popen(["gh", "auth", "login", "--with-token"], stdin=subprocess.PIPE, text=True)
-            process.communicate(input=token_clean)
+            process = await asyncio.create_subprocess_exec(
+                "gh", "auth", "login", "--with-token",
+                stdin=asyncio.subprocess.PIPE
+            )
+            await process.communicate(input=token_clean.encode())
             msg.append("GitHub Token Saved.")
         except Exception as e:
             msg.append("GH Auth Error: " + str(e))
@@ -62,117 +87,211 @@ async def get_repos():
     if not APP_STATE["GH_TOKEN"]:
         return JSONResponse([])
     try:
-        env = os.environ.copy()
-        env["GH_TOKEN"] = APP_STATE["GH_TOKEN"]
-        cmd = ["gh", "repo", "list", "--limit", "100", "--json", "nameWithOwner,updatedAt"]
-        result = subprocess.run(cmd, capture_output=True, text=True, env=env)
-        if result.returncode != 0:
-            return JSONResponse([])
-        repos = json.loads(result.stdout)
-        repos.sort(key=lambda x: x.get('updatedAt', ''), reverse=True)
+        # Served from the shared local inventory; only changed repos are refetched
+        repos = await asyncio.to_thread(list_repos)
         return JSONResponse([r["nameWithOwner"] for r in repos])
     except Exception:
         return JSONResponse([])
 
+@app.get("/metrics")
+async def get_metrics():
+    await asyncio.to_thread(llm_events.collect)
+    metrics.JOBS.clear()
+    for job in jobs.list():
+        metrics.JOBS.inc(status=job.status)
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/workspaces")
+async def get_workspaces():
+    return JSONResponse(workspaces.snapshot())
+
+# Mapping tool names to Git-Alchemist CLI arguments
+TOOL_MAP = {
+    "gen-desc": ["describe"],
+    "gen-topics": ["topics"],
+    "gen-issue": ["issue"],
+    "gen-profile": ["profile"],
+    "arch-init": ["scaffold"],
+    "arch-fix": ["fix"],
+    "arch-explain": ["explain"],
+    "repo-audit": ["audit"],
+    "repo-sage": ["sage"],
+    "repo-commit": ["commit"]
+}
+
+def build_command(tool_name, params):
+    """CLI arguments for a tool run from the UI's parameters."""
+    user_input = (params.get("input") or "").strip()
+    user_file = params.get("file") or ""
+    target_repo = (params.get("repo") or "").strip()
+
+    cmd = []
+    if params.get("smart"):
+        cmd.append("--smart")
+
+    cmd.extend(TOOL_MAP[tool_name])
+
+    # Add tool-specific positional/optional args
+    if tool_name == "gen-issue":
+        cmd.append(user_input)
+    elif tool_name == "arch-init":
+        cmd.append(user_input)
+    elif tool_name == "arch-fix":
+        cmd.append(user_file)
+        cmd.append(user_input)
+    elif tool_name == "arch-explain":
+        cmd.append(user_input)
+    elif tool_name == "repo-sage":
+        cmd.append(user_input)
+    elif tool_name == "repo-audit":
+        if target_repo:
+            repo_name = target_repo.split("/")[-1].replace(".git", "")
+            cmd.extend(["--repo", repo_name])
+    return cmd
+
+async def execute_job(job):
+    """Runs one job to completion, writing its output to job.emit. Returns the exit code."""
+    target_repo = (job.params.get("repo") or "").strip()
+
+    env = os.environ.copy()
+    env["GEMINI_API_KEY"] = APP_STATE["GEMINI_API_KEY"]
+    env["GH_TOKEN"] = APP_STATE["GH_TOKEN"]
+    env["PYTHONPATH"] = os.getcwd() # Ensure imports work
+    env["PYTHONUNBUFFERED"] = "1" # Unbuffered, so partial output reaches the websocket immediately
+
+    cmd = build_command(job.tool, job.params)
+
+    async def log(text):
+        job.emit(text)
+
+    run = None
+    working_dir = None
+    try:
+        if target_repo:
+            job.emit(f"[SYSTEM] Context: {target_repo}\n")
+            repo_slug = target_repo.replace("https://github.com/", "").replace(".git", "")
+            working_dir = await workspaces.acquire(repo_slug, env, log=log)
+
+        job.emit(f"[SYSTEM] Running Git-Alchemist {job.tool}...\n")
+
+        started = time.perf_counter()
+        first_output = False
+        run = await start_run(cmd, env, working_dir)
+        # Only once the run exists, so the finally below always balances it
+        metrics.ACTIVE_RUNS.inc(tool=job.tool)
+
+        # Forward output as it arrives (partial lines included) without blocking
+        # the event loop, so streamed answers show up token by token
+        async for chunk in run.output():
+            if not first_output:
+                first_output = True
+                metrics.RUN_FIRST_OUTPUT.observe(time.perf_counter() - started, tool=job.tool)
+            job.emit(chunk)
+
+        elapsed = time.perf_counter() - started
+        metrics.RUNS.inc(tool=job.tool, exit_code=run.returncode)
+        metrics.RUN_DURATION.observe(elapsed, tool=job.tool)
+        job.emit(f"\n[SYSTEM] Finished (Exit Code: {run.returncode})")
+        return run.returncode
+    finally:
+        if run:
+            metrics.ACTIVE_RUNS.dec(tool=job.tool)
+        if run and run.returncode is None:
+            metrics.RUNS.inc(tool=job.tool, exit_code="cancelled")
+            await run.terminate()
+        if working_dir:
+            await workspaces.release(working_dir)
+
+jobs = JobManager(execute_job)
+
+def _job_params(data):
+    return {key: data.get(key) for key in ("input", "file", "repo", "smart", "autopr")}
+
+@app.post("/api/jobs")
+async def create_job(request: Request):
+    data = await request.json()
+    tool_name = data.get("tool")
+    if tool_name not in TOOL_MAP:
+        return JSONResponse({"error": f"Unknown tool: {tool_name}"}, status_code=400)
+    job = jobs.submit(tool_name, _job_params(data))
+    return JSONResponse(job.to_dict(), status_code=201)
+
+@app.get("/api/jobs")
+async def list_jobs():
+    return JSONResponse([job.to_dict() for job in jobs.list()])
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = jobs.get(job_id)
+    if not job:
+        return JSONResponse({"error": "Job not found"}, status_code=404)
+    return JSONResponse(job.to_dict())
+
+@app.delete("/api/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    job = jobs.get(job_id)
+    if not job:
+        return JSONResponse({"error": "Job not found"}, status_code=404)
+    cancelled = await jobs.cancel(job_id)
+    return JSONResponse({"cancelled": cancelled, **job.to_dict()})
+
+async def _stream_job(websocket, job, offset=0):
+    """
+    Replays a job's output from `offset` to a websocket, then follows it live
+    until the job ends. A slow socket only delays itself, never the job.
+    """
+    async for text, _ in job.stream(offset):
+        await websocket.send_text(text)
+
+@app.websocket("/ws/jobs/{job_id}")
+async def attach_job(websocket: WebSocket, job_id: str, offset: int = 0):
+    """
+    Attaches to a job's output, replaying from byte `offset` (0 = everything).
+    Closing the socket only detaches: the job keeps running.
+    """
+    await websocket.accept()
+    metrics.WEBSOCKETS.inc()
+    job = jobs.get(job_id)
+    try:
+        if not job:
+            await websocket.send_text(f"[ERROR] Job {job_id} not found.")
+            return
+        await _stream_job(websocket, job, offset)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        metrics.WEBSOCKETS.dec()
+        try:
+            await websocket.close()
+        except:
+            pass
+
 @app.websocket("/ws/run/{tool_name}")
 async def websocket_endpoint(websocket: WebSocket, tool_name: str):
+    """
+    Legacy one-shot endpoint: submits a job from the first message and follows it.
+    The run is tied to the socket, so disconnecting cancels it.
+    """
     await websocket.accept()
-    
-    # Mapping tool names to Git-Alchemist CLI arguments
-    tool_map = {
-        "gen-desc": ["describe"],
-        "gen-topics": ["topics"],
-        "gen-issue": ["issue"],
-        "gen-profile": ["profile"],
-        "arch-init": ["scaffold"],
-        "arch-fix": ["fix"],
-        "arch-explain": ["explain"],
-        "repo-audit": ["audit"],
-        "repo-sage": ["sage"],
-        "repo-commit": ["commit"]
-    }
-    
-    args_base = tool_map.get(tool_name)
-    if not args_base:
+
+    if tool_name not in TOOL_MAP:
         await websocket.close()
         return
 
-    process = None
+    job = None
+    metrics.WEBSOCKETS.inc()
     try:
         data = await websocket.receive_json()
-        user_input = data.get("input", "").strip()
-        user_file = data.get("file", "")
-        target_repo = data.get("repo", "").strip()
-        is_smart = data.get("smart", False)
-        
-        env = os.environ.copy()
-        env["GEMINI_API_KEY"] = APP_STATE["GEMINI_API_KEY"]
-        env["GH_TOKEN"] = APP_STATE["GH_TOKEN"]
-        env["PYTHONPATH"] = os.getcwd() # Ensure imports work
-
-        # Build full command
-        cmd = ["python3", "-m", "app.git_alchemist.src.cli"]
-        if is_smart:
-            cmd.append("--smart")
-        
-        cmd.extend(args_base)
-        
-        # Add tool-specific positional/optional args
-        if tool_name == "gen-issue":
-            cmd.append(user_input)
-        elif tool_name == "arch-init":
-            cmd.append(user_input)
-        elif tool_name == "arch-fix":
-            cmd.append(user_file)
-            cmd.append(user_input)
-        elif tool_name == "arch-explain":
-            cmd.append(user_input)
-        elif tool_name == "repo-sage":
-            cmd.append(user_input)
-        elif tool_name == "repo-audit":
-            if target_repo:
-                repo_name = target_repo.split("/")[-1].replace(".git", "")
-                cmd.extend(["--repo", repo_name])
-        
-        working_dir = None
-        if target_repo:
-            await websocket.send_text(f"[SYSTEM] Context: {target_repo}\n")
-            repo_slug = target_repo.replace("https://github.com/", "").replace(".git", "")
-            safe_name = repo_slug.split("/")[-1]
-            workspace_path = f"/app/workspace/{safe_name}"
-            
-            if not os.path.exists(workspace_path):
-                os.makedirs(workspace_path, exist_ok=True)
-                await websocket.send_text("[SYSTEM] Cloning repository...\n")
-                subprocess.run(["gh", "repo", "clone", repo_slug, "."], cwd=workspace_path, check=False, env=env)
-            
-            working_dir = workspace_path
-
-        await websocket.send_text(f"[SYSTEM] Running Git-Alchemist {tool_name}...\n")
-        
-        process = subprocess.Popen(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-            bufsize=1,
-            env=env,
-            cwd=working_dir
-        )
-
-        for line in process.stdout:
-            await websocket.send_text(line)
-            
-        process.wait()
-        await websocket.send_text(f"\n[SYSTEM] Finished (Exit Code: {process.returncode})")
-        
+        job = jobs.submit(tool_name, _job_params(data))
+        await _stream_job(websocket, job)
     except WebSocketDisconnect:
         pass
     except Exception as e:
         await websocket.send_text(f"\n[ERROR] {str(e)}")
     finally:
-        if process and process.poll() is None:
-            process.terminate()
+        metrics.WEBSOCKETS.dec()
+        if job and not job.done:
+            await jobs.cancel(job.id)
         try:
             await websocket.close()
         except:
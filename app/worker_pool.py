@@ -0,0 +1,331 @@
+import os
+import sys
+import codecs
+import asyncio
+import threading
+import traceback
+import multiprocessing
+
+# Execution mode for Git-Alchemist runs:
+#   "pool"       -> dispatch to pre-warmed worker processes (default)
+#   "subprocess" -> spawn a fresh `python3 -m` per run (full isolation)
+EXEC_MODE = os.getenv("ALCHEMIST_EXEC_MODE", "pool")
+POOL_SIZE = int(os.getenv("ALCHEMIST_WORKERS", "2"))
+# Recycle a worker after this many jobs so leaked module state can't pile up
+MAX_JOBS_PER_WORKER = int(os.getenv("ALCHEMIST_WORKER_MAX_JOBS", "50"))
+
+CLI_MODULE = "app.git_alchemist.src.cli"
+
+
+# ==========================================
+#  Worker process side
+# ==========================================
+
+def _forward_output(read_fd, conn):
+    """Pumps everything written to the job's stdout/stderr back to the server."""
+    with os.fdopen(read_fd, "rb", buffering=0) as pipe:
+        while True:
+            chunk = pipe.read(4096)
+            if not chunk:
+                break
+            conn.send(("out", chunk))
+
+
+def _run_job(conn, cli, argv, cwd, env):
+    saved_env = dict(os.environ)
+    saved_cwd = os.getcwd()
+    saved_argv = sys.argv
+
+    # Redirect at the fd level so child processes (git, gh) are captured too
+    read_fd, write_fd = os.pipe()
+    saved_fds = (os.dup(1), os.dup(2))
+    forwarder = threading.Thread(target=_forward_output, args=(read_fd, conn), daemon=True)
+    forwarder.start()
+
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os.dup2(write_fd, 1)
+    os.dup2(write_fd, 2)
+    os.close(write_fd)
+
+    exit_code = 0
+    try:
+        os.environ.clear()
+        os.environ.update(env)
+        if cwd:
+            os.chdir(cwd)
+        sys.argv = ["alchemist"] + list(argv)
+        try:
+            cli.main()
+        except SystemExit as e:
+            if isinstance(e.code, int):
+                exit_code = e.code
+            elif e.code is not None:
+                print(e.code, file=sys.stderr)
+                exit_code = 1
+        except BaseException:
+            traceback.print_exc()
+            exit_code = 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.dup2(saved_fds[0], 1)
+        os.dup2(saved_fds[1], 2)
+        for fd in saved_fds:
+            os.close(fd)
+        forwarder.join()
+
+        sys.argv = saved_argv
+        os.environ.clear()
+        os.environ.update(saved_env)
+        os.chdir(saved_cwd)
+
+    conn.send(("exit", exit_code))
+
+
+def _worker_main(conn):
+    """
+    Entry point of a pooled worker. Imports the CLI (and with it google.genai,
+    rich, dotenv and every subcommand) once, then serves jobs until told to stop.
+    """
+    import importlib
+    # Jobs chdir into their workspace, so pin relative import paths first
+    sys.path[:] = [os.path.abspath(p) for p in sys.path]
+    cli = importlib.import_module(CLI_MODULE)
+    sys.stdout.reconfigure(line_buffering=True)
+    sys.stderr.reconfigure(line_buffering=True)
+    conn.send(("ready", os.getpid()))
+
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+        argv, cwd, env = job
+        _run_job(conn, cli, argv, cwd, env)
+
+
+# ==========================================
+#  Server side
+# ==========================================
+
+class _Worker:
+    def __init__(self, ctx):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+
+    def wait_ready(self):
+        kind, _ = self.conn.recv()
+        if kind != "ready":
+            raise RuntimeError("Worker failed to start")
+
+    @property
+    def alive(self):
+        return self.process.is_alive()
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+
+class WorkerPool:
+    """
+    A fixed-size pool of pre-warmed Git-Alchemist worker processes.
+    Each worker runs one job at a time; dead or exhausted workers are replaced.
+    """
+
+    def __init__(self, size=POOL_SIZE):
+        self.size = max(1, size)
+        self._ctx = multiprocessing.get_context("spawn")
+        self._idle = asyncio.Queue()
+        self._stopping = False
+
+    def _spawn(self):
+        worker = _Worker(self._ctx)
+        try:
+            worker.wait_ready()
+        except BaseException:
+            worker.kill()
+            raise
+        return worker
+
+    async def start(self):
+        results = await asyncio.gather(
+            *[asyncio.to_thread(self._spawn) for _ in range(self.size)],
+            return_exceptions=True
+        )
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors:
+            # Don't leave the workers that did come up running without a pool
+            await asyncio.gather(*[asyncio.to_thread(w.kill) for w in results if isinstance(w, _Worker)])
+            raise errors[0]
+        for worker in results:
+            self._idle.put_nowait(worker)
+
+    async def stop(self):
+        self._stopping = True
+        while not self._idle.empty():
+            worker = self._idle.get_nowait()
+            try:
+                worker.conn.send(None)
+            except Exception:
+                pass
+            await asyncio.to_thread(worker.kill)
+
+    async def _replace(self, worker):
+        # kill() joins the process (up to 5s), so keep it off the event loop
+        await asyncio.to_thread(worker.kill)
+        if self._stopping:
+            return
+        try:
+            replacement = await asyncio.to_thread(self._spawn)
+        except Exception as e:
+            print(f"[POOL] Failed to respawn worker: {e}", file=sys.stderr)
+            return
+        if self._stopping:
+            # The pool was stopped while the replacement was starting
+            await asyncio.to_thread(replacement.kill)
+        else:
+            self._idle.put_nowait(replacement)
+
+    async def acquire(self):
+        return await self._idle.get()
+
+    def release(self, worker, healthy=True):
+        if healthy and worker.alive and worker.jobs < MAX_JOBS_PER_WORKER and not self._stopping:
+            self._idle.put_nowait(worker)
+        else:
+            # _replace only kills the worker once the pool is stopping
+            asyncio.create_task(self._replace(worker))
+
+
+class SubprocessRun:
+    """Runs the CLI in a fresh `python3 -m` interpreter."""
+
+    def __init__(self, args, env, cwd):
+        self.args = args
+        self.env = env
+        self.cwd = cwd
+        self.process = None
+        self.returncode = None
+
+    async def start(self):
+        self.process = await asyncio.create_subprocess_exec(
+            "python3", "-m", CLI_MODULE, *self.args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            env=self.env,
+            cwd=self.cwd,
+            limit=1024 * 1024
+        )
+
+    async def output(self):
+        # Forward whatever is available instead of waiting for whole lines,
+        # so streamed model output reaches the client as it is generated
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        while True:
+            chunk = await self.process.stdout.read(4096)
+            if not chunk:
+                break
+            text = decoder.decode(chunk)
+            if text:
+                yield text
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
+        self.returncode = await self.process.wait()
+
+    async def terminate(self):
+        if self.process and self.process.returncode is None:
+            self.process.terminate()
+            await self.process.wait()
+
+
+class PoolRun:
+    """Runs the CLI inside a pre-warmed worker from a WorkerPool."""
+
+    def __init__(self, pool, args, env, cwd):
+        self.pool = pool
+        self.args = args
+        self.env = env
+        self.cwd = cwd
+        self.worker = None
+        self.returncode = None
+
+    async def start(self):
+        self.worker = await self.pool.acquire()
+        self.worker.jobs += 1
+        self.worker.conn.send((list(self.args), self.cwd, dict(self.env)))
+
+    async def output(self):
+        conn = self.worker.conn
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        while True:
+            try:
+                kind, payload = await asyncio.to_thread(conn.recv)
+            except (EOFError, OSError):
+                # Worker died mid-job
+                self.returncode = -1
+                break
+            if kind == "exit":
+                self.returncode = payload
+                break
+            text = decoder.decode(payload)
+            if text:
+                yield text
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
+        self._release(healthy=self.returncode != -1)
+
+    def _release(self, healthy):
+        if self.worker:
+            worker, self.worker = self.worker, None
+            self.pool.release(worker, healthy=healthy)
+
+    async def terminate(self):
+        # A job can't be interrupted cleanly in-process, so the worker is
+        # sacrificed and the pool spawns a fresh one in its place.
+        if self.worker and self.returncode is None:
+            self.worker.process.kill()
+            self._release(healthy=False)
+
+
+_pool = None
+
+
+async def start_pool():
+    """Starts the shared worker pool, falling back to subprocess mode on failure."""
+    global _pool
+    if EXEC_MODE != "pool":
+        return
+    try:
+        pool = WorkerPool(POOL_SIZE)
+        await pool.start()
+        _pool = pool
+    except Exception as e:
+        print(f"[POOL] Could not start worker pool, using subprocess mode: {e}", file=sys.stderr)
+
+
+async def stop_pool():
+    global _pool
+    if _pool:
+        await _pool.stop()
+        _pool = None
+
+
+async def start_run(args, env, cwd=None):
+    """Starts a Git-Alchemist run in the configured execution mode."""
+    if _pool is not None:
+        run = PoolRun(_pool, args, env, cwd)
+    else:
+        run = SubprocessRun(args, env, cwd)
+    await run.start()
+    return run
@@ -0,0 +1,260 @@
+import os
+import re
+import json
+import time
+import shutil
+import asyncio
+from collections import Counter
+
+from app.metrics import CLONE_DURATION
+
+WORKSPACE_ROOT = os.getenv("WORKSPACE_ROOT", "/app/workspace")
+# Total disk budget for cloned workspaces; least-recently-used ones are evicted beyond it
+WORKSPACE_BUDGET_MB = int(os.getenv("WORKSPACE_BUDGET_MB", "2048"))
+# First-time checkouts are partial clones: blobless by default, optionally shallow too
+CLONE_FILTER = os.getenv("WORKSPACE_CLONE_FILTER", "blob:none")
+CLONE_DEPTH = os.getenv("WORKSPACE_CLONE_DEPTH", "")
+
+STATE_FILE = ".workspaces.json"
+
+
+def _remote_slug(url):
+    """`owner/name` of a git remote URL (https, ssh or scp-style), lowercased."""
+    path = re.sub(r"^[a-z+]+://[^/]*/|^[^@/:]+@[^:]+:", "", url.strip().lower()).rstrip("/")
+    if path.endswith(".git"):
+        path = path[:-len(".git")]
+    return "/".join(path.split("/")[-2:])
+
+
+def _dir_size(path):
+    """Disk usage of a directory tree in bytes (allocated blocks, not apparent size)."""
+    total = 0
+    for root, dirs, files in os.walk(path):
+        for name in files:
+            try:
+                st = os.lstat(os.path.join(root, name))
+                total += getattr(st, "st_blocks", 0) * 512 or st.st_size
+            except OSError:
+                continue
+    return total
+
+
+class WorkspaceManager:
+    """
+    Keeps one reusable clone per repository under WORKSPACE_ROOT.
+
+    - Cache hit: the clone is refreshed with `git fetch` + hard reset to the remote default branch,
+      unless another run is still using it (then it is shared as is).
+    - Cache miss: a partial (blobless / shallow) clone is created.
+    - After each run, least-recently-used idle workspaces are evicted until the
+      total size fits the disk budget.
+    """
+
+    def __init__(self, root=WORKSPACE_ROOT, budget_mb=WORKSPACE_BUDGET_MB):
+        self.root = root
+        self.budget = budget_mb * 1024 * 1024
+        self.stats = Counter(hits=0, misses=0, evictions=0, refresh_failures=0)
+        self._locks = {}
+        self._active = Counter()
+        self._state = self._load_state()
+
+    # ---------- persistence ----------
+
+    def _state_path(self):
+        return os.path.join(self.root, STATE_FILE)
+
+    def _load_state(self):
+        try:
+            with open(self._state_path(), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = self._state_path() + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._state, f)
+        os.replace(tmp_path, self._state_path())
+
+    # ---------- git helpers ----------
+
+    async def _git(self, *args, cwd=None, env=None):
+        process = await asyncio.create_subprocess_exec(
+            *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            cwd=cwd,
+            env=env
+        )
+        try:
+            output, _ = await process.communicate()
+        except asyncio.CancelledError:
+            # Don't leave a clone/fetch running after its job was cancelled
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+            raise
+        return process.returncode, output.decode("utf-8", errors="replace").strip()
+
+    async def _clone(self, slug, path, env):
+        extra = []
+        if CLONE_FILTER:
+            extra.append(f"--filter={CLONE_FILTER}")
+        if CLONE_DEPTH:
+            extra.extend(["--depth", CLONE_DEPTH])
+        code, output = await self._git("gh", "repo", "clone", slug, path, "--", *extra, env=env)
+        if code != 0:
+            raise RuntimeError(f"Clone of {slug} failed: {output}")
+
+    async def _origin_matches(self, slug, path, env):
+        code, url = await self._git("git", "remote", "get-url", "origin", cwd=path, env=env)
+        if code != 0:
+            return False
+        # Exact match: `owner/repo` must not reuse a clone of `owner/repo-fork` or `other/repo`
+        remote = _remote_slug(url)
+        wanted = slug.strip("/").lower()
+        return remote == wanted if "/" in wanted else remote.split("/")[-1] == wanted
+
+    async def _refresh(self, path, env):
+        """Fast-forwards an existing clone to the remote default branch, discarding local edits."""
+        fetch = ["git", "fetch", "--prune", "origin"]
+        if CLONE_DEPTH:
+            fetch.extend(["--depth", CLONE_DEPTH])
+        code, output = await self._git(*fetch, cwd=path, env=env)
+        if code != 0:
+            raise RuntimeError(output)
+
+        code, ref = await self._git("git", "symbolic-ref", "--short", "refs/remotes/origin/HEAD", cwd=path, env=env)
+        if code != 0:
+            await self._git("git", "remote", "set-head", "origin", "--auto", cwd=path, env=env)
+            code, ref = await self._git("git", "symbolic-ref", "--short", "refs/remotes/origin/HEAD", cwd=path, env=env)
+        if code != 0:
+            raise RuntimeError("Could not determine the remote default branch")
+
+        branch = ref.split("/", 1)[-1]
+        for cmd in (["git", "checkout", "-q", "-B", branch, ref],
+                    ["git", "reset", "-q", "--hard", ref],
+                    ["git", "clean", "-q", "-fd"]):
+            code, output = await self._git(*cmd, cwd=path, env=env)
+            if code != 0:
+                raise RuntimeError(output)
+
+    # ---------- public API ----------
+
+    async def acquire(self, slug, env, log=None):
+        """
+        Returns an up-to-date workspace path for `owner/name`, cloning or refreshing it as needed.
+        `log` is an optional async callable for progress messages.
+        """
+        async def say(msg):
+            if log:
+                await log(msg)
+
+        name = slug.split("/")[-1]
+        path = os.path.join(self.root, name)
+        lock = self._locks.setdefault(name, asyncio.Lock())
+
+        async with lock:
+            # Another run is using this clone: refreshing would reset and clean its in-progress edits
+            busy = self._active[name] > 0
+            self._active[name] += 1
+            acquired = False
+            try:
+                reusable = os.path.isdir(os.path.join(path, ".git")) and await self._origin_matches(slug, path, env)
+                if busy and not reusable:
+                    raise RuntimeError(f"Workspace {name} is in use by a run on another repository")
+                if reusable and busy:
+                    self.stats["hits"] += 1
+                    await say("[SYSTEM] Workspace in use by another run, skipping refresh.\n")
+                elif reusable:
+                    self.stats["hits"] += 1
+                    await say("[SYSTEM] Refreshing workspace...\n")
+                    started = time.perf_counter()
+                    try:
+                        await self._refresh(path, env)
+                        CLONE_DURATION.observe(time.perf_counter() - started, operation="refresh")
+                    except Exception as e:
+                        self.stats["refresh_failures"] += 1
+                        await say(f"[SYSTEM] Refresh failed, using cached copy: {e}\n")
+                else:
+                    self.stats["misses"] += 1
+                    if os.path.exists(path):
+                        await asyncio.to_thread(shutil.rmtree, path, True)
+                    os.makedirs(self.root, exist_ok=True)
+                    await say("[SYSTEM] Cloning repository...\n")
+                    started = time.perf_counter()
+                    await self._clone(slug, path, env)
+                    CLONE_DURATION.observe(time.perf_counter() - started, operation="clone")
+                acquired = True
+            finally:
+                # Also on cancellation, or the workspace could never be evicted
+                if not acquired:
+                    self._active[name] -= 1
+                    if self._active[name] <= 0:
+                        del self._active[name]
+
+        entry = self._state.setdefault(name, {})
+        entry["slug"] = slug
+        entry["last_used"] = time.time()
+        self._save_state()
+        return path
+
+    async def release(self, path):
+        """Marks a run as finished, records the workspace size and enforces the disk budget."""
+        name = os.path.basename(path)
+        self._active[name] -= 1
+        if self._active[name] <= 0:
+            del self._active[name]
+
+        entry = self._state.setdefault(name, {})
+        entry["last_used"] = time.time()
+        entry["size"] = await asyncio.to_thread(_dir_size, path)
+        self._save_state()
+        await self.evict()
+
+    async def evict(self):
+        """Removes least-recently-used idle workspaces until usage fits the budget."""
+        if not os.path.isdir(self.root):
+            return
+
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name.startswith(".") or not os.path.isdir(path) or name in self._state:
+                continue
+            # Directory from before tracking existed: size it once, treat as oldest
+            self._state[name] = {"last_used": os.path.getmtime(path), "size": await asyncio.to_thread(_dir_size, path)}
+
+        for name in [n for n in self._state if not os.path.isdir(os.path.join(self.root, n))]:
+            del self._state[name]
+
+        total = sum(e.get("size", 0) for e in self._state.values())
+        for name, entry in sorted(self._state.items(), key=lambda kv: kv[1].get("last_used", 0)):
+            if total <= self.budget:
+                break
+            if self._active[name] > 0:
+                continue
+            async with self._locks.setdefault(name, asyncio.Lock()):
+                await asyncio.to_thread(shutil.rmtree, os.path.join(self.root, name), True)
+            total -= entry.get("size", 0)
+            del self._state[name]
+            self.stats["evictions"] += 1
+
+        self._save_state()
+
+    def snapshot(self):
+        """Counters and per-workspace usage, for sizing the budget."""
+        return {
+            "budget_bytes": self.budget,
+            "used_bytes": sum(e.get("size", 0) for e in self._state.values()),
+            "stats": dict(self.stats),
+            "workspaces": {
+                name: {
+                    "slug": entry.get("slug"),
+                    "last_used": entry.get("last_used"),
+                    "size": entry.get("size", 0),
+                    "active": self._active.get(name, 0),
+                }
+                for name, entry in self._state.items()
+            },
+        }
@@ -0,0 +1,43 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.git_alchemist.src import core
+
+
+class FakeModels:
+    def __init__(self):
+        self.in_flight = 0
+        self.peak = 0
+
+    async def generate_content(self, model, contents):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.05)
+        self.in_flight -= 1
+        return SimpleNamespace(text=f"{model}: {contents}")
+
+
+def test_agenerate_content_runs_concurrently(monkeypatch):
+    models = FakeModels()
+    monkeypatch.setattr(core, "get_gemini_client", lambda: SimpleNamespace(aio=SimpleNamespace(models=models)))
+    monkeypatch.setattr(core, "available_models", lambda tier: (list(tier), []))
+    monkeypatch.setattr(core, "record_success", lambda *args: None)
+    monkeypatch.setenv("ALCHEMIST_NO_EVENTS", "1")
+
+    async def main():
+        return await asyncio.gather(
+            core.agenerate_content("one", cache=False, quiet=True),
+            core.agenerate_content("two", cache=False, quiet=True),
+        )
+
+    first_model = core.FAST_MODELS[0]
+    assert asyncio.run(main()) == [f"{first_model}: one", f"{first_model}: two"]
+    assert models.peak == 2
+
+
+def test_pack_context_marker_stays_within_budget():
+    text = "\n\n".join(f"paragraph {i} " + "word " * 20 for i in range(20))
+    for budget in (3, 20, 60, 200):
+        packed, report = core.pack_context([{"name": "doc", "text": text}], budget=budget, quiet=True)
+        assert (core.estimate_tokens(packed["doc"]) if packed["doc"] else 0) <= budget
+        assert report[0]["kept_tokens"] <= report[0]["original_tokens"]
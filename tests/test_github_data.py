@@ -0,0 +1,32 @@
+import math
+
+import pytest
+
+from app.git_alchemist.src import github_data
+
+
+@pytest.mark.parametrize("count", [0, 1, 19, 20, 21, 45, 100])
+def test_fetch_repo_details_one_query_per_chunk(count, monkeypatch):
+    queries = []
+
+    def fake_graphql(query):
+        queries.append(query)
+        return {f"r{i}": {"description": f"d{i}"} for i in range(query.count("repository("))}
+
+    monkeypatch.setattr(github_data, "run_graphql", fake_graphql)
+    names = [f"repo{i}" for i in range(count)]
+
+    details = github_data.fetch_repo_details("octo", names, chunk_size=20)
+
+    assert len(queries) == math.ceil(count / 20)
+    assert sorted(details) == sorted(names)
+
+
+def test_fetch_repo_details_default_chunk_and_duplicates(monkeypatch):
+    calls = []
+    monkeypatch.setattr(github_data, "run_graphql", lambda query: calls.append(query) or {})
+    names = [f"repo{i}" for i in range(github_data.CHUNK_SIZE * 2 + 1)]
+
+    github_data.fetch_repo_details("octo", names + names[:5])
+
+    assert len(calls) == math.ceil(len(names) / github_data.CHUNK_SIZE)
@@ -0,0 +1,38 @@
+import json
+
+from app import metrics
+
+
+def _append(path, *events):
+    with open(path, "a", encoding="utf-8") as f:
+        for event in events:
+            f.write(json.dumps({"event": event}) + "\n")
+
+
+def _tail(path):
+    tail = metrics.EventLogTail(str(path))
+    seen = []
+    tail._apply = lambda event: seen.append(event["event"])
+    return tail, seen
+
+
+def test_event_log_tail_starts_at_end(tmp_path):
+    log = tmp_path / "events.jsonl"
+    _append(log, "old")
+    tail, seen = _tail(log)
+    _append(log, "new")
+    tail.collect()
+    assert seen == ["new"]
+
+
+def test_event_log_tail_finishes_rotated_file(tmp_path):
+    log = tmp_path / "events.jsonl"
+    tail, seen = _tail(log)
+    _append(log, "a")
+    tail.collect()
+    _append(log, "b")
+    log.rename(str(log) + ".1")
+    # The new file outgrows the old offset before the next collect
+    _append(log, "c", "d", "e")
+    tail.collect()
+    assert seen == ["a", "b", "c", "d", "e"]
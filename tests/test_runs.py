@@ -0,0 +1,40 @@
+import os
+import asyncio
+
+from app import worker_pool
+
+# Stands in for the CLI: prints a line every 50ms so its runtime overlaps the other run
+TICKER = """
+import sys
+import time
+
+for i in range(6):
+    print(f"{sys.argv[1]}{i}", flush=True)
+    time.sleep(0.05)
+"""
+
+
+def test_concurrent_runs_interleave(tmp_path, monkeypatch):
+    (tmp_path / "ticker.py").write_text(TICKER)
+    monkeypatch.setattr(worker_pool, "CLI_MODULE", "ticker")
+    monkeypatch.setattr(worker_pool, "_pool", None)
+    env = dict(os.environ, PYTHONPATH=str(tmp_path))
+
+    arrivals = []
+
+    async def consume(run, tag):
+        async for chunk in run.output():
+            arrivals.extend(tag for _ in chunk.split())
+        return run.returncode
+
+    async def main():
+        first = await worker_pool.start_run(["a"], env, str(tmp_path))
+        second = await worker_pool.start_run(["b"], env, str(tmp_path))
+        assert isinstance(first, worker_pool.SubprocessRun)
+        return await asyncio.gather(consume(first, "a"), consume(second, "b"))
+
+    assert asyncio.run(main()) == [0, 0]
+    assert sorted(arrivals) == ["a"] * 6 + ["b"] * 6
+    # One run streaming to the end before the other starts would give a single switch
+    switches = sum(1 for prev, cur in zip(arrivals, arrivals[1:]) if prev != cur)
+    assert switches > 1, arrivals
@@ -0,0 +1,22 @@
+import asyncio
+
+import pytest
+
+from app.workspace import WorkspaceManager
+
+
+@pytest.mark.parametrize("remote, slug, expected", [
+    ("https://github.com/owner/repo.git", "owner/repo", True),
+    ("git@github.com:Owner/Repo.git", "owner/repo", True),
+    ("https://github.com/owner/repo/", "owner/repo", True),
+    ("https://github.com/owner/repo-fork.git", "owner/repo", False),
+    ("https://github.com/other-owner/repo.git", "owner/repo", False),
+])
+def test_origin_matches_is_exact(tmp_path, remote, slug, expected):
+    manager = WorkspaceManager(root=str(tmp_path))
+
+    async def fake_git(*args, cwd=None, env=None):
+        return 0, remote
+
+    manager._git = fake_git
+    assert asyncio.run(manager._origin_matches(slug, str(tmp_path), {})) is expected